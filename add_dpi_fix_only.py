@@ -4,18 +4,34 @@ Add only the DPI fix after medianValuesPlugin.
 """
 
 import re
-from pathlib import Path
 
-def add_dpi_fix(file_path):
-    """Add DPI fix after medianValuesPlugin closes."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from check_chart_scripts import declaration_scopes
+from js_blocks import chart_script_index
+from transform_registry import update_chart
+
+# Names the DPI fix declares
+DPI_NAMES = {'dpr', 'canvas', 'rect'}
+
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def plugin_scope_names(content):
+    """Return the names declared in the same scope as medianValuesPlugin, or None if it is missing."""
+
+    index = chart_script_index(content)
+    span = index.declaration_span('medianValuesPlugin') if index else None
+    if span is None:
+        return None
+    scopes = declaration_scopes(index)
+    return {name for _, name, pos, _ in index.declarations if scopes[pos] == scopes[span[0]]}
+
+
+def transform_content(content, file_path):
+    """Add DPI fix after medianValuesPlugin closes."""
 
     # Check if already has DPI fix
     if '// Fix blurry canvas on high-DPI displays' in content:
-        print(f"Skipped (already has DPI fix): {file_path.name}")
-        return
+        return content
 
     dpi_fix = '''
         // Fix blurry canvas on high-DPI displays
@@ -27,30 +43,37 @@ def add_dpi_fix(file_path):
         ctx.scale(dpr, dpr);
 '''
 
-    # Find the closing of medianValuesPlugin and add DPI fix after it
-    # Pattern: the closing }; of the plugin
-    pattern = r'(const medianValuesPlugin = \{[^}]*id: ["\']medianValues["\'][^}]*afterDatasetsDraw:[^}]*\}(?:[^}]*\{[^}]*\}[^}]*)*\s*\};)'
+    # Find the closing }; of medianValuesPlugin and add DPI fix after it
+    index = chart_script_index(content)
+    span = index.declaration_span('medianValuesPlugin') if index else None
+    if span is None:
+        return content
+
+    # The charts that already set up the canvas declare these next to the
+    # plugin; declaring them again would be a SyntaxError
+    if DPI_NAMES & plugin_scope_names(content):
+        return content
 
-    def replace_func(match):
-        return match.group(1) + dpi_fix
+    plugin = content[span[0]:span[1]]
+    if re.search(r'id: ["\']medianValues["\']', plugin) and 'afterDatasetsDraw:' in plugin:
+        content = content[:span[1]] + dpi_fix + content[span[1]:]
 
-    content = re.sub(pattern, replace_func, content, flags=re.DOTALL)
+    return content
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
 
-    print(f"Updated: {file_path.name}")
+def add_dpi_fix(file_path):
+    """Add DPI fix after medianValuesPlugin closes."""
+
+    update_chart('add_dpi_fix_only', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -59,8 +82,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Adding DPI fix after medianValuesPlugin...\n")
 
-    for chart_file in all_charts:
-        add_dpi_fix(chart_file)
+    run_jobs(add_dpi_fix, all_charts, jobs)
 
     print(f"\nCompleted!")
 
@@ -3,19 +3,18 @@
 Add DPI fix after medianValuesPlugin closing brace.
 """
 
-from pathlib import Path
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-def add_dpi_fix(file_path):
-    """Add DPI fix after medianValuesPlugin closes."""
-
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+def transform_content(content, file_path):
+    """Add DPI fix after medianValuesPlugin closes. Returns None if the plugin is not found."""
 
     # Check if already has DPI fix
-    for line in lines:
-        if '// Fix blurry canvas on high-DPI displays' in line:
-            print(f"Skipped (already has DPI fix): {file_path.name}")
-            return
+    if '// Fix blurry canvas on high-DPI displays' in content:
+        return content
+
+    lines = content.splitlines(keepends=True)
 
     dpi_fix_lines = [
         '\n',
@@ -47,24 +46,25 @@ def add_dpi_fix(file_path):
                 found_plugin_close = True
 
     if not found_plugin_close:
-        print(f"ERROR: Could not find medianValuesPlugin closing in {file_path.name}")
-        return
+        return None
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.writelines(new_lines)
+    return ''.join(new_lines)
 
-    print(f"Updated: {file_path.name}")
+
+def add_dpi_fix(file_path):
+    """Add DPI fix after medianValuesPlugin closes."""
+
+    update_chart('add_dpi_fix_simple', transform_content, file_path,
+                 error="Could not find medianValuesPlugin closing")
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -73,8 +73,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Adding DPI fix after medianValuesPlugin...\n")
 
-    for chart_file in all_charts:
-        add_dpi_fix(chart_file)
+    run_jobs(add_dpi_fix, all_charts, jobs)
 
     print(f"\nCompleted!")
 
@@ -4,17 +4,17 @@ Apply the working DPI fix from exemplar chart to all severity charts.
 """
 
 import re
-from pathlib import Path
 
-def apply_dpi_fix(file_path):
-    """Apply the exact DPI fix that works in exemplar chart."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Apply the exact DPI fix that works in exemplar chart."""
 
-    # Remove any existing DPI fix code
+    # Remove any existing DPI fix code, with the blank lines in front of it
     content = re.sub(
-        r'// Fix blurry canvas on high-DPI displays.*?ctx\.scale\(dpr, dpr\);',
+        r'\s*// Fix blurry canvas on high-DPI displays.*?ctx\.scale\(dpr, dpr\);',
         '',
         content,
         flags=re.DOTALL
@@ -48,35 +48,38 @@ def apply_dpi_fix(file_path):
         ctx.scale(dpr, dpr);'''
 
     # Replace the ctx definition
-    content = re.sub(
+    content, replaced = re.subn(
         r'const canvas = document\.getElementById\(\'severityChart\'\);.*?const ctx = canvas\.getContext\(\'2d\'\);',
         working_fix,
         content,
         flags=re.DOTALL
     )
 
-    # Also handle simpler case
-    content = re.sub(
-        r'const ctx = document\.getElementById\(\'severityChart\'\)\.getContext\(\'2d\'\);',
-        working_fix,
-        content
-    )
+    # Also handle simpler case (not after the replacement above, which
+    # produces this exact line and would get a second fix block)
+    if not replaced:
+        content = re.sub(
+            r'const ctx = document\.getElementById\(\'severityChart\'\)\.getContext\(\'2d\'\);',
+            working_fix,
+            content
+        )
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def apply_dpi_fix(file_path):
+    """Apply the exact DPI fix that works in exemplar chart."""
+
+    update_chart('apply_working_dpi_fix', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts (not the exemplar)
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts (not the exemplar)
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -85,8 +88,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Applying working DPI fix from exemplar chart...\n")
 
-    for chart_file in all_charts:
-        apply_dpi_fix(chart_file)
+    run_jobs(apply_dpi_fix, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
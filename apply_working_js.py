@@ -4,15 +4,21 @@ Apply the working JavaScript structure from risk1_bau_chart_updated.html to all
 Keep each chart's unique data but use the working code structure.
 """
 
+from functools import partial
 from pathlib import Path
 import re
 
+from chart_catalog import severity_charts
+from chart_io import read_chart, write_chart
+from chart_jobs import parse_jobs, run_jobs
+from encode_expert_data import expert_data_span
+
 def extract_data(content):
     """Extract the unique data arrays from a chart file."""
 
-    # Extract expert data
-    expert_data_match = re.search(r'const expertData = (\[.*?\]);', content, re.DOTALL)
-    expert_data = expert_data_match.group(1) if expert_data_match else None
+    # Extract expert data (the whole declaration, which may store it by column)
+    span = expert_data_span(content)
+    expert_data = content[span[0]:span[1]] if span else None
 
     # Extract exceedance data
     exceedance_match = re.search(r'const exceedanceData = (\[.*?\]);', content, re.DOTALL)
@@ -35,13 +41,10 @@ def apply_template(template_content, data):
     result = template_content
 
     # Replace expert data
-    if data['expert_data']:
-        result = re.sub(
-            r'const expertData = \[.*?\];',
-            f'const expertData = {data["expert_data"]};',
-            result,
-            flags=re.DOTALL
-        )
+    template_span = expert_data_span(result)
+    if data['expert_data'] and template_span:
+        start, end = template_span
+        result = result[:start] + data['expert_data'] + result[end:]
 
     # Replace exceedance data
     if data['exceedance_data']:
@@ -64,23 +67,37 @@ def apply_template(template_content, data):
     return result
 
 
+def update_chart(template_content, chart_file):
+    """Rewrite one chart from the template, keeping its own data."""
+
+    chart_content = read_chart(chart_file)
+
+    # Extract unique data from this chart
+    data = extract_data(chart_content)
+
+    # Apply template with this chart's data
+    new_content = apply_template(template_content, data)
+
+    # Write back
+    write_chart(chart_file, new_content)
+
+    print(f"Updated: {chart_file.name}")
+
+
 def main():
     """Process all severity chart files."""
 
+    jobs = parse_jobs(__doc__)
+
     template_file = Path('risk1_bau_chart_updated.html')
     if not template_file.exists():
         print("ERROR: Template file risk1_bau_chart_updated.html not found!")
         return
 
-    with open(template_file, 'r', encoding='utf-8') as f:
-        template_content = f.read()
+    template_content = read_chart(template_file)
 
     # Find all charts except the template
-    all_charts = []
-    for pattern in ['risk*_bau_chart.html', 'risk*_pm_chart.html']:
-        all_charts.extend([f for f in Path('.').glob(pattern) if f.name != 'risk1_bau_chart_updated.html'])
-
-    all_charts = sorted(set(all_charts))
+    all_charts = sorted(severity_charts())
 
     if not all_charts:
         print("No charts found!")
@@ -89,21 +106,7 @@ def main():
     print(f"Found {len(all_charts)} charts to update")
     print(f"Using template: {template_file.name}\n")
 
-    for chart_file in all_charts:
-        with open(chart_file, 'r', encoding='utf-8') as f:
-            chart_content = f.read()
-
-        # Extract unique data from this chart
-        data = extract_data(chart_content)
-
-        # Apply template with this chart's data
-        new_content = apply_template(template_content, data)
-
-        # Write back
-        with open(chart_file, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-
-        print(f"Updated: {chart_file.name}")
+    run_jobs(partial(update_chart, template_content), all_charts, jobs)
 
     print(f"\nCompleted!")
 
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the chart patch and split scripts.
+
+Each benchmark times one script's per-file function (fix_layout,
+apply_dpi_fix, fix_risk_name, split_table, ...) on a
+fixed set of fixture charts from the chart catalog. Every call gets a fresh
+copy of its fixture in a scratch directory, so patch functions always see
+the same input. The transform:NAME benchmarks time a registered transform's
+transform_content() in memory, without I/O or the already-applied guard.
+
+Each benchmark runs in its own process, which gives a clean peak RSS.
+Results (files/sec, latency percentiles, peak RSS, outcome counts and the
+fixture hashes) are written as JSON; --compare reports changes against an
+earlier results file and exits non-zero on a regression:
+
+    python bench_charts.py                          # everything -> bench_results.json
+    python bench_charts.py 'split_*' fix_layout --rounds 5
+    python bench_charts.py --compare baseline.json
+"""
+
+import argparse
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from fnmatch import fnmatch
+from functools import partial
+from pathlib import Path
+
+import chart_io
+import chart_metrics
+import transform_registry
+from chart_catalog import ChartCatalog
+from chart_split import SPLITS
+
+DEFAULT_OUTPUT = 'bench_results.json'
+
+# Timed passes over the fixtures, after WARMUP untimed ones
+ROUNDS = 3
+WARMUP = 1
+
+# Slowdown of files/sec or p90 latency against --compare reported as a regression
+REGRESSION = 1.25
+
+PERCENTILES = (50, 90, 99)
+
+REPO_DIR = Path(__file__).resolve().parent
+
+# Fixture sets: chart catalog queries over the repository's charts
+FIXTURES = {
+    'severity': lambda catalog: (catalog.select('severity', scenario='bau') +
+                                 catalog.select('severity', scenario='pm')),
+    'sector': lambda catalog: catalog.select('sector_vulnerability', group=None),
+    'vuln_actors': lambda catalog: catalog.select('vuln_actors'),
+    'resp_actors': lambda catalog: catalog.select('resp_actors'),
+}
+
+
+def _split_table(kind, func, path):
+    func(path, SPLITS[kind], 1)
+
+
+class Benchmark:
+    """A per-file function of a chart script, timed on one fixture set."""
+
+    def __init__(self, name, module, function, fixtures='severity', call=None, transform=False):
+        self.name = name
+        self.module = module
+        self.function = function
+        self.fixtures = fixtures
+        self.call = call
+        self.transform = transform
+
+    def resolve(self):
+        return getattr(importlib.import_module(self.module), self.function)
+
+
+SCRIPT_BENCHMARKS = [
+    Benchmark('split_table:vuln', 'chart_split', 'split_table', 'vuln_actors', partial(_split_table, 'vuln')),
+    Benchmark('split_table:resp', 'chart_split', 'split_table', 'resp_actors', partial(_split_table, 'resp')),
+    Benchmark('split_table:sector', 'chart_split', 'split_table', 'sector', partial(_split_table, 'sector')),
+    Benchmark('add_dpi_fix', 'add_dpi_fix_only', 'add_dpi_fix'),
+    Benchmark('add_dpi_fix_simple', 'add_dpi_fix_simple', 'add_dpi_fix'),
+    Benchmark('apply_dpi_fix', 'apply_working_dpi_fix', 'apply_dpi_fix'),
+    Benchmark('check_chart', 'check_chart_scripts', 'check_chart'),
+    Benchmark('fix_blank_charts', 'fix_blank_charts_final', 'fix_blank_charts'),
+    Benchmark('fix_blur_and_labels', 'fix_blur_and_labels', 'fix_blur_and_labels'),
+    Benchmark('fix_chart_file', 'final_fix', 'fix_chart_file'),
+    Benchmark('fix_chart_resolution', 'fix_chart_resolution', 'fix_chart_resolution'),
+    Benchmark('fix_controls', 'fix_severity_controls', 'fix_controls'),
+    Benchmark('fix_ctx_properly', 'fix_ctx_properly', 'fix_ctx_properly'),
+    Benchmark('fix_dpi_correct', 'fix_dpi_final_correct', 'fix_dpi_correct'),
+    Benchmark('fix_duplicate_canvas', 'fix_duplicate_canvas', 'fix_duplicate_canvas'),
+    Benchmark('fix_event_handler_order', 'fix_event_handler_order', 'fix_event_handler_order'),
+    Benchmark('fix_iframe_blur', 'fix_iframe_blur_final', 'fix_iframe_blur'),
+    Benchmark('fix_iframe_rendering', 'fix_iframe_quality', 'fix_iframe_rendering'),
+    Benchmark('fix_layout', 'fix_layout_optimization', 'fix_layout'),
+    Benchmark('fix_missing_ctx', 'fix_missing_ctx', 'fix_missing_ctx'),
+    Benchmark('fix_rendering_and_labels', 'fix_canvas_and_labels', 'fix_rendering_and_labels'),
+    Benchmark('fix_risk_name', 'fix_risk_names', 'fix_risk_name'),
+    Benchmark('move_dpi_fix', 'move_dpi_fix_correctly', 'move_dpi_fix'),
+    Benchmark('move_handlers', 'move_handlers_simple', 'move_handlers'),
+    Benchmark('move_labels_up', 'move_labels_up', 'move_labels_up'),
+    Benchmark('reduce_chart_height', 'reduce_severity_height', 'reduce_chart_height'),
+    Benchmark('reduce_sizes', 'reduce_title_and_height', 'reduce_sizes'),
+    Benchmark('revert_labels', 'revert_harm_labels', 'revert_labels'),
+]
+
+TRANSFORM_BENCHMARKS = [
+    Benchmark(f'transform:{transform.name}', transform.name, 'transform_content', transform=True)
+    for transform in transform_registry.TRANSFORMS
+]
+
+BENCHMARKS = {benchmark.name: benchmark for benchmark in SCRIPT_BENCHMARKS + TRANSFORM_BENCHMARKS}
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of a sorted list."""
+
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+def fixture_files(fixtures, root=REPO_DIR):
+    """Return {name: hash} of a fixture set's charts, in benchmark order."""
+
+    catalog = ChartCatalog(root).load()
+    catalog.refresh()
+    return {path.name: catalog.lookup(path)['hash'] for path in FIXTURES[fixtures](catalog)}
+
+
+def _time_call(benchmark, func, path):
+    """Run one call; return (seconds, status)."""
+
+    if benchmark.transform:
+        content = chart_io.read_chart(path)
+        start = time.perf_counter()
+        result = func(content, path)
+        elapsed = time.perf_counter() - start
+        status = 'failed' if result is None else 'skipped' if result == content else 'changed'
+        return elapsed, status
+
+    before = chart_metrics.begin_file(path)
+    output = io.StringIO()
+    error = None
+    with redirect_stdout(output):
+        start = time.perf_counter()
+        try:
+            if benchmark.call is None:
+                func(path)
+            else:
+                benchmark.call(func, path)
+        except Exception:
+            error = traceback.format_exc()
+        elapsed = time.perf_counter() - start
+    chart_io.take_written()
+    return elapsed, chart_metrics.file_metrics(path, before, elapsed, output.getvalue(), error)['status']
+
+
+def run_benchmark(name, names, rounds=ROUNDS, warmup=WARMUP, root=REPO_DIR):
+    """Time one benchmark on the named fixture charts (run in a fresh process)."""
+
+    benchmark = BENCHMARKS[name]
+    sys.path.insert(0, str(root))
+    func = benchmark.resolve()
+
+    latencies = []
+    statuses = Counter()
+    with tempfile.TemporaryDirectory(prefix='bench_charts.') as work_dir:
+        os.chdir(work_dir)
+        for round_num in range(warmup + rounds):
+            for file_name in names:
+                shutil.copyfile(Path(root) / file_name, file_name)
+                elapsed, status = _time_call(benchmark, func, Path(file_name))
+                if round_num >= warmup:
+                    latencies.append(elapsed)
+                    statuses[status] += 1
+        os.chdir(root)
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        'module': benchmark.module,
+        'function': benchmark.function,
+        'fixtures': benchmark.fixtures,
+        'calls': len(latencies),
+        'seconds': total,
+        'files_per_second': len(latencies) / total if total else None,
+        'latency_ms': dict(
+            {f'p{pct}': percentile(latencies, pct) * 1000 for pct in PERCENTILES},
+            mean=total / len(latencies) * 1000, max=latencies[-1] * 1000,
+        ) if latencies else {},
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'status': dict(statuses),
+    }
+
+
+def git_commit():
+    """Return the current commit id, or None outside a git checkout."""
+
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold=REGRESSION):
+    """Print the change against a baseline results file; return the regressions."""
+
+    regressions = []
+    print(f"\nAgainst {baseline.get('commit') or 'baseline'}:")
+    for name, result in results['benchmarks'].items():
+        old = baseline.get('benchmarks', {}).get(name)
+        if not old or not old.get('files_per_second') or not result['files_per_second']:
+            continue
+        if old.get('fixture_hashes') != result['fixture_hashes']:
+            print(f"  {name:<40} fixtures changed, not compared")
+            continue
+        speed = old['files_per_second'] / result['files_per_second']
+        p90 = result['latency_ms']['p90'] / old['latency_ms']['p90']
+        flag = ''
+        if max(speed, p90) > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"  {name:<40} files/sec {1 / speed:>6.2f}x  p90 {p90:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    """Run the selected benchmarks and save the results as JSON."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('benchmarks', nargs='*', help='benchmark names or glob patterns (default: all)')
+    parser.add_argument('--rounds', type=int, default=ROUNDS, help=f'timed passes over the fixtures (default {ROUNDS})')
+    parser.add_argument('--warmup', type=int, default=WARMUP, help=f'untimed passes first (default {WARMUP})')
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT, help=f'results file (default {DEFAULT_OUTPUT})')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare with an earlier results file')
+    parser.add_argument('--list', action='store_true', help='list the benchmarks and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for benchmark in BENCHMARKS.values():
+            print(f"{benchmark.name:<40} {benchmark.module}.{benchmark.function} ({benchmark.fixtures})")
+        return
+
+    patterns = args.benchmarks or ['*']
+    selected = [name for name in BENCHMARKS if any(fnmatch(name, pattern) for pattern in patterns)]
+    if not selected:
+        raise SystemExit(f"ERROR: No benchmark matches {' '.join(patterns)}")
+
+    fixtures = {name: fixture_files(name) for name in {BENCHMARKS[name].fixtures for name in selected}}
+
+    results = {
+        'commit': git_commit(),
+        'started': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'rounds': args.rounds,
+        'warmup': args.warmup,
+        'benchmarks': {},
+    }
+
+    print(f"{'benchmark':<40} {'files':>6} {'files/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'RSS MB':>7}")
+    context = multiprocessing.get_context('spawn')
+    for name in selected:
+        files = fixtures[BENCHMARKS[name].fixtures]
+        if not files:
+            print(f"{name:<40} no fixtures")
+            continue
+        # A fresh interpreter per benchmark keeps peak RSS and caches separate
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_benchmark, name, list(files), args.rounds, args.warmup).result()
+        result['fixture_hashes'] = files
+        results['benchmarks'][name] = result
+        latency = result['latency_ms']
+        print(f"{name:<40} {len(files):>6} {result['files_per_second']:>9.1f} {latency['p50']:>8.2f} "
+              f"{latency['p90']:>8.2f} {latency['p99']:>8.2f} {result['peak_rss_mb']:>7.1f}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline)
+        if regressions:
+            print(f"\n{len(regressions)} regressions (over {REGRESSION}x slower)")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
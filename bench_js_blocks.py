@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Adversarial-input benchmark for the linear-time JS block locator.
+
+Each case builds a chart-like script around a medianValuesPlugin declaration
+stuffed with hostile content (deep nesting, unterminated strings and comments,
+slash runs that look like regex literals, nested template literals, JSON
+runs that are not balanced data literals) and
+times JsIndex plus declaration_span() as the input doubles. Time per byte
+must stay flat: the script exits non-zero if the largest input of any case
+costs more than MAX_SLOWDOWN times the best time per byte seen for that case.
+With --compare the old backtracking regexes from fix_blank_charts_final.py
+and add_dpi_fix_only.py are timed on small inputs for reference.
+"""
+
+import argparse
+import re
+import sys
+import time
+
+from js_blocks import JsIndex
+
+# Allowed rise in time per byte from the best size to the largest. Quadratic
+# behaviour over the default six doublings would show up as ~64x.
+MAX_SLOWDOWN = 4.0
+
+OLD_PATTERNS = {
+    'fix_blank_charts_final': re.compile(
+        r'(const medianValuesPlugin = \{[^}]*afterDatasetsDraw: \(chart\) => \{(?:[^{}]|\{[^{}]*\})*\}\s*\};)',
+        re.DOTALL
+    ),
+    'add_dpi_fix_only': re.compile(
+        r'(const medianValuesPlugin = \{[^}]*id: ["\']medianValues["\'][^}]*afterDatasetsDraw:[^}]*\}(?:[^}]*\{[^}]*\}[^}]*)*\s*\};)',
+        re.DOTALL
+    ),
+}
+
+
+def wrap(body):
+    """Embed hostile text inside a plugin declaration."""
+
+    return ('const medianValuesPlugin = {\n    id: "medianValues",\n'
+            '    afterDatasetsDraw: (chart) => {\n' + body + '\n    }\n};\n'
+            'const chart = new Chart(ctx, {});\n')
+
+
+CASES = {
+    'deep_nesting': lambda n: wrap('{' * n + '}' * n),
+    'flat_blocks': lambda n: wrap('if (a) { b(); } ' * (n // 16)),
+    'unterminated_strings': lambda n: wrap(('"' + 'x' * 15 + '\n') * (n // 17)),
+    'unclosed_comments': lambda n: wrap('/*' * (n // 2) + '*/'),
+    'regex_lookalikes': lambda n: wrap('(/' * (n // 2)),
+    'template_nesting': lambda n: wrap('`${' * (n // 3) + '}`' * (n // 3)),
+    'escaped_quotes': lambda n: wrap("'" + '\\\'' * (n // 2) + "'"),
+    'near_miss_braces': lambda n: wrap('{x}' * (n // 3) + '{'),
+    'repeated_declarations': lambda n: wrap('const medianValuesPlugin = { a ' * (n // 30)),
+    'unclosed_data': lambda n: wrap('x = ' + '[1, ' * (n // 4)),
+    'unbalanced_data': lambda n: wrap('x = ' + '[0]]' * (n // 4)),
+}
+
+# Inputs that make the old regexes backtrack, with the sizes to try. The
+# nested-block case is exponential for add_dpi_fix_only.py, so it grows in
+# small steps and stops once a search takes longer than OLD_REGEX_LIMIT.
+OLD_REGEX_CASES = {
+    'repeated_declarations': (
+        lambda n: 'const medianValuesPlugin = { a ' * (n // 30),
+        [1 << k for k in range(10, 17)],
+    ),
+    'unclosed_nested_blocks': (
+        lambda n: ('const medianValuesPlugin = { id: "medianValues", afterDatasetsDraw: (chart) => {'
+                   + ' {x}' * (n // 4) + ' x'),
+        list(range(16, 257, 8)),
+    ),
+}
+
+OLD_REGEX_LIMIT = 0.5
+
+
+def time_call(func, repeat=3):
+    """Return the best wall time of func() over a few runs."""
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def locate(source):
+    """Index the source and locate the plugin declaration."""
+
+    return JsIndex(source).declaration_span('medianValuesPlugin')
+
+
+def main():
+    """Run every adversarial case at doubling sizes and check for linear growth."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-size', type=int, default=1 << 19, help='largest input size in bytes')
+    parser.add_argument('--compare', action='store_true', help='also time the old regex on small inputs')
+    args = parser.parse_args()
+
+    sizes = []
+    size = 1 << 13
+    while size <= args.max_size:
+        sizes.append(size)
+        size *= 2
+
+    failures = []
+    print(f"{'case':<22} {'bytes':>9} {'ms':>9} {'ns/byte':>8}")
+    for name, build in CASES.items():
+        per_byte = []
+        for size in sizes:
+            source = build(size)
+            elapsed = time_call(lambda: locate(source))
+            per_byte.append(elapsed * 1e9 / len(source))
+            print(f"{name:<22} {len(source):>9} {elapsed * 1000:>9.2f} {per_byte[-1]:>8.1f}")
+
+        slowdown = per_byte[-1] / min(per_byte)
+        if slowdown > MAX_SLOWDOWN:
+            failures.append(f"{name}: largest input costs {slowdown:.1f}x the best time per byte")
+
+    if args.compare:
+        print(f"\n{'old regex':<24} {'case':<24} {'bytes':>7} {'ms':>10}")
+        for regex_name, regex in OLD_PATTERNS.items():
+            for name, (build, old_sizes) in OLD_REGEX_CASES.items():
+                for size in old_sizes:
+                    source = build(size)
+                    elapsed = time_call(lambda: regex.search(source), repeat=1)
+                    if elapsed > OLD_REGEX_LIMIT or size == old_sizes[-1]:
+                        print(f"{regex_name:<24} {name:<24} {len(source):>7} {elapsed * 1000:>10.2f}")
+                        break
+
+    if failures:
+        print("\nSuperlinear growth detected:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+    print(f"\nAll cases linear (time per byte within {MAX_SLOWDOWN}x of the best size).")
+
+
+if __name__ == '__main__':
+    main()
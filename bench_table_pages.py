@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the table pages on a large synthetic table.
+
+Generates a synthetic dataset with --sectors rows per sector table
+(generate_dataset.py), splits the sector charts into their chart_split.py
+groups, extracts the table model and builds the sector pages with each
+renderer, each step run as its own script in a scratch directory the way
+the build runs them. Every step is timed, and the run fails (exits
+non-zero) unless:
+
+- every sector table in the model has all --sectors rows, including those
+  outside every split group
+- each page is exactly what render_page() draws from the model table, and
+  holds every row key
+- the tables are longer than VIRTUAL_ROWS, so the pages take the
+  virtualized path
+
+    python bench_table_pages.py
+    python bench_table_pages.py --sectors 400 --risks 4 --keep bench_data
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from chart_io import read_chart
+from table_model import MODEL_FILE, TableTemplates, load_model
+from table_pages import RENDERERS, VIRTUAL_ROWS, page_name, render_page
+
+REPO_DIR = Path(__file__).resolve().parent
+
+SECTORS = 120
+RISKS = 2
+EXPERTS = 200
+
+
+def run_step(label, script, args, cwd):
+    """Run a repo script in cwd; returns its wall time in seconds."""
+
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, str(REPO_DIR / script)] + args, cwd=cwd,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode:
+        print(result.stdout + result.stderr)
+        raise SystemExit(f"ERROR: {script} failed with exit code {result.returncode}")
+    print(f"{label:<24} {elapsed * 1000:>9.0f} ms")
+    return elapsed
+
+
+def sector_tables(data_dir):
+    """Return the sector tables of the model in data_dir."""
+
+    return [table for table in load_model(data_dir / MODEL_FILE) if table['kind'] == 'sector']
+
+
+def check_model(data_dir, sectors):
+    """Check every sector table of the model has all its rows; returns the failures."""
+
+    tables = sector_tables(data_dir)
+    failures = [f"sector risk {table['risk']}: {len(table['keys'])} of {sectors} rows in the model"
+                for table in tables if len(table['keys']) != sectors]
+    if not tables:
+        failures.append("no sector tables in the model")
+    return failures
+
+
+def check_pages(data_dir, renderer, templates):
+    """Check the sector pages of one renderer against the model; returns the failures."""
+
+    failures = []
+    for table in sector_tables(data_dir):
+        name = f"sector risk {table['risk']}"
+        page_file = data_dir / table['directory'] / page_name('sector', table['risk'])
+        page = read_chart(page_file)
+        if page != render_page(table, templates, renderer):
+            failures.append(f"{name}: {page_file.name} differs from the {renderer} page of the model")
+        missing = [key for key in table['keys'] if f'"{key}"' not in page]
+        if missing:
+            failures.append(f"{name}: {len(missing)} row keys missing from {page_file.name}")
+    return failures
+
+
+def main():
+    """Build the pages of a large synthetic table and check they hold every row."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sectors', type=int, default=SECTORS, help=f'rows per sector table (default {SECTORS})')
+    parser.add_argument('--risks', type=int, default=RISKS, help=f'number of risks (default {RISKS})')
+    parser.add_argument('--experts', type=int, default=EXPERTS, help=f'number of experts (default {EXPERTS})')
+    parser.add_argument('--keep', metavar='DIR', help='build in DIR and keep it (default: a scratch directory)')
+    args = parser.parse_args()
+
+    if args.sectors <= VIRTUAL_ROWS:
+        raise SystemExit(f"ERROR: --sectors must be more than {VIRTUAL_ROWS} to reach the virtualized pages")
+
+    data_dir = Path(args.keep or tempfile.mkdtemp(prefix='bench_table_pages_')).resolve()
+    templates = TableTemplates()
+    failures = []
+    try:
+        print(f"{args.risks} risks x {args.sectors} sectors in {data_dir}/\n")
+        run_step('generate_dataset', 'generate_dataset.py',
+                 ['-o', str(data_dir), '--risks', str(args.risks), '--sectors', str(args.sectors),
+                  '--experts', str(args.experts), '-j', '0'], REPO_DIR)
+        run_step('split_sector_charts', 'split_sector_charts.py', ['-j', '0'], data_dir)
+        run_step('table_model extract', 'table_model.py', ['extract', '--kind', 'sector'], data_dir)
+        failures += check_model(data_dir, args.sectors)
+        for renderer in sorted(RENDERERS):
+            run_step(f'table_pages ({renderer})', 'table_pages.py',
+                     ['--kind', 'sector', '--renderer', renderer], data_dir)
+            failures += check_pages(data_dir, renderer, templates)
+    finally:
+        if not args.keep:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if failures:
+        print("\nFailed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+    print(f"\nAll pages hold their {args.sectors} rows (virtualized above {VIRTUAL_ROWS}).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Content-hash build cache for the chart transform pipeline.
+
+The manifest records, per chart, the hash of the input it was built from, the
+hash of the transform list that built it and the hash of the output written.
+A chart whose current content is the recorded output for the same transform
+key is already up to date and is skipped; a chart whose content is the
+recorded input gets the stored output copied back without re-running the
+transforms. Outputs are kept as content-addressed objects under the cache
+directory.
+"""
+
+import ast
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from chart_io import read_chart
+
+CACHE_DIR = Path('.chart_build_cache')
+
+# The transforms and the helper modules they import live next to this file
+SOURCE_DIR = Path(__file__).resolve().parent
+
+# Returned by BuildCache.lookup() for charts that need no work
+FRESH = 'fresh'
+
+
+def content_hash(data):
+    """Return the SHA-256 hex digest of a bytes object."""
+
+    return hashlib.sha256(data).hexdigest()
+
+
+def local_imports(source):
+    """Return the names of the repo modules a module source imports.
+
+    Imports inside functions count too, since probes import fix modules
+    locally.
+    """
+
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    return {name for name in names if (SOURCE_DIR / f'{name}.py').exists()}
+
+
+def transform_key(names):
+    """Hash the ordered transform names together with their module sources.
+
+    The sources of every repo module the selected modules import, directly or
+    through other repo modules, are hashed too, so editing a fix script or a
+    helper it uses (chart_anchors, js_blocks, ...) rebuilds the charts built
+    by the old version.
+    """
+
+    digest = hashlib.sha256()
+    for name in names:
+        digest.update(name.encode('utf-8') + b'\0')
+
+    sources = {}
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name in sources:
+            continue
+        sources[name] = (SOURCE_DIR / f'{name}.py').read_bytes()
+        pending.extend(local_imports(sources[name]))
+    for name in sorted(sources):
+        digest.update(name.encode('utf-8') + b'\0' + sources[name] + b'\0')
+    return digest.hexdigest()
+
+
+def store_object(cache_dir, data):
+    """Store bytes under their content hash and return the hash."""
+
+    digest = content_hash(data)
+    path = Path(cache_dir) / 'objects' / digest[:2] / digest
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    return digest
+
+
+class BuildCache:
+    """Manifest of built charts keyed on input hash plus transform key."""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.manifest_path = self.cache_dir / 'manifest.json'
+        self.entries = {}
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def lookup(self, file_path, key):
+        """Return FRESH, the cached output bytes, or None if a rebuild is needed."""
+
+        entry = self.entries.get(str(file_path))
+        if entry is None or entry['transform_key'] != key:
+            return None
+
+        current = content_hash(read_chart(file_path).encode('utf-8'))
+        if current == entry['output_hash']:
+            return FRESH
+        if current == entry['input_hash']:
+            object_path = self.cache_dir / 'objects' / entry['output_hash'][:2] / entry['output_hash']
+            if object_path.exists():
+                return object_path.read_bytes()
+        return None
+
+    def record(self, file_path, key, input_hash, output_hash):
+        """Remember that file_path was built from input_hash under key."""
+
+        self.entries[str(file_path)] = {
+            'transform_key': key,
+            'input_hash': input_hash,
+            'output_hash': output_hash,
+        }
+
+    def save(self):
+        """Write the manifest atomically."""
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Single-scan anchor index for severity chart files.
+
+All anchors the transforms care about (CSS rule openers, the media query, the
+chart script landmarks) are compiled into one alternation regex and located
+in a single pass over the file. Transforms then turn anchor offsets into a
+list of (start, end, replacement) edits, and apply_edits() builds the new
+content in one join, so patching cost follows the number of edits rather than
+the number of patterns times the file size.
+"""
+
+import re
+
+# Anchor name -> regex. Alternatives are tried in this order at each position.
+ANCHORS = {
+    'severity_label_nth': r'\.severity-label:nth-child\((?P<nth>\d+)\)',
+    'severity_labels': r'\.severity-labels\s*\{',
+    'severity_label': r'\.severity-label\s*\{',
+    'legend_item': r'\.legend-item\s*\{',
+    'legend': r'\.legend\s*\{',
+    'banner': r'\.banner\s*\{',
+    'chart_container': r'\.chart-container\s*\{',
+    'controls': r'\.controls\s*\{',
+    'media_600': r'@media \(max-width: 600px\)',
+    'const_ctx': r'const ctx =',
+    'median_plugin': r'const medianValuesPlugin',
+    'dpi_fix': r'// Fix blurry canvas on high-DPI displays',
+    'new_chart': r'new Chart\(ctx,',
+}
+
+ANCHOR_PATTERNS = {name: re.compile(pattern) for name, pattern in ANCHORS.items()}
+
+# Group-free alternation so the regex engine can skip ahead on the set of
+# possible first characters; each hit is then classified against the
+# individual patterns in ANCHORS order, which picks the same branch.
+ANCHOR_RE = re.compile('|'.join(
+    f'(?:{re.sub(r"[(][?]P<[^>]+>", "(?:", pattern)})' for pattern in ANCHORS.values()
+))
+
+
+class AnchorIndex:
+    """Offsets of every anchor in a document, built with one regex scan."""
+
+    def __init__(self, content):
+        self.content = content
+        self.matches = {name: [] for name in ANCHORS}
+        for hit in ANCHOR_RE.finditer(content):
+            for name, pattern in ANCHOR_PATTERNS.items():
+                match = pattern.match(content, hit.start())
+                if match is not None:
+                    self.matches[name].append(match)
+                    break
+
+    def all(self, name):
+        """Return all matches for an anchor, in document order."""
+
+        return self.matches[name]
+
+    def first(self, name):
+        """Return the first match for an anchor, or None."""
+
+        matches = self.matches[name]
+        return matches[0] if matches else None
+
+    def has(self, name):
+        """Return True if the anchor occurs in the document."""
+
+        return bool(self.matches[name])
+
+    def block_end(self, pos):
+        """Return the offset just past the first '}' at or after pos, or None."""
+
+        end = self.content.find('}', pos)
+        return None if end == -1 else end + 1
+
+    def blocks(self, name):
+        """Return (start, end) spans of CSS rules opened by an anchor.
+
+        A span runs from the anchor to its first closing brace, matching the
+        ``SELECTOR[^}]*\\}`` idiom used throughout the fix scripts.
+        """
+
+        spans = []
+        for match in self.matches[name]:
+            end = self.block_end(match.end())
+            if end is not None:
+                spans.append((match.start(), end))
+        return spans
+
+
+def css_property_edits(index, name, prop_re, replacement):
+    """Edits replacing a property value inside every rule opened by an anchor.
+
+    prop_re must capture the text to replace in group 1. Like the greedy
+    ``(SELECTOR\\s*\\{[^}]*PROP)VALUE`` substitution it replaces, only the last
+    match inside each rule is edited.
+    """
+
+    edits = []
+    for match in index.all(name):
+        end = index.block_end(match.end())
+        if end is None:
+            continue
+        last = None
+        for last in prop_re.finditer(index.content, match.end(), end - 1):
+            pass
+        if last is not None:
+            edits.append((last.start(1), last.end(1), replacement))
+    return edits
+
+
+def apply_edits(content, edits):
+    """Apply non-overlapping (start, end, replacement) edits in one pass."""
+
+    if not edits:
+        return content
+
+    pieces = []
+    pos = 0
+    for start, end, replacement in sorted(edits, key=lambda edit: (edit[0], edit[1])):
+        if start < pos:
+            raise ValueError(f"Overlapping edits at offset {start}")
+        pieces.append(content[pos:start])
+        pieces.append(replacement)
+        pos = end
+    pieces.append(content[pos:])
+    return ''.join(pieces)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Catalog of every chart in the project.
+
+The catalog records, per chart file, what it is (type, risk, scenario,
+sector group, actor set) and its size, content hash and title. It is kept
+in .chart_catalog.json and updated incrementally: a chart is only re-read
+when its size or modification time changed, so a query costs one directory
+scan instead of a glob and a filename regex per script.
+
+    from chart_catalog import select_charts, severity_charts
+
+    all_charts = severity_charts()                # BAU then PM, by name
+    groups = select_charts('sector_vulnerability', risk=11)
+
+Run it to update the catalog and list charts:
+
+    python chart_catalog.py
+    python chart_catalog.py --list severity --risk 3 --scenario pm
+"""
+
+import argparse
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+from build_cache import content_hash
+
+CATALOG_FILE = '.chart_catalog.json'
+
+# Directories scanned for charts, relative to the project root
+CHART_DIRS = ('.', 'Sec_Charts', 'Vuln_Charts', 'Resp_Charts')
+
+CATALOG_VERSION = 1
+
+# Mapping of risk numbers to names from index.html
+RISK_NAMES = {
+    1: "1.1 Unfair discrimination and misrepresentation",
+    2: "1.2 Exposure to toxic content",
+    3: "1.3 Unequal performance across groups",
+    4: "2.1 Compromise of privacy by obtaining, leaking or correctly inferring sensitive information",
+    5: "2.2 AI system security vulnerabilities and attacks",
+    6: "3.2 False or misleading information",
+    7: "3.1 Pollution of information ecosystem and loss of consensus reality",
+    8: "4.1 Disinformation, surveillance, and influence at scale",
+    9: "4.3 Cyberattacks, weapon development or use, and mass harm",
+    10: "4.2 Fraud, scams, and targeted manipulation",
+    11: "5.1 Overreliance and unsafe use",
+    12: "5.2 Loss of human agency and autonomy",
+    13: "6.1 Power centralization and unfair distribution of benefits",
+    14: "6.2 Increased inequality and decline in employment quality",
+    15: "6.3 Economic and cultural devaluation of human effort",
+    16: "6.4 Competitive dynamics",
+    17: "6.5 Governance failure",
+    18: "6.6 Environmental harm",
+    19: "7.1 AI pursuing its own goals in conflict with human goals or values",
+    20: "7.2 AI possessing dangerous capabilities",
+    21: "7.3 Lack of capability or robustness",
+    22: "7.4 Lack of transparency or interpretability",
+    23: "7.5 AI welfare and rights",
+    24: "7.6 Multi-agent risks"
+}
+
+SCENARIOS = {
+    'bau': "Business as usual",
+    'pm': "Pragmatic mitigations",
+}
+
+# Chart types and the file names they match, tried in order. Actor charts
+# without an actor set and sector charts without a group are the unsplit
+# sources of the split_*_charts.py scripts (actors 'all', group None).
+CHART_TYPES = (
+    ('severity', re.compile(r'risk(?P<risk>\d+)_(?P<scenario>bau|pm)_chart\.html')),
+    ('exemplar', re.compile(r'risk(?P<risk>\d+)_(?P<scenario>bau|pm)_chart_updated\.html'
+                            r'|exemplar_sev_chart\.html')),
+    ('vuln_actors', re.compile(r'risk(?P<risk>\d+)_vuln_actors(?:_(?P<actors>required|optional))?_chart\.html')),
+    ('resp_actors', re.compile(r'risk(?P<risk>\d+)_resp_actors(?:_(?P<actors>required|optional))?_chart\.html')),
+    ('sector_vulnerability', re.compile(r'risk_(?P<risk>\d+)_sector_vulnerability(?:_group(?P<group>\d+))?\.html')),
+    ('index', re.compile(r'index\.html')),
+)
+
+TITLE_PATTERN = re.compile(rb'<title>\s*(.*?)\s*</title>', re.DOTALL)
+
+
+def parse_chart_name(name):
+    """Return the name fields of a chart file name, or None if it is not a chart."""
+
+    for chart_type, pattern in CHART_TYPES:
+        match = pattern.fullmatch(name)
+        if match is None:
+            continue
+        fields = match.groupdict()
+        actors = fields.get('actors')
+        if chart_type.endswith('_actors') and actors is None:
+            actors = 'all'
+        return {
+            'type': chart_type,
+            'risk': int(fields['risk']) if fields.get('risk') else None,
+            'scenario': fields.get('scenario'),
+            'group': int(fields['group']) if fields.get('group') else None,
+            'actors': actors,
+        }
+    return None
+
+
+def read_title(data):
+    """Return the <title> of a chart's bytes, or None."""
+
+    match = TITLE_PATTERN.search(data)
+    return match.group(1).decode('utf-8', errors='replace') if match else None
+
+
+class ChartCatalog:
+    """The charts under a project root, persisted in root/.chart_catalog.json."""
+
+    def __init__(self, root='.'):
+        self.root = Path(root)
+        self.path = self.root / CATALOG_FILE
+        self.entries = {}
+        self.dirty = False
+
+    def load(self):
+        """Load the saved catalog; a missing or outdated file leaves it empty."""
+
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return self
+        if data.get('version') == CATALOG_VERSION:
+            self.entries = {entry['path']: entry for entry in data['charts']}
+        return self
+
+    def save(self):
+        """Write the catalog atomically."""
+
+        data = {
+            'version': CATALOG_VERSION,
+            'charts': [self.entries[key] for key in sorted(self.entries)],
+        }
+        tmp_path = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+        tmp_path.write_text(json.dumps(data, indent=1), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def scan(self):
+        """Yield (key, stat, name fields) for every chart file on disk."""
+
+        for directory in CHART_DIRS:
+            try:
+                listing = os.scandir(self.root / directory)
+            except OSError:
+                continue
+            with listing:
+                for dir_entry in listing:
+                    fields = parse_chart_name(dir_entry.name)
+                    if fields is None or not dir_entry.is_file():
+                        continue
+                    key = dir_entry.name if directory == '.' else f'{directory}/{dir_entry.name}'
+                    yield key, dir_entry.stat(), fields
+
+    def refresh(self, content=False):
+        """Bring the catalog up to date with the files on disk.
+
+        New and modified charts get their name fields, size and modification
+        time; their hash and title are filled in now if content is true, or
+        when describe() first needs them. Returns (added, changed, removed)
+        lists of catalog keys.
+        """
+
+        added, changed = [], []
+        seen = set()
+        for key, stat, fields in self.scan():
+            seen.add(key)
+            entry = self.entries.get(key)
+            if entry is not None and (entry['size'], entry['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+                continue
+            (changed if entry is not None else added).append(key)
+            self.entries[key] = dict(path=key, **fields, size=stat.st_size,
+                                     mtime_ns=stat.st_mtime_ns, hash=None, title=None)
+            self.dirty = True
+
+        removed = sorted(self.entries.keys() - seen)
+        for key in removed:
+            del self.entries[key]
+        self.dirty = self.dirty or bool(removed)
+
+        if content:
+            for entry in self.entries.values():
+                self.describe(entry)
+        return added, changed, removed
+
+    def describe(self, entry):
+        """Fill in an entry's hash and title if they are not known yet; returns it."""
+
+        if entry['hash'] is None:
+            try:
+                data = (self.root / entry['path']).read_bytes()
+            except OSError:
+                return entry
+            entry['hash'] = content_hash(data)
+            entry['title'] = read_title(data)
+            self.dirty = True
+        return entry
+
+    def lookup(self, file_path):
+        """Return the (described) entry for a chart path, or None."""
+
+        path = Path(file_path)
+        try:
+            path = path.relative_to(self.root)
+        except ValueError:
+            pass
+        entry = self.entries.get(path.as_posix())
+        return self.describe(entry) if entry is not None else None
+
+    def file_path(self, entry):
+        return self.root / entry['path']
+
+    def select(self, chart_type=None, directory=None, **fields):
+        """Return the paths of the charts matching every given field, sorted.
+
+        Fields are compared exactly, so select('sector_vulnerability', group=None)
+        selects the unsplit sector charts. directory limits the result to one
+        of CHART_DIRS.
+        """
+
+        if directory is not None:
+            directory = Path(directory).as_posix()
+        return sorted(
+            self.file_path(entry) for entry in self.entries.values()
+            if (chart_type is None or entry['type'] == chart_type)
+            and (directory is None or Path(entry['path']).parent.as_posix() == directory)
+            and all(entry[name] == value for name, value in fields.items())
+        )
+
+    def glob(self, pattern):
+        """Return the catalogued charts matching a glob pattern, sorted."""
+
+        return sorted(path for path in map(self.file_path, self.entries.values())
+                      if path.relative_to(self.root).match(pattern)
+                      and len(path.relative_to(self.root).parts) == len(Path(pattern).parts))
+
+
+_catalogs = {}
+
+
+def catalog(root='.'):
+    """Return the catalog of a project root, brought up to date and saved if it changed."""
+
+    key = os.path.abspath(root)
+    chart_catalog = _catalogs.get(key)
+    if chart_catalog is None:
+        chart_catalog = _catalogs[key] = ChartCatalog(root).load()
+    chart_catalog.refresh()
+    if chart_catalog.dirty:
+        try:
+            chart_catalog.save()
+        except OSError:
+            pass
+    return chart_catalog
+
+
+def select_charts(chart_type=None, directory=None, **fields):
+    """Return the charts in the working directory matching the fields (see ChartCatalog.select)."""
+
+    return catalog().select(chart_type, directory, **fields)
+
+
+def severity_charts(scenarios=('bau', 'pm')):
+    """Return the severity charts, all BAU charts then all PM charts, each sorted by name."""
+
+    chart_catalog = catalog()
+    return [path for scenario in scenarios for path in chart_catalog.select('severity', scenario=scenario)]
+
+
+def main():
+    """Update the catalog and print a summary or a listing."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rebuild', action='store_true', help='discard the saved catalog and re-read every chart')
+    parser.add_argument('--list', nargs='?', const='', metavar='TYPE',
+                        help='list the charts (of one type: %s)' % ', '.join(name for name, _ in CHART_TYPES))
+    parser.add_argument('--risk', type=int, help='only list charts of this risk')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), help='only list charts of this scenario')
+    parser.add_argument('--json', action='store_true', help='print the listed entries as JSON')
+    args = parser.parse_args()
+
+    chart_catalog = ChartCatalog()
+    if not args.rebuild:
+        chart_catalog.load()
+    added, changed, removed = chart_catalog.refresh(content=True)
+    if chart_catalog.dirty:
+        chart_catalog.save()
+
+    if args.list is None:
+        print(f"Catalog: {len(chart_catalog.entries)} charts "
+              f"({len(added)} added, {len(changed)} changed, {len(removed)} removed)")
+        for chart_type, count in sorted(Counter(entry['type'] for entry in chart_catalog.entries.values()).items()):
+            print(f"  {chart_type}: {count}")
+        return
+
+    fields = {name: value for name, value in (('risk', args.risk), ('scenario', args.scenario))
+              if value is not None}
+    paths = chart_catalog.select(args.list or None, **fields)
+    if args.json:
+        print(json.dumps([chart_catalog.lookup(path) for path in paths], indent=1))
+        return
+    for path in paths:
+        entry = chart_catalog.lookup(path)
+        print(f"{entry['path']:<48} {entry['size']:>9}  {entry['hash'][:12]}  {entry['title'] or ''}")
+
+
+if __name__ == '__main__':
+    main()
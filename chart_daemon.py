@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Resident chart build daemon with the charts parsed in memory.
+
+Running a fix script starts an interpreter, imports everything and re-reads
+and re-parses every chart. The daemon does that once: it keeps every chart
+that a registered transform targets in memory together with its anchor index
+and script index (script and embedded data spans), and takes transform
+requests over a local socket. Transforms are applied to the in-memory
+content exactly as run_pipeline.py applies them, and only charts that
+changed are written back.
+
+    python chart_daemon.py serve &                   # load the charts and listen
+    python chart_daemon.py apply move_labels_up reduce_title_and_height
+    python chart_daemon.py apply fix_layout_optimization --no-flush
+    python chart_daemon.py flush
+    python chart_daemon.py status
+    python chart_daemon.py stop
+
+A fix script edited while the daemon runs is reloaded on the next request,
+so layout tweaks can be iterated on without restarting it; edits to the
+shared helper modules need a restart. A chart changed on disk is re-read
+before it is used, unless it also has unflushed changes, in which case it
+is reported and left alone. apply --journal records each chart's edits
+until it is flushed, when they are journaled as run_pipeline.py does.
+"""
+
+import argparse
+import importlib
+import json
+import signal
+import socket
+import socketserver
+import sys
+import time
+from pathlib import Path
+
+import run_pipeline
+import transform_registry
+from chart_anchors import AnchorIndex
+from chart_io import read_chart, sync_files, take_written, write_chart
+from chart_journal import finish_run, start_run, write_entry
+from chart_metrics import file_state
+from js_blocks import chart_script_index
+
+SOCKET_PATH = Path('.chart_daemon.sock')
+
+# Largest request or response line accepted
+MAX_MESSAGE = 16 * 1024 * 1024
+
+
+class DaemonError(Exception):
+    """Raised for requests the daemon cannot carry out."""
+
+
+class ChartModel:
+    """A chart held in memory with its parsed indexes."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.load()
+
+    def load(self):
+        """(Re)read the chart from disk, dropping unflushed changes."""
+
+        self.content = read_chart(self.path)
+        self.saved = self.content
+        self.stamp = file_state(self.path)
+        self.steps = []
+        self._index = AnchorIndex(self.content)
+
+    @property
+    def dirty(self):
+        return self.content != self.saved
+
+    @property
+    def index(self):
+        """The AnchorIndex of the current content."""
+
+        if self._index is None:
+            self._index = AnchorIndex(self.content)
+        return self._index
+
+    @property
+    def script_index(self):
+        """The JsIndex of the chart script (shared through chart_script_index's cache)."""
+
+        return chart_script_index(self.content)
+
+    def changed_on_disk(self):
+        return file_state(self.path) != self.stamp
+
+    def update(self, content, index, steps=()):
+        """Replace the in-memory content after a transform."""
+
+        self.content = content
+        self._index = index
+        self.steps.extend(steps)
+
+    def flush(self, journal_dir=None):
+        """Write the chart back if it changed. Returns True if written."""
+
+        if not self.dirty:
+            return False
+        if journal_dir is not None:
+            write_entry(journal_dir, self.path, self.saved, self.steps, self.content)
+        write_chart(self.path, self.content)
+        self.saved = self.content
+        self.stamp = file_state(self.path)
+        self.steps = []
+        return True
+
+
+class ChartDaemon:
+    """The charts in memory and the transform modules loaded to patch them."""
+
+    def __init__(self):
+        self.models = {}
+        self.module_stamps = {}
+
+    def watched_modules(self):
+        return ['transform_registry'] + sorted(transform_registry.REGISTRY)
+
+    def reload_modules(self):
+        """Reload fix scripts (and the registry) edited since they were loaded."""
+
+        reloaded = []
+        for name in self.watched_modules():
+            module = importlib.import_module(name)
+            stamp = file_state(module.__file__)
+            if name in self.module_stamps and self.module_stamps[name] != stamp:
+                importlib.reload(module)
+                reloaded.append(name)
+            self.module_stamps[name] = stamp
+        if 'transform_registry' in reloaded:
+            # run_pipeline holds names imported from the registry
+            importlib.reload(run_pipeline)
+        return reloaded
+
+    def model(self, path, output):
+        """Return the model of a chart, re-reading it if it changed on disk."""
+
+        model = self.models.get(path)
+        if model is None:
+            model = self.models[path] = ChartModel(path)
+        elif model.changed_on_disk():
+            if model.dirty:
+                output.append(f"ERROR: {path.name} changed on disk and has unflushed changes")
+                return None
+            model.load()
+        return model
+
+    def load_all(self):
+        """Load every chart a registered transform targets."""
+
+        transforms = list(transform_registry.REGISTRY.values())
+        for _, files in transform_registry.batch_files(transforms):
+            for path in files:
+                self.model(path, [])
+        self.reload_modules()
+
+    def apply(self, names, charts=None, flush=True, journal=False):
+        """Apply transforms to the in-memory charts; returns (output, summary)."""
+
+        output = []
+        reloaded = self.reload_modules()
+        if reloaded:
+            output.append(f"Reloaded: {', '.join(reloaded)}")
+
+        try:
+            ordered = transform_registry.schedule(names)
+        except transform_registry.ScheduleError as e:
+            raise DaemonError(str(e))
+
+        changed = 0
+        total = 0
+        for batch_names, files in transform_registry.batch_files(ordered):
+            transforms = run_pipeline.load_transforms(batch_names)
+            for path in files:
+                if charts and path.name not in charts:
+                    continue
+                model = self.model(path, output)
+                if model is None:
+                    continue
+                total += 1
+
+                # Once a chart's edits are journaled, all of them must be
+                content, index, failed, _, steps, _ = run_pipeline.apply_transforms(
+                    transforms, model.content, path, model.index, record_edits=journal or bool(model.steps))
+                for name in failed:
+                    output.append(f"ERROR: {name} could not patch {path.name}")
+                if content != model.content:
+                    model.update(content, index, steps)
+                    changed += 1
+                    output.append(f"Updated: {path.name}")
+
+        summary = {'transforms': [transform.name for transform in ordered],
+                   'charts': total, 'changed': changed}
+        if flush:
+            flush_output, summary['written'] = self.flush()
+            output.extend(flush_output)
+        return output, summary
+
+    def flush(self):
+        """Write every chart with unflushed changes; returns (output, written_count).
+
+        Charts changed by journaled requests get a journal entry in a new run.
+        """
+
+        output = []
+        journal_dir = None
+        journaled = [model for model in self.models.values() if model.dirty and model.steps]
+        if journaled:
+            journal_dir = start_run(sorted({name for model in journaled for name, _ in model.steps}))
+
+        written = 0
+        for path, model in sorted(self.models.items()):
+            if not model.dirty:
+                continue
+            if model.changed_on_disk():
+                output.append(f"ERROR: {path.name} changed on disk; not overwriting (reload to discard)")
+                continue
+            written += model.flush(journal_dir if model.steps else None)
+        sync_files(take_written())
+        if journal_dir is not None:
+            finish_run(journal_dir)
+        return output, written
+
+    def status(self):
+        """Describe the charts held in memory."""
+
+        charts = []
+        for path, model in sorted(self.models.items()):
+            script = model.script_index
+            charts.append({
+                'chart': path.name,
+                'bytes': len(model.content),
+                'dirty': model.dirty,
+                'anchors': sum(len(matches) for matches in model.index.matches.values()),
+                'script': [script.start, script.end] if script else None,
+                'data_spans': len(script.data_spans) if script else 0,
+            })
+        return {'charts': charts, 'dirty': sum(chart['dirty'] for chart in charts)}
+
+    def handle(self, request):
+        """Carry out one request and return the response."""
+
+        op = request.get('op')
+        if op == 'apply':
+            output, summary = self.apply(request['transforms'], request.get('charts'),
+                                         request.get('flush', True), request.get('journal', False))
+            return {'output': output, 'summary': summary}
+        if op == 'flush':
+            output, written = self.flush()
+            return {'output': output, 'summary': {'written': written}}
+        if op == 'status':
+            return {'output': [], 'summary': self.status()}
+        if op == 'reload':
+            dirty = [path.name for path, model in self.models.items() if model.dirty]
+            self.models.clear()
+            self.load_all()
+            return {'output': [f"Discarded: {name}" for name in dirty],
+                    'summary': {'charts': len(self.models)}}
+        if op == 'stop':
+            output, written = self.flush()
+            return {'output': output, 'summary': {'written': written}, 'stop': True}
+        raise DaemonError(f"Unknown request {op!r}")
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Reads one JSON request line and answers with one JSON line."""
+
+    def handle(self):
+        start = time.perf_counter()
+        line = self.rfile.readline(MAX_MESSAGE)
+        try:
+            response = self.server.daemon.handle(json.loads(line))
+            response['ok'] = True
+        except Exception as e:
+            response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        response['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+        if response.get('stop'):
+            # shutdown() waits for serve_forever(), so it can't run on this thread's stack
+            self.server.stopping = True
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """Serves requests one at a time, so the models need no locking."""
+
+    def __init__(self, path, daemon):
+        self.daemon = daemon
+        self.stopping = False
+        super().__init__(str(path), RequestHandler)
+
+    def service_actions(self):
+        if self.stopping:
+            raise KeyboardInterrupt
+
+
+def serve(socket_path=SOCKET_PATH):
+    """Load the charts and serve requests until stopped."""
+
+    if socket_path.exists():
+        try:
+            with socket.socket(socket.AF_UNIX) as probe:
+                probe.connect(str(socket_path))
+            raise SystemExit(f"ERROR: A daemon is already listening on {socket_path}")
+        except ConnectionRefusedError:
+            socket_path.unlink()
+
+    start = time.perf_counter()
+    daemon = ChartDaemon()
+    daemon.load_all()
+    print(f"Loaded {len(daemon.models)} charts in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    server = DaemonServer(socket_path, daemon)
+    print(f"Listening on {socket_path} (stop with: python chart_daemon.py stop)")
+    try:
+        server.serve_forever(poll_interval=0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
+        output, written = daemon.flush()
+        for line in output:
+            print(line)
+        print(f"Stopped (flushed {written} charts).")
+
+
+def send(request, socket_path=SOCKET_PATH):
+    """Send a request to the daemon and return its response."""
+
+    with socket.socket(socket.AF_UNIX) as client:
+        try:
+            client.connect(str(socket_path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            raise SystemExit(f"ERROR: No daemon listening on {socket_path} "
+                             "(start one with: python chart_daemon.py serve)")
+        client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with client.makefile('rb') as f:
+            return json.loads(f.readline(MAX_MESSAGE))
+
+
+def main():
+    """Run the daemon or send it a request."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('command', choices=['serve', 'apply', 'flush', 'status', 'reload', 'stop'])
+    parser.add_argument('transforms', nargs='*', help='transforms to apply')
+    parser.add_argument('--chart', action='append', dest='charts', metavar='NAME',
+                        help='only apply to this chart (repeatable)')
+    parser.add_argument('--no-flush', action='store_true', help='keep the changes in memory only')
+    parser.add_argument('--journal', action='store_true', help='journal the edits (see chart_journal.py)')
+    parser.add_argument('--socket', type=Path, default=SOCKET_PATH, help=f'socket path (default {SOCKET_PATH})')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.socket)
+        return
+
+    request = {'op': args.command}
+    if args.command == 'apply':
+        if not args.transforms:
+            parser.error("apply needs at least one transform")
+        request.update(transforms=[name.removesuffix('.py') for name in args.transforms],
+                       charts=args.charts, flush=not args.no_flush, journal=args.journal)
+
+    response = send(request, args.socket)
+    if not response['ok']:
+        print(f"ERROR: {response['error']}")
+        sys.exit(1)
+
+    for line in response['output']:
+        print(line)
+    summary = response['summary']
+    elapsed = response['elapsed_ms']
+
+    if args.command == 'apply':
+        written = f", wrote {summary['written']}" if 'written' in summary else ' (not flushed)'
+        print(f"\nCompleted! Updated {summary['changed']}/{summary['charts']} charts{written} "
+              f"in {elapsed:.1f} ms.")
+    elif args.command == 'status':
+        for chart in summary['charts']:
+            print(f"  {chart['chart']:<26} {chart['bytes']:8d} bytes  {chart['anchors']:3d} anchors  "
+                  f"{chart['data_spans']} data spans{'  (dirty)' if chart['dirty'] else ''}")
+        print(f"\n{len(summary['charts'])} charts in memory, {summary['dirty']} not flushed.")
+    elif args.command in ('flush', 'stop'):
+        print(f"\nCompleted! Wrote {summary['written']} charts in {elapsed:.1f} ms.")
+    else:
+        print(f"\nCompleted! Reloaded {summary['charts']} charts in {elapsed:.1f} ms.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Shared file I/O for the chart scripts.
+
+Every script reads and writes charts through read_chart() and write_chart():
+
+- While run_jobs() works through its files, the next PREFETCH_AHEAD files
+  are read on a thread pool, so read latency overlaps with transforming the
+  current one. read_chart() takes a prefetched file if there is one.
+- write_chart() writes to a temp file next to the chart and renames it over
+  the chart, so an interrupted run leaves every chart either old or new,
+  never half-written.
+- Files are not fsynced one at a time: run_jobs() syncs every file written
+  in the run, and their directories, in one batch at the end.
+"""
+
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Files read ahead of the one being processed
+PREFETCH_AHEAD = 8
+
+# Threads used for prefetching and for the end-of-run fsync batch
+IO_THREADS = 4
+
+# Absolute path -> Future of the file's bytes (or None if it could not be read)
+_prefetched = {}
+
+# Files written in this process since the last take_written()
+_written = []
+
+
+def _key(path):
+    return os.path.abspath(path)
+
+
+def _read_bytes(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def read_chart(path):
+    """Return a file's text, from the prefetched reads if available.
+
+    Decodes and translates newlines the way open(path, 'r', encoding='utf-8')
+    does.
+    """
+
+    future = _prefetched.pop(_key(path), None)
+    data = future.result() if future is not None else None
+    if data is None:
+        with open(path, 'rb') as f:
+            data = f.read()
+
+    text = data.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def write_chart(path, content):
+    """Atomically replace a file with content (text is written as UTF-8).
+
+    content may also be bytes, or a list of bytes-like parts that are written
+    one after another (so shared pieces need not be joined into a copy). The
+    data goes to a temp file in the same directory, which is renamed over the
+    file; the file keeps its permissions. The fsync is left to sync_files()
+    at the end of the run.
+    """
+
+    path = Path(path)
+    if isinstance(content, str):
+        parts = [content.encode('utf-8')]
+    elif isinstance(content, (bytes, bytearray, memoryview)):
+        parts = [content]
+    else:
+        parts = content
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.writelines(parts)
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    _prefetched.pop(_key(path), None)
+    _written.append(_key(path))
+
+
+def take_written():
+    """Return and forget the files written in this process so far."""
+
+    written = list(_written)
+    _written.clear()
+    return written
+
+
+def _fsync(path, flags=os.O_RDONLY):
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def sync_files(paths):
+    """fsync the given files, then their directories, on a thread pool."""
+
+    paths = sorted(set(paths))
+    if not paths:
+        return
+    directories = sorted({os.path.dirname(path) for path in paths})
+    with ThreadPoolExecutor(max_workers=IO_THREADS) as executor:
+        list(executor.map(_fsync, paths))
+        # The renames are only durable once the directories are synced
+        list(executor.map(_fsync, directories))
+
+
+class Prefetcher:
+    """Reads a list of files ahead of their use on a thread pool.
+
+    Call advance(i) before processing items[i]; items that are not paths
+    are ignored.
+    """
+
+    def __init__(self, items, ahead=PREFETCH_AHEAD):
+        self.paths = [_key(item) if isinstance(item, (str, os.PathLike)) else None for item in items]
+        self.ahead = ahead
+        self.submitted = 0
+        self.executor = None
+
+    def __enter__(self):
+        if self.ahead > 0 and any(self.paths):
+            self.executor = ThreadPoolExecutor(max_workers=IO_THREADS)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        for path in self.paths:
+            if path is not None:
+                _prefetched.pop(path, None)
+
+    def advance(self, i):
+        """Make sure items i .. i + ahead are being read."""
+
+        if self.executor is None:
+            return
+        stop = min(len(self.paths), i + 1 + self.ahead)
+        while self.submitted < stop:
+            path = self.paths[self.submitted]
+            self.submitted += 1
+            if path is not None and path not in _prefetched:
+                _prefetched[path] = self.executor.submit(_read_bytes, path)
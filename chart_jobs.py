@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Shared execution layer for the chart patch and split scripts.
+
+Every script calls its per-file function through run_jobs(), which either runs
+the files one at a time (the default) or spreads them across a process pool
+when --jobs is given. Output printed by each file is captured and replayed in
+input order, so logs are identical whatever the job count. With --profile
+each file is run under the regex and transform profiler (see chart_profile.py).
+Every file's outcome, size and time go into the run's metrics summary (see
+chart_metrics.py); --quiet keeps only per-file errors and warnings on the
+console. Each worker prefetches the reads of its upcoming files, and the
+files written in a run are fsynced together at the end (see chart_io.py).
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import chart_io
+import chart_metrics
+import chart_profile
+
+
+def add_jobs_argument(parser):
+    """Add the shared -j/--jobs, --profile, --cprofile, --metrics and --quiet options to a parser."""
+
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help='number of worker processes (0 = one per CPU, default 1)'
+    )
+    chart_profile.add_profile_arguments(parser)
+    chart_metrics.add_metrics_arguments(parser)
+
+
+def parse_jobs(description=None):
+    """Parse a command line that only takes the shared options and return the job count."""
+
+    parser = argparse.ArgumentParser(description=description)
+    add_jobs_argument(parser)
+    return parser.parse_args().jobs
+
+
+def _call(func, item, profile=None):
+    """Run func(item) in a worker, capturing its output, any error, its metrics and profile.
+
+    Also returns the files it wrote, which still need an fsync.
+    """
+
+    output = io.StringIO()
+    profile_data = None
+    before = chart_metrics.begin_file(item)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        try:
+            if profile is None:
+                result = func(item)
+            else:
+                result, profile_data = chart_profile.profile_call(func, item, profile)
+            error = None
+        except Exception:
+            result = None
+            error = traceback.format_exc(limit=-1).strip()
+    output = output.getvalue()
+    metrics = chart_metrics.file_metrics(item, before, time.perf_counter() - start, output, error)
+    return result, output, error, metrics, profile_data, chart_io.take_written()
+
+
+def _call_chunk(func, items, profile=None):
+    """Yield _call() outcomes for a run of items, prefetching their reads."""
+
+    with chart_io.Prefetcher(items) as prefetcher:
+        for i, item in enumerate(items):
+            prefetcher.advance(i)
+            yield _call(func, item, profile)
+
+
+def _run_chunk(func, items, profile=None):
+    """Run a chunk of items in a worker process and return the outcomes."""
+
+    return list(_call_chunk(func, items, profile))
+
+
+def run_jobs(func, items, jobs=1):
+    """Call func(item) for every item and return the results in input order.
+
+    A file that raises is reported as an error and yields None; the remaining
+    files are still processed. func must be a module-level function (or a
+    functools.partial of one) so it can be sent to worker processes.
+    """
+
+    items = list(items)
+    profile = chart_profile.settings
+    run = chart_metrics.run_metrics()
+    start = time.perf_counter()
+    if run.jobs_start is None:
+        run.jobs_start = start
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    if jobs <= 1 or len(items) <= 1:
+        outcomes = _call_chunk(func, items, profile)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(jobs, len(items)))
+        chunksize = max(1, len(items) // (jobs * 4))
+        chunks = [items[i:i + chunksize] for i in range(0, len(items), chunksize)]
+        outcomes = (outcome for chunk_outcomes in
+                    executor.map(_run_chunk, [func] * len(chunks), chunks, [profile] * len(chunks))
+                    for outcome in chunk_outcomes)
+
+    results = []
+    written = []
+    try:
+        for item, (result, output, error, metrics, profile_data, item_written) in zip(items, outcomes):
+            written.extend(item_written)
+            print(chart_metrics.filter_output(output), end='')
+            run.add_file(metrics)
+            if profile is not None:
+                chart_profile.record(profile_data)
+            if error is not None:
+                print(f"ERROR: {getattr(item, 'name', item)}: {error}")
+            results.append(result)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        else:
+            outcomes.close()
+        run.add_phase('jobs', time.perf_counter() - start)
+
+        sync_start = time.perf_counter()
+        chart_io.sync_files(written)
+        run.add_phase('fsync', time.perf_counter() - sync_start)
+
+    return results
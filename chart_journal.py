@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Delta journal and rollback for pipeline runs.
+
+While run_pipeline.py applies transforms, every step that changes a chart is
+recorded as a list of (offset, old_text, new_text) edits: the text ranges the
+transform replaced, with offsets into the text the step started from. Each
+run gets a directory under .chart_journal/ holding one small JSON file per
+changed chart. Entries are gzipped, so the journal takes a small fraction of
+the disk a copy of the charts would.
+
+Rolling back replays the journal in reverse, touching only the recorded
+ranges. A single transform can be rolled back out of a run as well: the
+steps after it are undone, its own edits are reverted, and the later steps
+are re-applied with their offsets rebased, or the chart is left alone if a
+later step edited the same text.
+
+    python chart_journal.py --list
+    python chart_journal.py --rollback               # latest run
+    python chart_journal.py --rollback 20250101-120000-123456
+    python chart_journal.py --rollback --transform fix_risk_names
+"""
+
+import argparse
+import difflib
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from build_cache import content_hash
+from chart_anchors import apply_edits
+from chart_io import read_chart, sync_files, take_written, write_chart
+
+JOURNAL_DIR = Path('.chart_journal')
+
+# Number of runs kept; older journals are pruned when a run finishes
+JOURNAL_KEEP = 20
+
+
+class JournalConflict(Exception):
+    """Raised when journal edits cannot be replayed against a chart."""
+
+
+def compute_edits(before, after):
+    """Return (offset, old_text, new_text) edits turning before into after.
+
+    Changed line ranges are found with difflib after trimming the common
+    prefix and suffix, then narrowed to the characters that differ. Offsets
+    are into before.
+    """
+
+    a = before.splitlines(keepends=True)
+    b = after.splitlines(keepends=True)
+
+    prefix = 0
+    while prefix < min(len(a), len(b)) and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < min(len(a), len(b)) - prefix and
+           a[len(a) - 1 - suffix] == b[len(b) - 1 - suffix]):
+        suffix += 1
+
+    a_mid = a[prefix:len(a) - suffix]
+    b_mid = b[prefix:len(b) - suffix]
+    offset = sum(len(line) for line in a[:prefix])
+
+    line_offsets = [offset]
+    for line in a_mid:
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    edits = []
+    matcher = difflib.SequenceMatcher(None, a_mid, b_mid, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        old = ''.join(a_mid[i1:i2])
+        new = ''.join(b_mid[j1:j2])
+
+        # Narrow replaced lines down to the characters that differ, so
+        # transforms editing neighbouring properties don't overlap
+        start = 0
+        while start < min(len(old), len(new)) and old[start] == new[start]:
+            start += 1
+        end = 0
+        while end < min(len(old), len(new)) - start and old[-1 - end] == new[-1 - end]:
+            end += 1
+        edits.append((line_offsets[i1] + start, old[start:len(old) - end], new[start:len(new) - end]))
+    return edits
+
+
+def invert_edits(edits):
+    """Return the edits that undo edits, with offsets into the edited text."""
+
+    inverse = []
+    shift = 0
+    for pos, old, new in sorted(edits, key=lambda edit: edit[0]):
+        inverse.append((pos + shift, new, old))
+        shift += len(new) - len(old)
+    return inverse
+
+
+def replay(content, edits):
+    """Apply (offset, old_text, new_text) edits after checking old_text is there."""
+
+    for pos, old, _ in edits:
+        if content[pos:pos + len(old)] != old:
+            raise JournalConflict(f"Text at offset {pos} does not match the journal")
+    return apply_edits(content, [(pos, pos + len(old), new) for pos, old, new in edits])
+
+
+def map_edits(edits, through):
+    """Move edits across another edit list applied to the same text.
+
+    edits and through both have offsets into the same text; the result has
+    edits' offsets into the text after through is applied. Raises
+    JournalConflict if the two lists touch overlapping ranges.
+    """
+
+    mapped = []
+    for pos, old, new in edits:
+        end = pos + len(old)
+        shift = 0
+        for other_pos, other_old, other_new in through:
+            other_end = other_pos + len(other_old)
+            if other_end <= pos and not (other_end == pos == other_pos == end):
+                shift += len(other_new) - len(other_old)
+            elif other_pos >= end and not (other_pos == pos == end):
+                continue
+            else:
+                raise JournalConflict(f"Edits overlap at offset {pos}")
+        mapped.append((pos + shift, old, new))
+    return mapped
+
+
+def start_run(transform_names, journal_dir=JOURNAL_DIR):
+    """Create the journal directory for a new run and return its path."""
+
+    journal_dir = Path(journal_dir)
+    run_id = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    run_dir = journal_dir / run_id
+    run_dir.mkdir(parents=True)
+    with open(run_dir / 'run.json', 'w', encoding='utf-8') as f:
+        json.dump({'transforms': list(transform_names), 'rolled_back': []}, f, indent=1)
+    return run_dir
+
+
+def finish_run(run_dir, journal_dir=JOURNAL_DIR):
+    """Close a run: drop it if it changed nothing, then prune old runs.
+
+    Returns run_dir, or None if the run had no entries and was removed, so
+    a run that changed nothing never becomes the latest or evicts real ones.
+    """
+
+    run_dir = Path(run_dir)
+    if not any(run_dir.glob('*.json.gz')):
+        shutil.rmtree(run_dir, ignore_errors=True)
+        run_dir = None
+
+    for old_run in list_runs(journal_dir)[:-JOURNAL_KEEP]:
+        shutil.rmtree(old_run)
+    return run_dir
+
+
+def list_runs(journal_dir=JOURNAL_DIR):
+    """Return the run directories that have entries, oldest first."""
+
+    journal_dir = Path(journal_dir)
+    if not journal_dir.exists():
+        return []
+    return sorted(path for path in journal_dir.iterdir()
+                  if (path / 'run.json').exists() and any(path.glob('*.json.gz')))
+
+
+def entry_path(run_dir, file_path):
+    """Return the journal file for one chart in a run."""
+
+    return Path(run_dir) / (Path(file_path).name + '.json.gz')
+
+
+def write_entry(run_dir, file_path, original, steps, output):
+    """Record the (transform, edits) steps that turned original into output."""
+
+    entry = {
+        'file': str(file_path),
+        'input_hash': content_hash(original.encode('utf-8')),
+        'output_hash': content_hash(output.encode('utf-8')),
+        'steps': [{'transform': name, 'edits': edits} for name, edits in steps],
+    }
+    save_entry(entry_path(run_dir, file_path), entry)
+
+
+def load_entry(entry_file):
+    """Read a compressed journal entry."""
+
+    with gzip.open(entry_file, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_entry(entry_file, entry):
+    """Write a compressed journal entry atomically."""
+
+    tmp_path = entry_file.with_suffix(f'.{os.getpid()}.tmp')
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(entry, f, separators=(',', ':'))
+    os.replace(tmp_path, entry_file)
+
+
+def rollback_content(content, steps, transform=None):
+    """Undo a chart's journal steps, or only those of one transform.
+
+    Returns (content, remaining_steps): the rolled back text and the steps
+    still applied to it, rebased onto the new text.
+    """
+
+    steps = [(step['transform'], [tuple(edit) for edit in step['edits']]) for step in steps]
+    targets = [i for i, (name, _) in enumerate(steps) if transform is None or name == transform]
+    if not targets:
+        return content, steps
+    first = targets[0]
+
+    # Undo everything back to the first step being rolled back
+    for _, edits in reversed(steps[first:]):
+        content = replay(content, invert_edits(edits))
+
+    # content now lacks every step from first on. removed holds the rolled
+    # back steps as edits against content, so the journal text at each step
+    # is content with removed applied; kept steps are rebased across it.
+    remaining = steps[:first]
+    removed = []
+    last_kept = max((i for i in range(first, len(steps)) if i not in targets), default=first)
+    for i in range(first, last_kept + 1):
+        name, edits = steps[i]
+        rebased = map_edits(edits, invert_edits(removed))
+        if i in targets:
+            removed = sorted(removed + rebased, key=lambda edit: edit[0])
+            continue
+        content = replay(content, rebased)
+        removed = map_edits(removed, rebased)
+        remaining.append((name, rebased))
+    return content, remaining
+
+
+def rollback_file(entry_file, transform=None, force=False):
+    """Roll back one chart from its journal entry. Returns True if changed."""
+
+    entry = load_entry(entry_file)
+
+    file_path = Path(entry['file'])
+    content = read_chart(file_path)
+
+    if content_hash(content.encode('utf-8')) != entry['output_hash'] and not force:
+        print(f"ERROR: {file_path.name} changed since the run (use --force to try anyway)")
+        return False
+
+    try:
+        new_content, remaining = rollback_content(content, entry['steps'], transform)
+    except JournalConflict as e:
+        print(f"ERROR: {file_path.name}: {e}")
+        return False
+
+    if new_content == content:
+        return False
+
+    write_chart(file_path, new_content)
+
+    entry['output_hash'] = content_hash(new_content.encode('utf-8'))
+    entry['steps'] = [{'transform': name, 'edits': edits} for name, edits in remaining]
+    save_entry(entry_file, entry)
+
+    print(f"Rolled back: {file_path.name}")
+    return True
+
+
+def rollback_run(run_dir, transform=None, force=False):
+    """Roll back every chart in a run, or one transform's changes to them."""
+
+    run_dir = Path(run_dir)
+    entries = sorted(run_dir.glob('*.json.gz'))
+
+    rolled_back = sum(rollback_file(entry, transform, force) for entry in entries)
+    sync_files(take_written())
+
+    with open(run_dir / 'run.json', 'r', encoding='utf-8') as f:
+        run = json.load(f)
+    run['rolled_back'].append(transform or '*')
+    with open(run_dir / 'run.json', 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=1)
+
+    return rolled_back, len(entries)
+
+
+def main():
+    """List journaled runs or roll one back."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--list', action='store_true', help='list journaled runs')
+    parser.add_argument('--rollback', nargs='?', const='latest', metavar='RUN',
+                        help='roll back a run (default: the latest)')
+    parser.add_argument('--transform', help='only roll back this transform')
+    parser.add_argument('--force', action='store_true', help='roll back charts edited since the run')
+    args = parser.parse_args()
+
+    runs = list_runs()
+
+    if args.rollback is None:
+        if not runs:
+            print("No journaled runs found!")
+        for run_dir in runs:
+            with open(run_dir / 'run.json', 'r', encoding='utf-8') as f:
+                run = json.load(f)
+            files = len(list(run_dir.glob('*.json.gz')))
+            size = sum(path.stat().st_size for path in run_dir.iterdir())
+            status = f" (rolled back: {', '.join(run['rolled_back'])})" if run['rolled_back'] else ''
+            print(f"{run_dir.name}  {files:3d} files  {size / 1024:7.1f} KB  "
+                  f"{', '.join(run['transforms'])}{status}")
+        return
+
+    if args.rollback == 'latest':
+        if not runs:
+            raise SystemExit("ERROR: No journaled runs found")
+        run_dir = runs[-1]
+    else:
+        run_dir = JOURNAL_DIR / args.rollback
+        if not (run_dir / 'run.json').exists():
+            raise SystemExit(f"ERROR: Unknown run {args.rollback} (see --list)")
+
+    target = f"{args.transform} from run {run_dir.name}" if args.transform else f"run {run_dir.name}"
+    print(f"Rolling back {target}\n")
+
+    rolled_back, total = rollback_run(run_dir, args.transform, args.force)
+
+    print(f"\nCompleted! Rolled back {rolled_back}/{total} files.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Run metrics for the chart scripts.
+
+run_jobs() measures every file a script handles: wall time, size before and
+after, and the outcome. A file is changed if it was rewritten (or its job
+reported extra output files with wrote()), failed if its job raised or
+printed an ERROR/FAILED/Could not line, and skipped otherwise. When the
+script exits, one JSON summary of the run is appended as a line to
+chart_metrics.jsonl (or --metrics PATH), so dashboards can track patch
+throughput across runs:
+
+    {"script": "fix_risk_names.py", "files": {"scanned": 48, "changed": 48, ...},
+     "bytes": {"in": ..., "out": ...}, "phases": {"setup": ..., "jobs": ...},
+     "slowest_files": [...], ...}
+
+--quiet drops the per-file "Updated: ..." lines from the console and keeps
+only errors and warnings; the summary has the counts.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+DEFAULT_METRICS = 'chart_metrics.jsonl'
+
+# Number of slowest files listed in the summary
+SLOWEST_FILES = 10
+
+# Per-file output lines that mean the file could not be patched
+FAILURE_PREFIXES = ('ERROR', 'FAILED', 'Could not')
+
+# Per-file output lines still printed with --quiet
+NOTICE_PREFIXES = FAILURE_PREFIXES + ('WARNING', 'Warning')
+
+# Set by --metrics/--quiet
+settings = {'path': DEFAULT_METRICS, 'quiet': False}
+
+PROCESS_START = time.perf_counter()
+
+# Extra output files written by the job running in this process
+_written = []
+
+_run = None
+
+
+def wrote(path):
+    """Record an output file written by the current job besides its input file."""
+
+    _written.append(Path(path))
+
+
+def file_size(path):
+    """Return a file's size, or 0 if it does not exist."""
+
+    try:
+        return os.stat(path).st_size
+    except (OSError, TypeError):
+        return 0
+
+
+def file_state(item):
+    """Return (size, mtime_ns) of an input file, or None if it is not a file."""
+
+    if not isinstance(item, (str, os.PathLike)):
+        return None
+    try:
+        stat = os.stat(item)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def begin_file(item):
+    """Start measuring a job; returns the input's file_state() for file_metrics()."""
+
+    _written.clear()
+    return file_state(item)
+
+
+def file_metrics(item, before, seconds, output, error):
+    """Return the metrics of one finished job.
+
+    before is what begin_file() returned; output is what the job printed and
+    error the traceback if it raised.
+    """
+
+    after = file_state(item) if before is not None else None
+    written = list(_written)
+    _written.clear()
+
+    if error is not None or any(line.startswith(FAILURE_PREFIXES) for line in output.splitlines()):
+        status = 'failed'
+    elif written or (after is not None and after != before):
+        status = 'changed'
+    else:
+        status = 'skipped'
+
+    bytes_out = sum(file_size(path) for path in written)
+    if after is not None and after != before:
+        bytes_out += after[0]
+
+    return {
+        'file': str(getattr(item, 'name', item)),
+        'status': status,
+        'seconds': seconds,
+        'bytes_in': before[0] if before is not None else 0,
+        'bytes_out': bytes_out,
+    }
+
+
+def filter_output(output):
+    """Return the job output to print: all of it, or only notices with --quiet."""
+
+    if not settings['quiet']:
+        return output
+    return ''.join(line for line in output.splitlines(keepends=True)
+                   if line.lstrip().startswith(NOTICE_PREFIXES))
+
+
+class RunMetrics:
+    """Per-file metrics and phase times collected in one run."""
+
+    def __init__(self):
+        self.started = datetime.now(timezone.utc)
+        self.files = []
+        self.phases = {}
+        self.jobs_start = None
+
+    def add_file(self, metrics):
+        """Add one file's metrics (as returned by file_metrics)."""
+
+        self.files.append(metrics)
+
+    def add_phase(self, name, seconds):
+        """Add time to a named phase."""
+
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def summary(self):
+        """Return the run summary as JSON-ready data."""
+
+        total = time.perf_counter() - PROCESS_START
+        counts = {'scanned': len(self.files), 'changed': 0, 'skipped': 0, 'failed': 0}
+        for metrics in self.files:
+            counts[metrics['status']] += 1
+
+        # setup: until the first job started; finish: everything after and between
+        phases = {'setup': self.jobs_start - PROCESS_START if self.jobs_start else 0.0}
+        phases.update(self.phases)
+        phases['finish'] = max(0.0, total - phases['setup'] - self.phases.get('jobs', 0.0))
+
+        jobs_time = self.phases.get('jobs', 0.0)
+        return {
+            'script': Path(sys.argv[0]).name,
+            'args': sys.argv[1:],
+            'started': self.started.isoformat(timespec='seconds'),
+            'seconds': total,
+            'files': counts,
+            'bytes': {
+                'in': sum(metrics['bytes_in'] for metrics in self.files),
+                'out': sum(metrics['bytes_out'] for metrics in self.files),
+            },
+            'files_per_second': len(self.files) / jobs_time if jobs_time else None,
+            'phases': phases,
+            'slowest_files': sorted(self.files, key=lambda m: -m['seconds'])[:SLOWEST_FILES],
+        }
+
+    def write(self):
+        """Append the summary to the metrics file as one JSON line."""
+
+        with open(settings['path'], 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.summary(), separators=(',', ':')) + '\n')
+
+
+def run_metrics():
+    """Return this run's RunMetrics, written when the script exits."""
+
+    global _run
+    if _run is None:
+        _run = RunMetrics()
+        pid = os.getpid()
+        atexit.register(lambda: os.getpid() == pid and _run.write())
+    return _run
+
+
+def record_file(file_name, status, seconds=0.0, bytes_in=0, bytes_out=0):
+    """Record a file handled outside run_jobs (e.g. restored from a cache)."""
+
+    run_metrics().add_file({'file': str(file_name), 'status': status, 'seconds': seconds,
+                            'bytes_in': bytes_in, 'bytes_out': bytes_out})
+
+
+def record_phase(name, seconds):
+    """Add time to a named phase of this run."""
+
+    run_metrics().add_phase(name, seconds)
+
+
+class _MetricsAction(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
+        if self.dest == 'quiet':
+            values = True
+            settings['quiet'] = True
+        else:
+            settings['path'] = values
+        setattr(namespace, self.dest, values)
+
+
+def add_metrics_arguments(parser):
+    """Add the shared --metrics and --quiet options to an argument parser."""
+
+    parser.add_argument(
+        '--metrics', metavar='PATH', default=DEFAULT_METRICS, action=_MetricsAction,
+        help=f'append the run summary as a JSON line to PATH (default {DEFAULT_METRICS})'
+    )
+    parser.add_argument(
+        '-q', '--quiet', nargs=0, default=False, action=_MetricsAction,
+        help='only print errors and warnings for each file'
+    )
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Regex and transform profiling for the chart scripts (--profile).
+
+Every script that takes -j/--jobs also takes --profile [REPORT]. While a file
+is processed, each regular expression the scripts run is timed: the re
+module's functions are wrapped, and compiled patterns held in the module
+globals of this repository's scripts are swapped for timing proxies. For
+every pattern the report records, per file and in total, the calls, wall
+time, matches and bytes of text replaced by substitutions, so expensive
+passes and patterns that never match stand out. Pipeline transforms are
+timed as sections, and pattern calls are attributed to the transform that
+made them. --cprofile STATS also runs each file under cProfile and merges
+the stats of all files into one pstats file.
+
+    python fix_iframe_blur_final.py --profile
+    python run_pipeline.py fix_layout_optimization fix_risk_names --profile pipeline.json
+    python apply_working_dpi_fix.py --cprofile dpi.prof    # then: python -m pstats dpi.prof
+
+Wall times are measured around the real regex call; match and byte counts
+are gathered afterwards and not included in them.
+"""
+
+import argparse
+import atexit
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import time
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+
+DEFAULT_REPORT = 'profile_report.json'
+
+REPO_DIR = Path(__file__).resolve().parent
+
+REGEX_FUNCTIONS = ['compile', 'sub', 'subn', 'search', 'match', 'fullmatch', 'findall', 'finditer', 'split']
+
+# Longest pattern text kept in the report
+PATTERN_TEXT_LIMIT = 160
+
+# Number of patterns and files listed on the console after a run
+SUMMARY_TOP = 5
+
+# Set by --profile/--cprofile: {'report': path, 'cprofile': path or None}
+settings = None
+
+_original = {name: getattr(re, name) for name in REGEX_FUNCTIONS}
+_installed = False
+_instrumented_modules = set()
+
+# The FileProfile being recorded in this process, and the running section
+_current = None
+_section = None
+
+_report = None
+
+
+class FileProfile:
+    """Regex and section timings for one file."""
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.patterns = {}
+        self.sections = {}
+
+    def record(self, key, pattern, matches, rewritten, elapsed):
+        """Add one regex call to the pattern's totals."""
+
+        stats = self.patterns.get((_section, key))
+        if stats is None:
+            stats = self.patterns[(_section, key)] = {
+                'pattern': pattern, 'calls': 0, 'matches': 0, 'bytes_rewritten': 0, 'seconds': 0.0,
+            }
+        stats['calls'] += 1
+        stats['matches'] += matches
+        stats['bytes_rewritten'] += rewritten
+        stats['seconds'] += elapsed
+
+    def as_dict(self):
+        """Return the profile as JSON-ready data."""
+
+        return {
+            'file': self.name,
+            'seconds': self.seconds,
+            'sections': self.sections,
+            'patterns': [dict(stats, section=section, key=key)
+                         for (section, key), stats in self.patterns.items()],
+        }
+
+
+def pattern_text(compiled):
+    """Return a pattern's source, shortened for the report."""
+
+    text = compiled.pattern if isinstance(compiled.pattern, str) else repr(compiled.pattern)
+    return text if len(text) <= PATTERN_TEXT_LIMIT else text[:PATTERN_TEXT_LIMIT] + '...'
+
+
+def match_size(match):
+    """Return the size in bytes of the text a match covers."""
+
+    text = match.group()
+    return len(text.encode('utf-8')) if isinstance(text, str) else len(text)
+
+
+def _record(compiled, key, matches, rewritten, elapsed):
+    if _current is not None:
+        _current.record(key, pattern_text(compiled), matches, rewritten, elapsed)
+
+
+def _sub(compiled, key, repl, string, count=0):
+    """Run compiled.subn() and record it; returns (new_string, count)."""
+
+    start = time.perf_counter()
+    result = compiled.subn(repl, string, count)
+    elapsed = time.perf_counter() - start
+
+    rewritten = 0
+    if result[1]:
+        rewritten = sum(match_size(match)
+                        for match in islice(compiled.finditer(string), result[1]))
+    _record(compiled, key, result[1], rewritten, elapsed)
+    return result
+
+
+def _find(compiled, method, key, string, *args, **kwargs):
+    """Run a search/match/findall/split method and record it."""
+
+    start = time.perf_counter()
+    result = getattr(compiled, method)(string, *args, **kwargs)
+    elapsed = time.perf_counter() - start
+
+    if method == 'findall':
+        matches = len(result)
+    elif method == 'split':
+        matches = (len(result) - 1) // (compiled.groups + 1)
+    else:
+        matches = int(result is not None)
+    _record(compiled, key, matches, 0, elapsed)
+    return result
+
+
+def _finditer(compiled, key, string, *args, **kwargs):
+    """Yield compiled.finditer() matches, timing only the regex work."""
+
+    iterator = compiled.finditer(string, *args, **kwargs)
+    matches = 0
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            match = next(iterator, None)
+            elapsed += time.perf_counter() - start
+            if match is None:
+                break
+            matches += 1
+            yield match
+    finally:
+        _record(compiled, key, matches, 0, elapsed)
+
+
+class ProfiledPattern:
+    """Timing proxy for a compiled pattern held in a module global."""
+
+    def __init__(self, compiled, key):
+        self._compiled = compiled
+        self._key = key
+
+    def __getattr__(self, name):
+        return getattr(self._compiled, name)
+
+    def __repr__(self):
+        return repr(self._compiled)
+
+    def sub(self, repl, string, count=0):
+        if _current is None:
+            return self._compiled.sub(repl, string, count)
+        return _sub(self._compiled, self._key, repl, string, count)[0]
+
+    def subn(self, repl, string, count=0):
+        if _current is None:
+            return self._compiled.subn(repl, string, count)
+        return _sub(self._compiled, self._key, repl, string, count)
+
+    def finditer(self, string, *args, **kwargs):
+        if _current is None:
+            return self._compiled.finditer(string, *args, **kwargs)
+        return _finditer(self._compiled, self._key, string, *args, **kwargs)
+
+    def _method(name):
+        def method(self, string, *args, **kwargs):
+            if _current is None:
+                return getattr(self._compiled, name)(string, *args, **kwargs)
+            return _find(self._compiled, name, self._key, string, *args, **kwargs)
+        method.__name__ = name
+        return method
+
+    search = _method('search')
+    match = _method('match')
+    fullmatch = _method('fullmatch')
+    findall = _method('findall')
+    split = _method('split')
+    del _method
+
+
+def _compile(pattern, flags=0):
+    if isinstance(pattern, ProfiledPattern):
+        pattern = pattern._compiled
+    return _original['compile'](pattern, flags)
+
+
+def _caller_key():
+    """Return 'file.py:line' for the code that called the re function."""
+
+    frame = sys._getframe(2)
+    return f"{Path(frame.f_code.co_filename).name}:{frame.f_lineno}"
+
+
+def _re_sub(pattern, repl, string, count=0, flags=0):
+    if _current is None:
+        return _compile(pattern, flags).sub(repl, string, count)
+    return _sub(_compile(pattern, flags), _caller_key(), repl, string, count)[0]
+
+
+def _re_subn(pattern, repl, string, count=0, flags=0):
+    if _current is None:
+        return _compile(pattern, flags).subn(repl, string, count)
+    return _sub(_compile(pattern, flags), _caller_key(), repl, string, count)
+
+
+def _re_finditer(pattern, string, flags=0):
+    if _current is None:
+        return _compile(pattern, flags).finditer(string)
+    return _finditer(_compile(pattern, flags), _caller_key(), string)
+
+
+def _re_split(pattern, string, maxsplit=0, flags=0):
+    if _current is None:
+        return _compile(pattern, flags).split(string, maxsplit)
+    return _find(_compile(pattern, flags), 'split', _caller_key(), string, maxsplit)
+
+
+def _re_function(name):
+    def function(pattern, string, flags=0):
+        if _current is None:
+            return getattr(_compile(pattern, flags), name)(string)
+        return _find(_compile(pattern, flags), name, _caller_key(), string)
+    function.__name__ = name
+    return function
+
+
+def install():
+    """Wrap the re module functions with the timing hooks (once per process)."""
+
+    global _installed
+    if _installed:
+        return
+    re.compile = _compile
+    re.sub = _re_sub
+    re.subn = _re_subn
+    re.finditer = _re_finditer
+    re.split = _re_split
+    for name in ('search', 'match', 'fullmatch', 'findall'):
+        setattr(re, name, _re_function(name))
+    _installed = True
+
+
+def instrument_patterns():
+    """Swap compiled patterns in this repository's module globals for timing proxies.
+
+    Covers patterns stored directly in a global and in lists of patterns or
+    of tuples holding patterns. Modules are instrumented once; call again to
+    pick up modules imported since.
+    """
+
+    for module_name, module in list(sys.modules.items()):
+        if module_name in _instrumented_modules:
+            continue
+        path = getattr(module, '__file__', None)
+        if not path or Path(path).resolve().parent != REPO_DIR:
+            continue
+        _instrumented_modules.add(module_name)
+
+        prefix = Path(path).stem
+        for name, value in list(vars(module).items()):
+            if isinstance(value, re.Pattern):
+                setattr(module, name, ProfiledPattern(value, f'{prefix}.{name}'))
+            elif isinstance(value, list):
+                for i, entry in enumerate(value):
+                    key = f'{prefix}.{name}[{i}]'
+                    if isinstance(entry, re.Pattern):
+                        value[i] = ProfiledPattern(entry, key)
+                    elif isinstance(entry, tuple) and any(isinstance(part, re.Pattern) for part in entry):
+                        value[i] = tuple(ProfiledPattern(part, key) if isinstance(part, re.Pattern) else part
+                                         for part in entry)
+
+
+@contextmanager
+def profile_section(name):
+    """Time a named section (e.g. one transform) of the current file.
+
+    Regex calls made inside are attributed to the section. Does nothing
+    unless a file is being profiled.
+    """
+
+    global _section
+    if _current is None:
+        yield
+        return
+
+    outer = _section
+    _section = name
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _current.sections[name] = _current.sections.get(name, 0.0) + time.perf_counter() - start
+        _section = outer
+
+
+class _Stats:
+    """cProfile stats sent back from a worker, in the form pstats.Stats() loads."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def profile_call(func, item, options):
+    """Call func(item) while profiling it. Returns (result, profile_data).
+
+    profile_data holds the file's FileProfile as a dict and, if cProfile
+    output was requested, its raw cProfile stats.
+    """
+
+    global _current
+    install()
+    instrument_patterns()
+
+    _current = FileProfile(str(getattr(item, 'name', item)))
+    profiler = cProfile.Profile() if options.get('cprofile') else None
+    start = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            result = func(item)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            _current.seconds = time.perf_counter() - start
+            data = _current.as_dict()
+    finally:
+        _current = None
+
+    if profiler is not None:
+        profiler.create_stats()
+        data['cprofile'] = profiler.stats
+    return result, data
+
+
+class ProfileReport:
+    """Profiles of every file handled in this run, written as one JSON report."""
+
+    def __init__(self, options):
+        self.options = options
+        self.files = []
+        self.stats = None
+        self.start = time.perf_counter()
+
+    def add(self, data):
+        """Add one file's profile data (as returned by profile_call)."""
+
+        if data is None:
+            return
+        stats = data.pop('cprofile', None)
+        if stats is not None:
+            if self.stats is None:
+                self.stats = pstats.Stats(_Stats(stats))
+            else:
+                self.stats.add(_Stats(stats))
+        self.files.append(data)
+
+    def summary(self):
+        """Return the report data: per-file profiles and per-pattern totals."""
+
+        patterns = {}
+        sections = {}
+        for file_data in self.files:
+            for name, seconds in file_data['sections'].items():
+                section = sections.setdefault(name, {'section': name, 'seconds': 0.0, 'files': 0})
+                section['seconds'] += seconds
+                section['files'] += 1
+            for stats in file_data['patterns']:
+                total = patterns.setdefault((stats['section'], stats['key']), {
+                    'key': stats['key'], 'section': stats['section'], 'pattern': stats['pattern'],
+                    'calls': 0, 'matches': 0, 'bytes_rewritten': 0, 'seconds': 0.0,
+                    'files': 0, 'files_matched': 0,
+                })
+                for field in ('calls', 'matches', 'bytes_rewritten', 'seconds'):
+                    total[field] += stats[field]
+                total['files'] += 1
+                total['files_matched'] += stats['matches'] > 0
+
+        for total in patterns.values():
+            total['no_op'] = total['matches'] == 0
+
+        return {
+            'command': [Path(sys.argv[0]).name] + sys.argv[1:],
+            'seconds': time.perf_counter() - self.start,
+            'files_profiled': len(self.files),
+            'regex_seconds': sum(total['seconds'] for total in patterns.values()),
+            'cprofile': self.options.get('cprofile') if self.stats is not None else None,
+            'sections': sorted(sections.values(), key=lambda s: -s['seconds']),
+            'patterns': sorted(patterns.values(), key=lambda p: -p['seconds']),
+            'files': sorted(self.files, key=lambda f: -f['seconds']),
+        }
+
+    def write(self):
+        """Write the JSON report (and pstats file) and print the main findings."""
+
+        summary = self.summary()
+        with open(self.options['report'], 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=1)
+        if self.stats is not None:
+            self.stats.dump_stats(self.options['cprofile'])
+
+        print(f"\nProfile of {summary['files_profiled']} files: "
+              f"{summary['regex_seconds'] * 1000:.1f} ms in regexes")
+        for total in summary['patterns'][:SUMMARY_TOP]:
+            where = f"{total['section']}: " if total['section'] else ''
+            print(f"  {total['seconds'] * 1000:8.1f} ms  {total['calls']:6d} calls "
+                  f"{total['matches']:6d} matches  {where}{total['key']}")
+        no_op = sum(1 for total in summary['patterns'] if total['no_op'])
+        if no_op:
+            print(f"  {no_op} patterns never matched")
+        print(f"Profile report: {self.options['report']}"
+              + (f", cProfile stats: {self.options['cprofile']}" if summary['cprofile'] else ''))
+
+
+def record(data):
+    """Add a file's profile data to this run's report, written at exit."""
+
+    global _report
+    if _report is None:
+        _report = ProfileReport(settings)
+        pid = os.getpid()
+        atexit.register(lambda: os.getpid() == pid and _report.write())
+    _report.add(data)
+
+
+def enable(report=None, cprofile=None):
+    """Turn profiling on for this run."""
+
+    global settings
+    if settings is None:
+        settings = {'report': DEFAULT_REPORT, 'cprofile': None}
+    if report is not None:
+        settings['report'] = report
+    if cprofile is not None:
+        settings['cprofile'] = cprofile
+
+
+class _ProfileAction(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, values)
+        if self.dest == 'cprofile':
+            enable(cprofile=values)
+        else:
+            enable(report=values)
+
+
+def add_profile_arguments(parser):
+    """Add the shared --profile and --cprofile options to an argument parser."""
+
+    parser.add_argument(
+        '--profile', nargs='?', const=DEFAULT_REPORT, metavar='REPORT', action=_ProfileAction,
+        help=f'time every regex per file and write a JSON report (default {DEFAULT_REPORT})'
+    )
+    parser.add_argument(
+        '--cprofile', metavar='STATS', action=_ProfileAction,
+        help='also run each file under cProfile and write merged pstats to STATS (implies --profile)'
+    )
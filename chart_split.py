@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Split actor and sector table charts into charts of grouped rows.
+
+A table chart is parsed once into a TableFile: the head up to <tbody>, one
+row per data-actor/data-sector attribute, and the tail from </tbody>. Each
+output is then a list of parts: the shared head and tail pieces (split
+around the title, which is the only text that differs) and the selected
+rows, all memoryview slices of the one encoded file, written without being
+joined into a copy.
+
+The groupings live in SPLITS: required/optional actors for the
+vulnerability and responsibility charts and SECTOR_GROUPS for the sector
+charts. --groups replaces them with a JSON object of group name -> row keys.
+Source charts of all kinds are split in one job pool, in parallel with -j.
+
+    python chart_split.py                     # vuln, resp and sector charts
+    python chart_split.py sector -j 0
+    python chart_split.py vuln --groups groups.json
+"""
+
+import argparse
+import json
+import re
+from functools import partial
+from pathlib import Path
+
+import chart_metrics
+from chart_catalog import parse_chart_name, select_charts
+from chart_io import read_chart, write_chart
+from chart_jobs import add_jobs_argument, run_jobs
+
+# Define actor categories
+REQUIRED_ACTORS = [
+    "ai_dev_gen",      # AI Developer (General-purpose AI)
+    "ai_deployer",     # AI Deployer
+    "ai_gov_actor",    # AI Governance Actor
+    "ai_user"          # AI User
+]
+
+OPTIONAL_ACTORS = [
+    "ai_dev_spec",     # AI Developer (Specialized AI)
+    "ai_infra",        # AI Infrastructure Provider
+    "ai_stake"         # Affected Stakeholder
+]
+
+# Define sector groups (4, 4, 4, 2)
+SECTOR_GROUPS = {
+    1: [
+        "Agriculture",
+        "Trade",
+        "Information",
+        "Finance"
+    ],
+    2: [
+        "Real_Estate",
+        "Professional",
+        "Scientific",
+        "Management"
+    ],
+    3: [
+        "Education",
+        "Health_Care",
+        "Arts",
+        "Accommodation"
+    ],
+    4: [
+        "Public_Admin",
+        "National_Security"
+    ]
+}
+
+TITLE_PATTERN = re.compile(rb'<title>(.*?)</title>')
+
+
+class TableFile:
+    """A table chart parsed into head, keyed rows and tail, as slices of its encoded text."""
+
+    def __init__(self, content, attribute):
+        self.data = content.encode('utf-8') if isinstance(content, str) else content
+        self.view = memoryview(self.data)
+        self.attribute = attribute
+
+        title_match = TITLE_PATTERN.search(self.data)
+        self.title = title_match.group(1) if title_match else b''
+
+        # Rows sit between the last <tbody> line before the first </tbody> and that line
+        close = self.data.find(b'</tbody>')
+        opened = self.data.rfind(b'<tbody>', 0, close) if close >= 0 else -1
+        if opened < 0:
+            raise ValueError("no <tbody>")
+        self.body_start = self.data.find(b'\n', opened) + 1
+        self.body_end = self.data.rfind(b'\n', 0, close) + 1
+        if self.body_start == 0 or self.body_end < self.body_start:
+            raise ValueError("no <tbody>")
+
+        # A row runs from its data-* line to the next row's line (or </tbody>)
+        row_start = re.compile(rb'^[^\n]*data-' + attribute.encode() + rb'="([^"]+)"', re.MULTILINE)
+        starts = [(match.start(), match.group(1).decode('utf-8'))
+                  for match in row_start.finditer(self.data, self.body_start, self.body_end)]
+        self.rows = {}
+        for (start, key), (end, _) in zip(starts, starts[1:] + [(self.body_end, None)]):
+            self.rows[key] = self.view[start:end]
+
+        # Head and tail, split around every occurrence of the title
+        self.head = self._pieces(0, self.body_start)
+        self.tail = self._pieces(self.body_end, len(self.data))
+
+    @classmethod
+    def read(cls, path, attribute):
+        """Parse a chart file; returns None if it has no table body."""
+
+        try:
+            return cls(read_chart(path), attribute)
+        except ValueError:
+            return None
+
+    def _pieces(self, start, end):
+        pieces = []
+        if self.title:
+            while (found := self.data.find(self.title, start, end)) >= 0:
+                pieces.append(self.view[start:found])
+                start = found + len(self.title)
+        pieces.append(self.view[start:end])
+        return pieces
+
+    def parts(self, keys, title=None):
+        """Return the parts of a chart with the rows for keys (in that order) and a new title."""
+
+        title = self.title if title is None else title.encode('utf-8')
+        parts = []
+        for pieces, rows in ((self.head, [self.rows[key] for key in keys if key in self.rows]),
+                             (self.tail, [])):
+            for i, piece in enumerate(pieces):
+                if i:
+                    parts.append(title)
+                parts.append(piece)
+            parts.extend(rows)
+        return parts
+
+
+class Grouping:
+    """How one kind of table chart is split: its sources, row groups, titles and output names."""
+
+    def __init__(self, name, chart_type, directory, attribute, groups, title_from, title_to, output,
+                 skip_empty=False):
+        self.name = name
+        self.chart_type = chart_type
+        self.directory = directory
+        self.attribute = attribute
+        self.groups = groups
+        self.title_from = title_from
+        self.title_to = title_to
+        self.output = output
+        self.skip_empty = skip_empty
+
+    def title(self, original, group):
+        """Return the title of a group's chart."""
+
+        group_title = self.title_to.format(group=group, Group=str(group).capitalize())
+        return original.replace(self.title_from, group_title)
+
+    def sources(self):
+        """Return the unsplit source charts of this kind."""
+
+        fields = {'group': None} if self.attribute == 'sector' else {'actors': 'all'}
+        return select_charts(self.chart_type, directory=self.directory, **fields)
+
+    def with_groups(self, groups):
+        """Return a copy of this grouping with other row groups."""
+
+        return Grouping(self.name, self.chart_type, self.directory, self.attribute, groups,
+                        self.title_from, self.title_to, self.output, self.skip_empty)
+
+
+ACTOR_GROUPS = {'required': REQUIRED_ACTORS, 'optional': OPTIONAL_ACTORS}
+
+SPLITS = {
+    'vuln': Grouping('vuln', 'vuln_actors', 'Vuln_Charts', 'actor', ACTOR_GROUPS,
+                     'All Actors', '{Group} Actors', 'risk{risk}_vuln_actors_{group}_chart.html'),
+    'resp': Grouping('resp', 'resp_actors', 'Resp_Charts', 'actor', ACTOR_GROUPS,
+                     'All Actors', '{Group} Actors', 'risk{risk}_resp_actors_{group}_chart.html'),
+    'sector': Grouping('sector', 'sector_vulnerability', 'Sec_Charts', 'sector', SECTOR_GROUPS,
+                       'All Sectors', 'Sectors Group {group}', 'risk_{risk}_sector_vulnerability_group{group}.html',
+                       skip_empty=True),
+}
+
+
+def split_table(chart_file, grouping, risk):
+    """Write every group of one parsed table next to it; returns the files created."""
+
+    table = TableFile.read(chart_file, grouping.attribute)
+    if table is None:
+        print(f"Could not find tbody in {chart_file}")
+        return []
+
+    original_title = table.title.decode('utf-8')
+    created_files = []
+    for group, keys in grouping.groups.items():
+        if grouping.skip_empty and not any(key in table.rows for key in keys):
+            print(f"Warning: No {grouping.attribute}s found for group {group} in risk {risk}")
+            continue
+
+        output_file = Path(chart_file).parent / grouping.output.format(risk=risk, group=group)
+        write_chart(output_file, table.parts(keys, grouping.title(original_title, group)))
+        chart_metrics.wrote(output_file)
+        created_files.append(output_file)
+        print(f"Created: {output_file}")
+
+    return created_files
+
+
+def split_chart(chart_file, grouping):
+    """Split one source chart, returning the files created."""
+
+    fields = parse_chart_name(Path(chart_file).name)
+    if fields is None or fields['type'] != grouping.chart_type:
+        print(f"Could not extract risk number from {Path(chart_file).name}")
+        return []
+
+    print(f"\nProcessing {Path(chart_file).name}...")
+    return split_table(chart_file, grouping, fields['risk'])
+
+
+def _split_by_type(chart_file, groupings):
+    grouping = groupings[parse_chart_name(Path(chart_file).name)['type']]
+    return split_chart(chart_file, grouping)
+
+
+def split_charts(groupings, jobs=1):
+    """Split the source charts of every grouping in one job pool; returns the files created."""
+
+    chart_files = [chart_file for grouping in groupings for chart_file in grouping.sources()]
+    by_type = {grouping.chart_type: grouping for grouping in groupings}
+    created = []
+    for files in run_jobs(partial(_split_by_type, groupings=by_type), chart_files, jobs):
+        created.extend(files or [])
+    return created
+
+
+def main(kinds=None, description=__doc__):
+    """Split the table charts of the given kinds (default: from the command line)."""
+
+    parser = argparse.ArgumentParser(description=description.strip().splitlines()[0])
+    if kinds is None:
+        parser.add_argument('kinds', nargs='*', help=f"kinds of chart to split: {', '.join(SPLITS)} (default: all)")
+    parser.add_argument('--groups', metavar='JSON', help='file with a JSON object of group name -> row keys')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    unknown = [kind for kind in getattr(args, 'kinds', []) if kind not in SPLITS]
+    if unknown:
+        parser.error(f"unknown kind {', '.join(unknown)}")
+    groupings = [SPLITS[kind] for kind in (kinds or args.kinds or SPLITS)]
+    if args.groups:
+        with open(args.groups, encoding='utf-8') as f:
+            groups = json.load(f)
+        groupings = [grouping.with_groups(groups) for grouping in groupings]
+
+    created = split_charts(groupings, args.jobs)
+
+    print(f"\n\nTotal files created: {len(created)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Static sanity checks for the inline chart script of every severity chart.
+
+Catches the mistakes earlier passes left behind and that used to show up only
+as blank charts in the browser:
+
+- duplicate const/let declarations in the same scope (e.g. two const canvas)
+- top-level const/let names used before their declaration (e.g. ctx)
+- event handlers registered before const chart = new Chart(...)
+
+Each chart's script is tokenized once with JsIndex. Exits non-zero if any
+problem is found.
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+from chart_catalog import severity_charts
+from chart_io import read_chart
+from chart_jobs import add_jobs_argument, run_jobs
+from js_blocks import OPENERS, chart_script_index
+
+# Keywords whose parenthesised head is followed by an ordinary block
+CONTROL_KEYWORDS = {'if', 'for', 'while', 'switch', 'catch', 'with'}
+
+
+def line_number(content, pos):
+    """Return the 1-based line number of an offset."""
+
+    return content.count('\n', 0, pos) + 1
+
+
+def declaration_scopes(index):
+    """Map each declaration position to the position of its enclosing bracket (-1 at top level)."""
+
+    scopes = {}
+    stack = []
+    events = index.events
+    i = 0
+    for _, _, pos, _ in sorted(index.declarations, key=lambda d: d[2]):
+        while i < len(events) and events[i][0] < pos:
+            event_pos, char, _ = events[i]
+            if char in OPENERS:
+                stack.append(event_pos)
+            elif char in ')]}' and stack:
+                stack.pop()
+            i += 1
+        scopes[pos] = stack[-1] if stack else -1
+    return scopes
+
+
+def last_code_char(source, pos, start):
+    """Return the offset of the last non-whitespace character before pos, or -1."""
+
+    pos -= 1
+    while pos >= start and source[pos].isspace():
+        pos -= 1
+    return pos if pos >= start else -1
+
+
+def word_before(source, pos, start):
+    """Return the identifier ending just before pos (ignoring whitespace)."""
+
+    end = last_code_char(source, pos, start) + 1
+    begin = end
+    while begin > start and (source[begin - 1].isalnum() or source[begin - 1] in '_$'):
+        begin -= 1
+    return source[begin:end]
+
+
+def deferred_ranges(index):
+    """Return (start, end) spans of function bodies, which run later rather than in order.
+
+    A body is a brace opened right after '=>' or after the parameter list of
+    a function or method (a ')' whose '(' doesn't follow if/for/while/...).
+    Parameter lists are included, since their names shadow outer ones.
+    """
+
+    source = index.source
+    ranges = []
+    stack = []
+    paren_openers = {}
+    for pos, char, _ in index.events:
+        if char in OPENERS:
+            stack.append(pos)
+            continue
+        if char == ';' or not stack:
+            continue
+        open_pos = stack.pop()
+        if char == ')':
+            paren_openers[pos] = open_pos
+        elif char == '}':
+            before = last_code_char(source, open_pos, index.start)
+            if before > index.start and source[before - 1:before + 1] == '=>':
+                before = last_code_char(source, before - 1, index.start)
+            elif not (before in paren_openers and
+                      word_before(source, paren_openers[before], index.start) not in CONTROL_KEYWORDS):
+                continue
+            ranges.append((open_pos, pos))
+            # The parameter list declares its own names
+            if before in paren_openers:
+                ranges.append((paren_openers[before], before + 1))
+    return sorted(ranges)
+
+
+def in_deferred_code(index, ranges, pos):
+    """True if pos is inside a function body or an arrow function's expression body."""
+
+    if any(start < pos < end for start, end in ranges):
+        return True
+
+    # Arrow function with an expression body: '=>' earlier in the same statement
+    statement_start = max(index.source.rfind(';', index.start, pos), index.start)
+    arrow = index.source.find('=>', statement_start, pos)
+    while arrow != -1:
+        if index.is_code(arrow):
+            return True
+        arrow = index.source.find('=>', arrow + 2, pos)
+    return False
+
+
+def code_matches(index, pattern, end):
+    """Yield pattern matches in the code before end, skipping strings, comments and data."""
+
+    pos = index.start
+    for span_start, span_end in index.non_code:
+        if span_start >= end:
+            break
+        if span_start > pos:
+            yield from pattern.finditer(index.source, pos, span_start)
+        pos = max(pos, span_end)
+    if pos < end:
+        yield from pattern.finditer(index.source, pos, end)
+
+
+def check_content(content):
+    """Return (offset, message) problems found in a chart's script."""
+
+    index = chart_script_index(content)
+    if index is None:
+        return [(0, "no inline script with new Chart(")]
+
+    source = content
+    problems = []
+
+    # Duplicate const/let in the same scope
+    scopes = declaration_scopes(index)
+    seen = {}
+    for keyword, name, pos, _ in sorted(index.declarations, key=lambda d: d[2]):
+        key = (scopes[pos], name)
+        if key in seen:
+            first_keyword, first_pos = seen[key]
+            if 'var' not in (keyword, first_keyword):
+                problems.append((pos, f"duplicate {keyword} {name} in the same scope "
+                                      f"(first declared at line {line_number(content, first_pos)})"))
+        else:
+            seen[key] = (keyword, pos)
+
+    # Top-level const/let used before declaration
+    top_level = {}
+    for keyword, name, pos, depth in index.declarations:
+        if depth == 0 and keyword != 'var' and name not in top_level:
+            top_level[name] = pos
+    if top_level:
+        ranges = deferred_ranges(index)
+        names = '|'.join(re.escape(name) for name in sorted(top_level, key=len, reverse=True))
+        reference_re = re.compile(rf'(?<![\w$.])(?:{names})(?![\w$])')
+        reported = set()
+        for match in code_matches(index, reference_re, max(top_level.values())):
+            name = match.group()
+            declared = top_level[name]
+            if match.start() >= declared or name in reported:
+                continue
+            # Object literal keys such as { chart: ... }
+            after = source[match.end():match.end() + 20].lstrip()
+            before = source[max(index.start, match.start() - 20):match.start()].rstrip()
+            if after.startswith(':') and before.endswith(('{', ',')):
+                continue
+            # Single arrow function parameter such as expertData => ...
+            if after.startswith('=>'):
+                continue
+            if in_deferred_code(index, ranges, match.start()):
+                continue
+            reported.add(name)
+            problems.append((match.start(), f"{name} used before its declaration "
+                                            f"at line {line_number(content, declared)}"))
+
+    # Event handlers registered before the chart exists
+    chart = next((pos for _, name, pos, depth in index.declarations
+                  if name == 'chart' and depth == 0), None)
+    if chart is not None:
+        for target, event, start, _ in index.event_handler_spans():
+            if start < chart and index.depth_at(start) == 0:
+                problems.append((start, f"{target} {event} handler registered before chart "
+                                        f"creation at line {line_number(content, chart)}"))
+
+    return [(line_number(content, pos), message) for pos, message in sorted(problems)]
+
+
+def check_chart(chart_file):
+    """Check one chart and print its problems. Returns the problem count."""
+
+    content = read_chart(chart_file)
+
+    problems = check_content(content)
+    for line, message in problems:
+        print(f"{chart_file.name}:{line}: {message}")
+    return len(problems)
+
+
+def main():
+    """Check every severity chart's script."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('charts', nargs='*', help='charts to check (default: all severity charts)')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    if args.charts:
+        all_charts = [Path(name) for name in args.charts]
+    else:
+        all_charts = severity_charts()
+
+    if not all_charts:
+        print("No severity charts found!")
+        return
+
+    results = run_jobs(check_chart, all_charts, args.jobs)
+
+    problem_count = sum(count for count in results if count)
+    failed_count = sum(1 for count in results if count is None)
+    bad_charts = sum(1 for count in results if count)
+
+    print(f"\nChecked {len(all_charts)} charts: {problem_count} problems in {bad_charts} charts"
+          + (f", {failed_count} could not be checked" if failed_count else ""))
+    if problem_count or failed_count:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Check the registered postcondition probes against their transforms.
+
+run_pipeline.py and the fix scripts skip a transform when its probe holds,
+and report files where it still fails after the run, so a probe has to say
+exactly whether transform_content would change a chart. For every chart each
+transform targets, this runs the transform in memory (nothing is written)
+and reports:
+
+- probes that hold although the transform would still bring the chart to
+  another state (one a second call leaves as it is)
+- probes that fail on the output of a transform that changed the chart, so
+  every run would apply it again
+
+Exits non-zero if any mismatch is found.
+
+    python check_probes.py
+    python check_probes.py fix_layout_optimization revert_harm_labels -j 0
+"""
+
+import argparse
+import importlib
+import sys
+from functools import partial
+
+from chart_anchors import AnchorIndex
+from chart_io import read_chart
+from chart_jobs import add_jobs_argument, run_jobs
+from transform_registry import REGISTRY, batch_files, get_transform
+
+
+def check_chart(names, chart_file):
+    """Check the named transforms' probes on one chart. Returns the mismatch count."""
+
+    content = read_chart(chart_file)
+    index = AnchorIndex(content)
+    mismatches = 0
+    for name in names:
+        transform = REGISTRY[name]
+        transform_content = importlib.import_module(name).transform_content
+        result = transform_content(content, chart_file)
+        if result is None:
+            continue
+        # Some older scripts add their code again on every call; for those the
+        # probe is what stops that, so only a move to a stable state counts
+        if (transform.probe(content, chart_file, index) and result != content and
+                transform_content(result, chart_file) == result):
+            print(f"{chart_file.name}: {name} probe holds but the transform changes the chart")
+            mismatches += 1
+        # A no-op transform just didn't find its pattern; the pipeline reports that
+        if result != content and not transform.probe(result, chart_file, AnchorIndex(result)):
+            print(f"{chart_file.name}: {name} probe fails on the transform's output")
+            mismatches += 1
+    return mismatches
+
+
+def main():
+    """Check the probes of the selected (default: all) transforms."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('transforms', nargs='*', help='transforms to check (default: all)')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    transforms = [get_transform(name) for name in args.transforms] or list(REGISTRY.values())
+
+    batches = batch_files(transforms)
+    if not batches:
+        print("No target charts found!")
+        return
+
+    results = []
+    for names, files in batches:
+        results += run_jobs(partial(check_chart, names), files, args.jobs)
+
+    mismatch_count = sum(count for count in results if count)
+    failed_count = sum(1 for count in results if count is None)
+
+    print(f"\nChecked {len(transforms)} probes on {len(results)} charts: {mismatch_count} mismatches"
+          + (f", {failed_count} charts could not be checked" if failed_count else ""))
+    if mismatch_count or failed_count:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
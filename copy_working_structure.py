@@ -3,17 +3,20 @@
 Copy the working structure from risk1_bau_chart_updated.html to all other severity charts.
 """
 
+from functools import partial
 from pathlib import Path
 import re
 
+from chart_catalog import severity_charts
+from chart_io import read_chart, write_chart
+from chart_jobs import parse_jobs, run_jobs
+
 def copy_structure(source_file, target_file):
     """Copy the script structure from source to target."""
 
-    with open(source_file, 'r', encoding='utf-8') as f:
-        source_content = f.read()
+    source_content = read_chart(source_file)
 
-    with open(target_file, 'r', encoding='utf-8') as f:
-        target_content = f.read()
+    target_content = read_chart(target_file)
 
     # Extract the key parts from source:
     # 1. The section from "const ctx = " to just before "const chart = new Chart"
@@ -35,8 +38,7 @@ def copy_structure(source_file, target_file):
 
     new_content = re.sub(target_pattern, source_structure + r'\2', target_content, flags=re.DOTALL)
 
-    with open(target_file, 'w', encoding='utf-8') as f:
-        f.write(new_content)
+    write_chart(target_file, new_content)
 
     return True
 
@@ -44,16 +46,15 @@ def copy_structure(source_file, target_file):
 def main():
     """Process all severity chart files."""
 
+    jobs = parse_jobs(__doc__)
+
     source = Path('risk1_bau_chart_updated.html')
     if not source.exists():
         print("ERROR: Source file risk1_bau_chart_updated.html not found!")
         return
 
-    # Find all BAU and PM severity charts (exclude the source file and the updated file)
-    bau_charts = [f for f in Path('.').glob('risk*_bau_chart.html') if f.name != 'risk1_bau_chart_updated.html']
-    pm_charts = list(Path('.').glob('risk*_pm_chart.html'))
-
-    all_charts = sorted(bau_charts + pm_charts)
+    # Find all BAU and PM severity charts (the source file is catalogued as an exemplar)
+    all_charts = sorted(severity_charts())
 
     if not all_charts:
         print("No severity charts found!")
@@ -62,9 +63,11 @@ def main():
     print(f"Found {len(all_charts)} severity charts to update")
     print(f"Copying structure from {source.name}...\n")
 
+    results = run_jobs(partial(copy_structure, source), all_charts, jobs)
+
     success_count = 0
-    for chart_file in all_charts:
-        if copy_structure(source, chart_file):
+    for chart_file, success in zip(all_charts, results):
+        if success:
             print(f"Updated: {chart_file.name}")
             success_count += 1
         else:
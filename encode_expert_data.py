@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Store the expertData of the severity charts by column.
+
+The charts embed expertData as pretty-printed JSON, one object per expert
+and one {"sev", "prob"} object per severity, which makes up most of each
+file. This rewrites it as an array of expert ids and an N x 5 matrix of
+probabilities, expanded back to the same [{id, data: [{sev, prob}]}]
+array by a small decoder in the expertData declaration itself, so the
+chart code and exemplar_sync.py (which leaves decl:expertData alone) see
+no difference.
+
+With --binary the matrix is a base64 typed array instead: the probabilities
+scaled to integers (x1, x10, x100 or x1000, whichever is exact) in a
+Uint8Array, or a Uint16Array if they do not fit. Dividing the integers back
+gives the very same numbers; a matrix no scale makes exact keeps the JSON
+form. Charts whose data does not fit the columns (experts with other
+severities) are left as they are.
+
+    python encode_expert_data.py
+    python encode_expert_data.py --binary -j 0
+"""
+
+import argparse
+import base64
+import json
+import struct
+from functools import partial
+
+from chart_catalog import severity_charts
+from chart_io import read_chart, write_chart
+from chart_jobs import add_jobs_argument, run_jobs
+from js_blocks import chart_script_index
+from transform_registry import already_applied
+
+SEVERITIES = [1, 2, 3, 4, 5]
+
+# Scales tried for the binary form, and the typed arrays by largest value
+SCALES = (1, 10, 100, 1000)
+TYPED_ARRAYS = (('uint8', 'B', 0xFF), ('uint16', 'H', 0xFFFF))
+
+ENCODED_PREFIX = 'const expertData = (function (columns) {'
+
+DECODER = ENCODED_PREFIX + '''
+            // expertData by column: ids, sev and an ids x sev matrix of probabilities
+            let prob = columns.prob;
+            if (typeof prob === 'string') {
+                const bytes = Uint8Array.from(atob(prob), c => c.charCodeAt(0));
+                const values = columns.type === 'uint16' ? new Uint16Array(bytes.buffer) : bytes;
+                const width = columns.sev.length;
+                prob = columns.ids.map((_, i) =>
+                    Array.from(values.subarray(i * width, (i + 1) * width), value => value / columns.scale));
+            }
+            return columns.ids.map((id, i) => ({
+                id: id,
+                data: columns.sev.map((sev, j) => ({sev: sev, prob: prob[i][j]}))
+            }));
+        })(%s);'''
+
+
+def expert_data_span(content):
+    """Return (start, end) of the expertData declaration in a chart, or None."""
+
+    index = chart_script_index(content)
+    if index is None:
+        return None
+    return index.declaration_span('expertData')
+
+
+def is_encoded(content):
+    """True if a chart's expertData is already stored by column."""
+
+    return ENCODED_PREFIX in content
+
+
+def binary_matrix(matrix):
+    """Return (type, scale, base64) of a probability matrix, or None if no typed array holds it exactly."""
+
+    values = [value for row in matrix for value in row]
+    for scale in SCALES:
+        scaled = [round(value * scale) for value in values]
+        if all(count / scale == value for count, value in zip(scaled, values)) and min(scaled, default=0) >= 0:
+            break
+    else:
+        return None
+    for array_type, code, largest in TYPED_ARRAYS:
+        if max(scaled, default=0) <= largest:
+            data = struct.pack(f'<{len(scaled)}{code}', *scaled)
+            return array_type, scale, base64.b64encode(data).decode('ascii')
+    return None
+
+
+def encode_columns(entries, binary=False):
+    """Return the columns of expertData entries, or None if they do not fit the columnar form."""
+
+    if any([point.get('sev') for point in entry.get('data', [])] != SEVERITIES or set(entry) != {'id', 'data'}
+           for entry in entries):
+        return None
+    matrix = [[point['prob'] for point in entry['data']] for entry in entries]
+    # Whole numbers are written without the .0 (the same value in JavaScript)
+    matrix = [[int(prob) if isinstance(prob, float) and prob.is_integer() else prob for prob in row] for row in matrix]
+    columns = {'ids': [entry['id'] for entry in entries], 'sev': SEVERITIES}
+    encoded = binary_matrix(matrix) if binary else None
+    if encoded:
+        columns['type'], columns['scale'], columns['prob'] = encoded
+    else:
+        columns['prob'] = matrix
+    return columns
+
+
+def decode_columns(columns):
+    """Return the expertData entries the chart's decoder builds from columns."""
+
+    prob = columns['prob']
+    if isinstance(prob, str):
+        code = {name: code for name, code, _ in TYPED_ARRAYS}[columns['type']]
+        data = base64.b64decode(prob)
+        values = struct.unpack(f'<{len(data) // struct.calcsize(code)}{code}', data)
+        width = len(columns['sev'])
+        prob = [[value / columns['scale'] for value in values[i * width:(i + 1) * width]]
+                for i in range(len(columns['ids']))]
+    return [{'id': expert_id, 'data': [{'sev': sev, 'prob': value} for sev, value in zip(columns['sev'], row)]}
+            for expert_id, row in zip(columns['ids'], prob)]
+
+
+def columns_literal(columns):
+    """Format columns for the chart: one expert per line of ids and of the matrix."""
+
+    def line(value):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+    parts = [f'"ids":{line(columns["ids"])}', f'"sev":{line(columns["sev"])}']
+    if isinstance(columns['prob'], str):
+        parts += [f'"type":{line(columns["type"])}', f'"scale":{columns["scale"]}', f'"prob":{line(columns["prob"])}']
+    else:
+        rows = ',\n'.join(' ' * 12 + line(row) for row in columns['prob'])
+        parts.append(f'"prob":[\n{rows}\n        ]')
+    return '{' + ',\n        '.join(parts) + '}'
+
+
+def expert_data_declaration(entries, binary=False):
+    """Return the columnar expertData declaration of entries, or None if they do not fit it."""
+
+    columns = encode_columns(entries, binary)
+    if columns is None:
+        return None
+    return DECODER % columns_literal(columns)
+
+
+def declaration_columns(declaration, binary=False):
+    """Return the columns of a JSON expertData declaration, or None if it does not fit the columnar form.
+
+    Raises ValueError if the declaration cannot be parsed.
+    """
+
+    entries = json.loads(declaration[declaration.index('=') + 1:].rstrip().rstrip(';'))
+    columns = encode_columns(entries, binary)
+    if columns is None or decode_columns(columns) != entries:
+        return None
+    return columns
+
+
+def transform_content(content, file_path, binary=False):
+    """Store the chart's expertData by column. Returns None if the file cannot be patched.
+
+    expertData that does not fit the columnar form is left as it is.
+    """
+
+    span = expert_data_span(content)
+    if span is None:
+        print(f"ERROR: No expertData in {file_path.name}")
+        return None
+    start, end = span
+    declaration = content[start:end]
+    if is_encoded(declaration):
+        return content
+
+    try:
+        columns = declaration_columns(declaration, binary)
+    except ValueError as e:
+        print(f"ERROR: Could not parse expertData in {file_path.name}: {e}")
+        return None
+    if columns is None:
+        print(f"Warning: expertData of {file_path.name} does not fit the columnar form, left as it is")
+        return content
+
+    return content[:start] + DECODER % columns_literal(columns) + content[end:]
+
+
+def encode_chart(chart_file, binary=False):
+    """Store one chart's expertData by column; returns (bytes before, bytes after)."""
+
+    content = read_chart(chart_file)
+
+    # Nothing to do if the file is already in the target state
+    if already_applied('encode_expert_data', content, chart_file):
+        print(f"Skipped (already applied): {chart_file.name}")
+        return None
+
+    new_content = transform_content(content, chart_file, binary)
+    # Nothing changed: leave the file and its mtime alone
+    if new_content is None or new_content == content:
+        return None
+
+    write_chart(chart_file, new_content)
+    before, after = len(content.encode('utf-8')), len(new_content.encode('utf-8'))
+    print(f"Updated: {chart_file.name} ({before / 1024:.0f} KB -> {after / 1024:.0f} KB)")
+    return before, after
+
+
+def main():
+    """Process all severity chart files."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--binary', action='store_true', help='store the probabilities as a base64 typed array')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    all_charts = severity_charts()
+    if not all_charts:
+        print("No severity charts found!")
+        return
+
+    print(f"Found {len(all_charts)} severity charts\n")
+
+    results = [result for result in run_jobs(partial(encode_chart, binary=args.binary), all_charts, args.jobs)
+               if result is not None]
+    before = sum(size for size, _ in results)
+    after = sum(size for _, size in results)
+
+    print(f"\nCompleted! Encoded {len(results)} charts: {before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Synchronise severity charts with an exemplar chart, one structural segment at a time.
+
+The exemplar is compiled once into keyed segments: every CSS rule in the
+<style> block (keyed by selector) and every top-level statement of the chart
+script (keyed by declared name, function name, event listener or first line),
+each with its leading comments. Each chart is segmented the same way and only
+segments whose text differs from the exemplar are replaced, so the rest of
+the file, including data regions such as expertData and the banner, is left
+byte for byte as it was. Segments the exemplar has but a chart lacks, or the
+other way round, are reported as drift rather than guessed at.
+
+    python exemplar_sync.py --report             # drift report only
+    python exemplar_sync.py                      # apply risk1_bau_chart_updated.html
+    python exemplar_sync.py --exemplar exemplar_sev_chart.html -j 0
+"""
+
+import argparse
+import re
+from collections import Counter
+from functools import partial
+from pathlib import Path
+
+from chart_anchors import apply_edits
+from chart_catalog import severity_charts
+from chart_io import read_chart, write_chart
+from chart_jobs import add_jobs_argument, run_jobs
+from js_blocks import chart_script_index
+
+DEFAULT_EXEMPLARS = ['risk1_bau_chart_updated.html', 'exemplar_sev_chart.html']
+
+# Per-chart data that must never be copied from the exemplar
+DATA_KEYS = {'decl:expertData', 'decl:exceedanceData'}
+
+# Statements that end at their closing brace rather than a semicolon
+BLOCK_STATEMENT_RE = re.compile(r'(?:async\s+)?function\b|class\b|if\b|for\b|while\b|try\b|switch\b')
+BLOCK_CONTINUATION_RE = re.compile(r'\s*(?:else|catch|finally)\b')
+
+STATEMENT_KEY_PATTERNS = [
+    (re.compile(r'(?:const|let|var)\s+([\w$]+)'), 'decl:{}'),
+    (re.compile(r'(?:async\s+)?function\s+([\w$]+)'), 'function:{}'),
+    (re.compile(r'([\w$.]+)\.addEventListener\(\s*[\'"](\w+)[\'"]'), 'listener:{}:{}'),
+]
+
+CSS_RULE_RE = re.compile(r'[^{}]+\{')
+
+WHITESPACE_RE = re.compile(r'\s*')
+
+
+def skip_comments(content, pos, end):
+    """Return the first position at or after pos that is not whitespace or a comment."""
+
+    while pos < end:
+        pos = WHITESPACE_RE.match(content, pos, end).end()
+        if content.startswith('/*', pos):
+            close = content.find('*/', pos + 2, end)
+            pos = end if close == -1 else close + 2
+        elif content.startswith('//', pos):
+            newline = content.find('\n', pos, end)
+            pos = end if newline == -1 else newline + 1
+        else:
+            break
+    return pos
+
+
+def leading_start(content, pos, end):
+    """Return the first non-whitespace position at or after pos."""
+
+    return WHITESPACE_RE.match(content, pos, end).end()
+
+
+def css_segments(content):
+    """Return (key, start, end) for every rule in the first <style> block."""
+
+    style = re.search(r'<style>(.*?)</style>', content, re.DOTALL)
+    if style is None:
+        return []
+
+    segments = []
+    pos, end = style.start(1), style.end(1)
+    while True:
+        start = leading_start(content, pos, end)
+        selector_start = skip_comments(content, start, end)
+        match = CSS_RULE_RE.match(content, selector_start, end)
+        if match is None:
+            break
+
+        # Find the matching close brace; @media blocks nest one level
+        depth = 0
+        i = match.end() - 1
+        while i < end:
+            char = content[i]
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+            i += 1
+        if i >= end:
+            break
+
+        selector = ' '.join(content[selector_start:match.end() - 1].split())
+        segments.append((f'css:{selector}', start, i + 1))
+        pos = i + 1
+    return segments
+
+
+def statement_key(content, pos):
+    """Return the key describing the statement whose code starts at pos."""
+
+    for pattern, template in STATEMENT_KEY_PATTERNS:
+        match = pattern.match(content, pos)
+        if match is not None:
+            return template.format(*match.groups())
+    line_end = content.find('\n', pos)
+    return 'stmt:' + content[pos:line_end if line_end != -1 else None].strip()[:60]
+
+
+def script_segments(content):
+    """Return (key, start, end) for every top-level statement of the chart script."""
+
+    index = chart_script_index(content)
+    if index is None:
+        return []
+
+    # Closing braces that bring the script back to the top level
+    top_level_closes = [pos for pos, char, depth in index.events if char == '}' and depth == 0]
+
+    segments = []
+    pos = index.start
+    close_i = 0
+    while True:
+        start = leading_start(content, pos, index.end)
+        code = skip_comments(content, start, index.end)
+        if code >= index.end:
+            break
+
+        end = index.statement_end(code, 0)
+        if BLOCK_STATEMENT_RE.match(content, code):
+            # function/if/for/...: ends at the first top-level close brace
+            # not followed by else/catch/finally
+            while close_i < len(top_level_closes) and top_level_closes[close_i] < code:
+                close_i += 1
+            while close_i < len(top_level_closes):
+                close = top_level_closes[close_i]
+                close_i += 1
+                if not BLOCK_CONTINUATION_RE.match(content, close + 1):
+                    end = min(end, close + 1)
+                    break
+
+        if end <= code:
+            break
+        segments.append((statement_key(content, code), start, end))
+        pos = end
+    return segments
+
+
+def segment_chart(content):
+    """Return {key: (start, end)} for the CSS rules and script statements.
+
+    Repeated keys get a #2, #3, ... suffix in document order.
+    """
+
+    segments = {}
+    seen = Counter()
+    for key, start, end in css_segments(content) + script_segments(content):
+        seen[key] += 1
+        if seen[key] > 1:
+            key = f'{key}#{seen[key]}'
+        segments[key] = (start, end)
+    return segments
+
+
+class Exemplar:
+    """An exemplar chart compiled into its keyed segment texts."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.content = read_chart(self.path)
+        self.segments = {
+            key: self.content[start:end]
+            for key, (start, end) in segment_chart(self.content).items()
+            if key.split('#')[0] not in DATA_KEYS
+        }
+
+    def diff(self, content):
+        """Return (edits, drifted_keys, missing_keys, extra_keys) for a chart."""
+
+        segments = segment_chart(content)
+        edits = []
+        drifted = []
+        for key, (start, end) in segments.items():
+            text = self.segments.get(key)
+            if text is not None and content[start:end] != text:
+                edits.append((start, end, text))
+                drifted.append(key)
+
+        missing = [key for key in self.segments if key not in segments]
+        extra = [key for key in segments
+                 if key not in self.segments and key.split('#')[0] not in DATA_KEYS]
+        return edits, drifted, missing, extra
+
+
+def sync_chart(exemplar, chart_file, report_only=False):
+    """Replace a chart's drifted segments with the exemplar's.
+
+    Returns (drifted_keys, missing_keys, extra_keys).
+    """
+
+    content = read_chart(chart_file)
+
+    edits, drifted, missing, extra = exemplar.diff(content)
+
+    if edits and not report_only:
+        write_chart(chart_file, apply_edits(content, edits))
+        print(f"Updated: {chart_file.name} ({len(drifted)} segments)")
+    elif drifted:
+        print(f"Drifted: {chart_file.name} ({len(drifted)} segments)")
+
+    return drifted, missing, extra
+
+
+def print_report(results, total):
+    """Print how many charts drift in each segment."""
+
+    drift = Counter()
+    missing = Counter()
+    extra = Counter()
+    for drifted_keys, missing_keys, extra_keys in results:
+        drift.update(drifted_keys)
+        missing.update(missing_keys)
+        extra.update(extra_keys)
+
+    for title, counts in (("Differs from exemplar", drift),
+                          ("Missing from chart", missing),
+                          ("Not in exemplar", extra)):
+        if not counts:
+            continue
+        print(f"\n{title}:")
+        for key, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+            print(f"  {count:3d}/{total}  {key}")
+
+
+def main():
+    """Report or apply exemplar drift for all severity charts."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--exemplar', help='exemplar chart (default: first of %s found)'
+                        % ', '.join(DEFAULT_EXEMPLARS))
+    parser.add_argument('--report', action='store_true', help='report drift without writing')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    if args.exemplar:
+        exemplar_file = Path(args.exemplar)
+    else:
+        exemplar_file = next((Path(name) for name in DEFAULT_EXEMPLARS if Path(name).exists()),
+                             Path(DEFAULT_EXEMPLARS[-1]))
+    if not exemplar_file.exists():
+        print(f"ERROR: Exemplar {exemplar_file} not found!")
+        return
+
+    exemplar = Exemplar(exemplar_file)
+
+    all_charts = sorted(f for f in severity_charts() if f.resolve() != exemplar_file.resolve())
+    if not all_charts:
+        print("No severity charts found!")
+        return
+
+    print(f"Found {len(all_charts)} severity charts")
+    print(f"Exemplar {exemplar_file.name}: {len(exemplar.segments)} segments\n")
+
+    results = [result for result in
+               run_jobs(partial(sync_chart, exemplar, report_only=args.report), all_charts, args.jobs)
+               if result is not None]
+
+    print_report(results, len(all_charts))
+
+    drifted_count = sum(1 for drifted, _, _ in results if drifted)
+    action = "drifted from" if args.report else "synchronised with"
+    print(f"\nCompleted! {drifted_count}/{len(all_charts)} charts {action} {exemplar_file.name}.")
+
+
+if __name__ == '__main__':
+    main()
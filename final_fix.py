@@ -8,15 +8,14 @@ Final fix: Apply the working structure from exemplar.
 5. Event handlers AFTER chart
 """
 
-from pathlib import Path
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 import re
 
-def fix_chart_file(file_path):
+def transform_content(content, file_path):
     """Fix a single chart file."""
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
     # Step 1: Remove any existing "const canvas = " line that comes before the DPI fix
     # This is the line that comes right before "const ctx"
     content = re.sub(
@@ -71,21 +70,22 @@ def fix_chart_file(file_path):
             content
         )
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
+
+
+def fix_chart_file(file_path):
+    """Fix a single chart file."""
 
-    print(f"Fixed: {file_path.name}")
+    update_chart('final_fix', transform_content, file_path, verb='Fixed')
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -94,8 +94,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Applying final fix...\n")
 
-    for chart_file in all_charts:
-        fix_chart_file(chart_file)
+    run_jobs(fix_chart_file, all_charts, jobs)
 
     print(f"\nCompleted!")
 
@@ -4,13 +4,17 @@ Final fix: Add ctx definition exactly where it should be, matching exemplar stru
 """
 
 import re
-from pathlib import Path
 
-def fix_blank_charts(file_path):
-    """Add ctx and DPI fix in exact exemplar structure."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from js_blocks import chart_script_index
+from transform_registry import update_chart
+
+# What must follow the medianValuesPlugin declaration for the DPI fix to go after it
+PLUGIN_FOLLOWER_RE = re.compile(r'\s*\n(\s*const chartCanvas|// Track|let hoveredExpertIndex)')
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Add ctx and DPI fix in exact exemplar structure."""
 
     # Find: const canvas = document.getElementById('severityChart');
     # followed by blank lines, and replace with the correct structure
@@ -38,31 +42,35 @@ def fix_blank_charts(file_path):
         ctx.scale(dpr, dpr);
 '''
 
-    # Pattern: end of medianValuesPlugin, before any // Track hover or chartCanvas references
-    # Look for the plugin closing followed by whitespace
-    plugin_pattern = r'(const medianValuesPlugin = \{[^}]*afterDatasetsDraw: \(chart\) => \{(?:[^{}]|\{[^{}]*\})*\}\s*\};)\s*\n(\s*const chartCanvas|// Track|let hoveredExpertIndex)'
-
     # Check if DPI fix is already there
     if '// Fix blurry canvas on high-DPI displays' not in content:
-        # Insert after the plugin
-        plugin_replacement = r'\1' + dpi_fix + '\n\2'
-        content = re.sub(plugin_pattern, plugin_replacement, content, flags=re.DOTALL)
+        # Locate the whole plugin declaration, however deeply its body nests
+        index = chart_script_index(content)
+        span = index.declaration_span('medianValuesPlugin') if index else None
+
+        if span is not None and 'afterDatasetsDraw: (chart) => {' in content[span[0]:span[1]]:
+            # Insert after the plugin, before any // Track hover or chartCanvas references
+            follower = PLUGIN_FOLLOWER_RE.match(content, span[1])
+            if follower:
+                content = (content[:span[1]] + dpi_fix + '\n' + follower.group(1) +
+                           content[follower.end():])
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def fix_blank_charts(file_path):
+    """Add ctx and DPI fix in exact exemplar structure."""
+
+    update_chart('fix_blank_charts_final', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -71,8 +79,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Adding ctx definition and DPI fix...\n")
 
-    for chart_file in all_charts:
-        fix_blank_charts(chart_file)
+    run_jobs(fix_blank_charts, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
@@ -4,13 +4,23 @@ Script to fix blurry canvas rendering and reduce harm label size.
 """
 
 import re
-from pathlib import Path
 
-def fix_blur_and_labels(file_path):
-    """Fix canvas blur and reduce harm label size."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
+
+# The DPI fix inserted before the chart by the earlier scripts
+OLD_DPI_FIX_RE = re.compile(
+    r'// Fix blurry canvas on high-DPI displays\s*const dpr = window\.devicePixelRatio[^}]+ctx\.scale\(dpr, dpr\);\s*',
+    re.DOTALL
+)
+
+# The resize-aware DPI handling goes before the first of these
+HIGH_DPI_ANCHORS = ('function updateChartData()', '// Update chart when mode changes')
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+
+def transform_content(content, file_path):
+    """Fix canvas blur and reduce harm label size."""
 
     # 1. Make harm labels much smaller
     content = re.sub(
@@ -28,12 +38,7 @@ def fix_blur_and_labels(file_path):
 
     # 3. Fix the DPI scaling - need to move it AFTER chart creation and use requestAnimationFrame
     # Remove the old DPI scaling code before chart creation
-    content = re.sub(
-        r'// Fix blurry canvas on high-DPI displays\s*const dpr = window\.devicePixelRatio[^}]+ctx\.scale\(dpr, dpr\);\s*',
-        '',
-        content,
-        flags=re.DOTALL
-    )
+    content = OLD_DPI_FIX_RE.sub('', content)
 
     # 4. Find where the chart is created and add proper high-DPI handling AFTER it
     if 'const chart = new Chart(ctx,' in content and 'window.addEventListener(\'resize\'' not in content:
@@ -86,32 +91,27 @@ def fix_blur_and_labels(file_path):
         # We'll insert after we see "const chart = new Chart" followed by the options closing
 
         # Simple approach: insert before the medianValuesPlugin definition or before updateChartData function
-        if 'function updateChartData()' in content:
-            content = content.replace(
-                'function updateChartData()',
-                high_dpi_fix + '\n\n        function updateChartData()'
-            )
-        elif '// Update chart when mode changes' in content:
-            content = content.replace(
-                '// Update chart when mode changes',
-                high_dpi_fix + '\n\n        // Update chart when mode changes'
-            )
+        for anchor in HIGH_DPI_ANCHORS:
+            if anchor in content:
+                content = content.replace(anchor, high_dpi_fix + '\n\n        ' + anchor)
+                break
+
+    return content
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
 
-    print(f"Updated: {file_path.name}")
+def fix_blur_and_labels(file_path):
+    """Fix canvas blur and reduce harm label size."""
+
+    update_chart('fix_blur_and_labels', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -120,8 +120,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Fixing canvas blur and reducing label size...\n")
 
-    for chart_file in all_charts:
-        fix_blur_and_labels(chart_file)
+    run_jobs(fix_blur_and_labels, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
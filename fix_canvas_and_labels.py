@@ -4,13 +4,13 @@ Script to fix canvas resolution for sharp rendering and wrap severity labels.
 """
 
 import re
-from pathlib import Path
 
-def fix_rendering_and_labels(file_path):
-    """Fix canvas rendering and make labels wrap at narrow widths."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Fix canvas rendering and make labels wrap at narrow widths."""
 
     # Fix severity label CSS to allow wrapping and prevent overlap
     severity_label_css = r'''        .severity-label {
@@ -74,21 +74,22 @@ def fix_rendering_and_labels(file_path):
     if style_close != -1 and '@media (max-width: 600px)' not in content:
         content = content[:style_close] + media_query + content[style_close:]
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def fix_rendering_and_labels(file_path):
+    """Fix canvas rendering and make labels wrap at narrow widths."""
+
+    update_chart('fix_canvas_and_labels', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -97,8 +98,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Fixing canvas rendering and label wrapping...\n")
 
-    for chart_file in all_charts:
-        fix_rendering_and_labels(chart_file)
+    run_jobs(fix_rendering_and_labels, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
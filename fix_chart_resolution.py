@@ -4,13 +4,13 @@ Script to properly fix Chart.js rendering resolution for sharp display in iframe
 """
 
 import re
-from pathlib import Path
 
-def fix_chart_resolution(file_path):
-    """Fix Chart.js to render at proper resolution for high-DPI displays."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Fix Chart.js to render at proper resolution for high-DPI displays."""
 
     # Find the Chart.js options section and add devicePixelRatio
     # We need to add it right after "options: {"
@@ -60,21 +60,22 @@ def fix_chart_resolution(file_path):
             flags=re.DOTALL
         )
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def fix_chart_resolution(file_path):
+    """Fix Chart.js to render at proper resolution for high-DPI displays."""
+
+    update_chart('fix_chart_resolution', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -83,8 +84,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Fixing Chart.js resolution for sharp rendering...\n")
 
-    for chart_file in all_charts:
-        fix_chart_resolution(chart_file)
+    run_jobs(fix_chart_resolution, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
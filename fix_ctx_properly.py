@@ -4,13 +4,13 @@ Properly fix the missing ctx by inserting after canvas definition.
 """
 
 import re
-from pathlib import Path
 
-def fix_ctx_properly(file_path):
-    """Insert ctx and DPI fix right after canvas is defined."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Insert ctx and DPI fix right after canvas is defined."""
 
     # DPI fix code to insert
     dpi_fix = """
@@ -33,21 +33,22 @@ def fix_ctx_properly(file_path):
 
     content = re.sub(pattern, replacement, content)
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def fix_ctx_properly(file_path):
+    """Insert ctx and DPI fix right after canvas is defined."""
+
+    update_chart('fix_ctx_properly', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -56,8 +57,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Properly inserting ctx and DPI fix...\n")
 
-    for chart_file in all_charts:
-        fix_ctx_properly(chart_file)
+    run_jobs(fix_ctx_properly, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
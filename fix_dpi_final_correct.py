@@ -4,13 +4,13 @@ Apply the EXACT structure from exemplar: ctx first, then DPI fix without redefin
 """
 
 import re
-from pathlib import Path
 
-def fix_dpi_correct(file_path):
-    """Fix DPI with correct structure from exemplar."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Fix DPI with correct structure from exemplar."""
 
     # The correct pattern from exemplar:
     # 1. const ctx = getContext
@@ -46,21 +46,22 @@ def fix_dpi_correct(file_path):
 
     content = re.sub(pattern, replacement, content, flags=re.DOTALL)
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def fix_dpi_correct(file_path):
+    """Fix DPI with correct structure from exemplar."""
+
+    update_chart('fix_dpi_final_correct', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -69,8 +70,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Applying correct DPI fix structure from exemplar...\n")
 
-    for chart_file in all_charts:
-        fix_dpi_correct(chart_file)
+    run_jobs(fix_dpi_correct, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
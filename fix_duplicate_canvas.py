@@ -4,14 +4,14 @@ Fix duplicate canvas declaration in DPI fix.
 Change 'const canvas' to just use the existing canvas variable.
 """
 
-from pathlib import Path
+from chart_catalog import severity_charts
+from chart_io import read_chart, write_chart
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import already_applied
 
-def fix_duplicate_canvas(file_path):
+def transform_content(content, file_path):
     """Fix duplicate canvas declaration."""
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
     # Replace the duplicate canvas declaration in DPI fix
     old_dpi_fix = '''        // Fix blurry canvas on high-DPI displays
         const dpr = window.devicePixelRatio || 1;
@@ -22,11 +22,25 @@ def fix_duplicate_canvas(file_path):
         const dpr = window.devicePixelRatio || 1;
         const rect = canvas.getBoundingClientRect();'''
 
-    if old_dpi_fix in content:
-        content = content.replace(old_dpi_fix, new_dpi_fix)
+    return content.replace(old_dpi_fix, new_dpi_fix)
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+
+def fix_duplicate_canvas(file_path):
+    """Fix duplicate canvas declaration."""
+
+    content = read_chart(file_path)
+
+    # Nothing to do if the file is already in the target state
+    if already_applied('fix_duplicate_canvas', content, file_path):
+        print(f"Skipped (already applied): {file_path.name}")
+        return
+
+    new_content = transform_content(content, file_path)
+
+    if new_content != content:
+        content = new_content
+
+        write_chart(file_path, content)
 
         print(f"Fixed: {file_path.name}")
     else:
@@ -36,11 +50,10 @@ def fix_duplicate_canvas(file_path):
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -49,8 +62,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Fixing duplicate canvas declarations...\n")
 
-    for chart_file in all_charts:
-        fix_duplicate_canvas(chart_file)
+    run_jobs(fix_duplicate_canvas, all_charts, jobs)
 
     print(f"\nCompleted!")
 
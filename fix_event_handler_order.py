@@ -4,14 +4,13 @@ Move mouse event handlers to AFTER chart creation.
 The handlers reference 'chart' so they must come after it's created.
 """
 
-from pathlib import Path
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 import re
 
-def fix_event_handler_order(file_path):
-    """Move event handlers after chart creation."""
-
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Move event handlers after chart creation. Returns None if an anchor is missing."""
 
     # Pattern to match the mouse event handlers section
     # From "// Add mouse move handler" to the closing of the mouseleave handler
@@ -20,8 +19,7 @@ def fix_event_handler_order(file_path):
     match = re.search(event_handlers_pattern, content, re.DOTALL)
 
     if not match:
-        print(f"ERROR: Could not find event handlers in {file_path.name}")
-        return
+        return None
 
     event_handlers = match.group(1)
 
@@ -36,26 +34,27 @@ def fix_event_handler_order(file_path):
     insert_pattern = r'(        // Update mode buttons|        document\.getElementById\(\'exactBtn\'\)\.addEventListener)'
 
     match = re.search(insert_pattern, content)
-    if match:
-        insert_pos = match.start()
-        content = content[:insert_pos] + event_handlers + content[insert_pos:]
+    if not match:
+        return None
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+    insert_pos = match.start()
+    return content[:insert_pos] + event_handlers + content[insert_pos:]
 
-        print(f"Fixed: {file_path.name}")
-    else:
-        print(f"ERROR: Could not find insertion point in {file_path.name}")
+
+def fix_event_handler_order(file_path):
+    """Move event handlers after chart creation."""
+
+    update_chart('fix_event_handler_order', transform_content, file_path,
+                 error="Could not find event handlers or insertion point", verb='Fixed')
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -64,8 +63,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Moving event handlers after chart creation...\n")
 
-    for chart_file in all_charts:
-        fix_event_handler_order(chart_file)
+    run_jobs(fix_event_handler_order, all_charts, jobs)
 
     print(f"\nCompleted!")
 
@@ -4,13 +4,13 @@ Script to fix blurry canvas in Qualtrics iframes by ensuring proper DPI from the
 """
 
 import re
-from pathlib import Path
 
-def fix_iframe_blur(file_path):
-    """Fix canvas blur in Qualtrics iframes with proper initial DPI handling."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Fix canvas blur in Qualtrics iframes with proper initial DPI handling."""
 
     # Remove any existing high-DPI fix code
     content = re.sub(
@@ -91,21 +91,22 @@ def fix_iframe_blur(file_path):
                 resize_handler + '\n\n        // Update chart when mode changes'
             )
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def fix_iframe_blur(file_path):
+    """Fix canvas blur in Qualtrics iframes with proper initial DPI handling."""
+
+    update_chart('fix_iframe_blur_final', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -114,8 +115,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Fixing canvas blur for Qualtrics iframes...\n")
 
-    for chart_file in all_charts:
-        fix_iframe_blur(chart_file)
+    run_jobs(fix_iframe_blur, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
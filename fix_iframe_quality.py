@@ -4,13 +4,13 @@ Script to fix blurry rendering of severity charts in iframes.
 """
 
 import re
-from pathlib import Path
 
-def fix_iframe_rendering(file_path):
-    """Add CSS to ensure sharp rendering in iframes."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Add CSS to ensure sharp rendering in iframes."""
 
     # Find the body CSS and add rendering optimizations
     body_pattern = r'(body\s*\{[^}]*)\}'
@@ -50,21 +50,22 @@ def fix_iframe_rendering(file_path):
                 content
             )
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def fix_iframe_rendering(file_path):
+    """Add CSS to ensure sharp rendering in iframes."""
+
+    update_chart('fix_iframe_quality', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -73,8 +74,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Adding sharp rendering CSS for iframes...\n")
 
-    for chart_file in all_charts:
-        fix_iframe_rendering(chart_file)
+    run_jobs(fix_iframe_rendering, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
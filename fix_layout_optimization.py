@@ -4,56 +4,24 @@ Script to fix label positioning, optimize white space, and make legends more com
 """
 
 import re
-from pathlib import Path
 
-def fix_layout(file_path):
-    """Optimize the layout with better label positioning and compact legends."""
+from chart_anchors import AnchorIndex, apply_edits, css_property_edits
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+MARGIN_TOP_RE = re.compile(r'margin-top:\s*(-?\d+px;)')
+MARGIN_BOTTOM_RE = re.compile(r'margin-bottom:\s*(\d+px;)')
 
-    # Fix severity labels positioning - align them better with chart columns
-    # Remove the previous positioning and replace with better values
-    severity_label_positions = r'''        .severity-label:nth-child(1) { left: 10%; transform: translateX(-50%); }
+# Harm label positions, put back in front of the narrow-screen media query
+SEVERITY_LABEL_POSITIONS = r'''        .severity-label:nth-child(1) { left: 10%; transform: translateX(-50%); }
         .severity-label:nth-child(2) { left: 30%; transform: translateX(-50%); }
         .severity-label:nth-child(3) { left: 50%; transform: translateX(-50%); }
         .severity-label:nth-child(4) { left: 70%; transform: translateX(-50%); }
         .severity-label:nth-child(5) { left: 90%; transform: translateX(-50%); }'''
 
-    # Replace all severity-label:nth-child positioning
-    content = re.sub(
-        r'\.severity-label:nth-child\(1\)[^}]*\}',
-        '',
-        content
-    )
-    content = re.sub(
-        r'\.severity-label:nth-child\(2\)[^}]*\}',
-        '',
-        content
-    )
-    content = re.sub(
-        r'\.severity-label:nth-child\(3\)[^}]*\}',
-        '',
-        content
-    )
-    content = re.sub(
-        r'\.severity-label:nth-child\(4\)[^}]*\}',
-        '',
-        content
-    )
-    content = re.sub(
-        r'\.severity-label:nth-child\(5\)[^}]*\}',
-        '',
-        content
-    )
-
-    # Add the new positioning before the media query
-    media_query_pos = content.find('@media (max-width: 600px)')
-    if media_query_pos != -1:
-        content = content[:media_query_pos] + severity_label_positions + '\n        ' + content[media_query_pos:]
-
-    # Update severity-label CSS to reduce max-width and adjust size
-    severity_label_css = r'''        .severity-label {
+# Rules that replace the harm label, legend and legend item rules
+SEVERITY_LABEL_CSS = r'''        .severity-label {
             font-size: 13px;
             font-weight: bold;
             white-space: normal;
@@ -65,15 +33,7 @@ def fix_layout(file_path):
             hyphens: auto;
         }'''
 
-    content = re.sub(
-        r'\.severity-label\s*\{[^}]*\}',
-        severity_label_css,
-        content,
-        flags=re.DOTALL
-    )
-
-    # Make the legend more compact
-    legend_css = r'''        .legend {
+LEGEND_CSS = r'''        .legend {
             margin-top: 15px;
             padding: 8px 10px;
             background: #f9f9f9;
@@ -84,15 +44,7 @@ def fix_layout(file_path):
             flex-wrap: wrap;
         }'''
 
-    content = re.sub(
-        r'\.legend\s*\{[^}]*\}',
-        legend_css,
-        content,
-        flags=re.DOTALL
-    )
-
-    # Make legend items more compact
-    legend_item_css = r'''        .legend-item {
+LEGEND_ITEM_CSS = r'''        .legend-item {
             display: flex;
             align-items: center;
             gap: 6px;
@@ -100,40 +52,69 @@ def fix_layout(file_path):
             font-weight: 500;
         }'''
 
-    content = re.sub(
-        r'\.legend-item\s*\{[^}]*\}',
-        legend_item_css,
-        content,
-        flags=re.DOTALL
-    )
+
+def transform_content(content, file_path, index=None):
+    """Optimize the layout with better label positioning and compact legends.
+
+    index is the content's AnchorIndex, if the caller already has one.
+    """
+
+    # Locate every CSS rule and the media query in a single scan
+    if index is None:
+        index = AnchorIndex(content)
+    edits = []
+
+    # Fix severity labels positioning - align them better with chart columns
+    # Remove the previous positioning and replace with better values
+    # Remove all severity-label:nth-child(1..5) positioning, with the line of
+    # a rule that has one to itself
+    for match in index.all('severity_label_nth'):
+        end = index.block_end(match.end())
+        if match.group('nth') in ('1', '2', '3', '4', '5') and end is not None:
+            start = match.start()
+            line = content.rfind('\n', 0, start)
+            if line != -1 and not content[line + 1:start].strip():
+                start = line
+            edits.append((start, end, ''))
+
+    # Add the new positioning before the media query
+    media_query = index.first('media_600')
+    if media_query is not None:
+        edits.append((media_query.start(), media_query.start(), SEVERITY_LABEL_POSITIONS + '\n        '))
+
+    # Update severity-label CSS to reduce max-width and adjust size (the
+    # rules keep the indentation in front of them)
+    for start, end in index.blocks('severity_label'):
+        edits.append((start, end, SEVERITY_LABEL_CSS.lstrip()))
+
+    # Make the legend more compact
+    for start, end in index.blocks('legend'):
+        edits.append((start, end, LEGEND_CSS.lstrip()))
+
+    # Make legend items more compact
+    for start, end in index.blocks('legend_item'):
+        edits.append((start, end, LEGEND_ITEM_CSS.lstrip()))
 
     # Reduce severity-labels margin
-    content = re.sub(
-        r'(\.severity-labels\s*\{[^}]*margin-top:\s*)-?\d+px;',
-        r'\g<1>-5px;',
-        content
-    )
-    content = re.sub(
-        r'(\.severity-labels\s*\{[^}]*margin-bottom:\s*)\d+px;',
-        r'\g<1>8px;',
-        content
-    )
+    edits += css_property_edits(index, 'severity_labels', MARGIN_TOP_RE, '-5px;')
+    edits += css_property_edits(index, 'severity_labels', MARGIN_BOTTOM_RE, '8px;')
+
+    return apply_edits(content, edits)
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
 
-    print(f"Updated: {file_path.name}")
+def fix_layout(file_path):
+    """Optimize the layout with better label positioning and compact legends."""
+
+    update_chart('fix_layout_optimization', transform_content, file_path, pass_index=True)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -142,8 +123,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Optimizing layout and positioning...\n")
 
-    for chart_file in all_charts:
-        fix_layout(chart_file)
+    run_jobs(fix_layout, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
@@ -4,13 +4,13 @@ Fix missing ctx by adding the proper DPI fix code before chart creation.
 """
 
 import re
-from pathlib import Path
 
-def fix_missing_ctx(file_path):
-    """Add the DPI fix code before chart creation."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Add the DPI fix code before chart creation."""
 
     # The working DPI fix from exemplar
     dpi_fix = '''
@@ -45,21 +45,22 @@ def fix_missing_ctx(file_path):
                     dpi_fix + '\n        const chart = new Chart(ctx,'
                 )
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def fix_missing_ctx(file_path):
+    """Add the DPI fix code before chart creation."""
+
+    update_chart('fix_missing_ctx', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -68,8 +69,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Fixing missing ctx definitions...\n")
 
-    for chart_file in all_charts:
-        fix_missing_ctx(chart_file)
+    run_jobs(fix_missing_ctx, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
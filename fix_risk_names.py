@@ -3,80 +3,57 @@
 Fix risk names in banner to match the filename.
 """
 
-from pathlib import Path
+from chart_catalog import RISK_NAMES, SCENARIOS, parse_chart_name, severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 import re
 
-# Mapping of risk numbers to names from index.html
-RISK_NAMES = {
-    1: "1.1 Unfair discrimination and misrepresentation",
-    2: "1.2 Exposure to toxic content",
-    3: "1.3 Unequal performance across groups",
-    4: "2.1 Compromise of privacy by obtaining, leaking or correctly inferring sensitive information",
-    5: "2.2 AI system security vulnerabilities and attacks",
-    6: "3.2 False or misleading information",
-    7: "3.1 Pollution of information ecosystem and loss of consensus reality",
-    8: "4.1 Disinformation, surveillance, and influence at scale",
-    9: "4.3 Cyberattacks, weapon development or use, and mass harm",
-    10: "4.2 Fraud, scams, and targeted manipulation",
-    11: "5.1 Overreliance and unsafe use",
-    12: "5.2 Loss of human agency and autonomy",
-    13: "6.1 Power centralization and unfair distribution of benefits",
-    14: "6.2 Increased inequality and decline in employment quality",
-    15: "6.3 Economic and cultural devaluation of human effort",
-    16: "6.4 Competitive dynamics",
-    17: "6.5 Governance failure",
-    18: "6.6 Environmental harm",
-    19: "7.1 AI pursuing its own goals in conflict with human goals or values",
-    20: "7.2 AI possessing dangerous capabilities",
-    21: "7.3 Lack of capability or robustness",
-    22: "7.4 Lack of transparency or interpretability",
-    23: "7.5 AI welfare and rights",
-    24: "7.6 Multi-agent risks"
-}
 
-def fix_risk_name(file_path):
-    """Fix the risk name in the banner."""
+def transform_content(content, file_path):
+    """Fix the risk name in the banner. Returns None if the file cannot be patched."""
 
     # Extract risk number and scenario from filename
-    match = re.match(r'risk(\d+)_(bau|pm)_chart\.html', file_path.name)
-    if not match:
+    fields = parse_chart_name(file_path.name)
+    if fields is None or fields['type'] != 'severity':
         print(f"ERROR: Could not parse filename {file_path.name}")
-        return
+        return None
 
-    risk_num = int(match.group(1))
-    scenario = "Business as usual" if match.group(2) == "bau" else "Pragmatic mitigations"
+    risk_num = fields['risk']
 
     if risk_num not in RISK_NAMES:
         print(f"ERROR: No name found for risk {risk_num}")
-        return
-
-    risk_name = RISK_NAMES[risk_num]
-    new_banner_text = f"{risk_name} / {scenario}"
-
-    # Read file
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+        return None
 
     # Replace banner text
     content = re.sub(
         r'<div class="banner">\s*[\d.]+\s+[^/]+/[^<]+</div>',
-        f'<div class="banner">\n            {new_banner_text}\n        </div>',
+        f'<div class="banner">\n            {banner_text(file_path)}\n        </div>',
         content
     )
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
+
 
-    print(f"Updated: {file_path.name} -> {new_banner_text}")
+def banner_text(file_path):
+    """Return the expected banner text for a severity chart file."""
+
+    fields = parse_chart_name(file_path.name)
+    return f"{RISK_NAMES[fields['risk']]} / {SCENARIOS[fields['scenario']]}"
+
+
+def fix_risk_name(file_path):
+    """Fix the risk name in the banner."""
+
+    update_chart('fix_risk_names', transform_content, file_path, detail=banner_text)
 
 
 def main():
     """Process all severity chart files."""
 
+    jobs = parse_jobs(__doc__)
+
     # Find all BAU and PM severity charts
-    all_charts = sorted(Path('.').glob('risk*_bau_chart.html')) + \
-                 sorted(Path('.').glob('risk*_pm_chart.html'))
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -85,8 +62,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Fixing risk names...\n")
 
-    for chart_file in all_charts:
-        fix_risk_name(chart_file)
+    run_jobs(fix_risk_name, all_charts, jobs)
 
     print(f"\nCompleted!")
 
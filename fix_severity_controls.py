@@ -4,13 +4,13 @@ Script to fix the wrapping issue in severity chart controls.
 """
 
 import re
-from pathlib import Path
 
-def fix_controls(file_path):
-    """Fix the controls layout to prevent wrapping."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Fix the controls layout to prevent wrapping."""
 
     # Find and replace the .controls CSS
     controls_pattern = r'(\.controls\s*\{[^}]*\})'
@@ -60,21 +60,22 @@ def fix_controls(file_path):
         content
     )
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def fix_controls(file_path):
+    """Fix the controls layout to prevent wrapping."""
+
+    update_chart('fix_severity_controls', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -83,8 +84,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Fixing control wrapping issues...\n")
 
-    for chart_file in all_charts:
-        fix_controls(chart_file)
+    run_jobs(fix_controls, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
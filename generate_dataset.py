@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic Delphi dataset at configurable scale for scaling tests.
+
+Writes a project tree with the same structure as the real charts, built from
+the real charts as templates:
+
+- risk{n}_{bau,pm}_chart.html: severity charts with a generated expertData
+  array (one entry per participating expert, probabilities in percent over
+  severities 1-5, summing to 100), stored by column as
+  encode_expert_data.py writes it (--expert-data binary for its base64
+  form, json for the pretty-printed array of the original charts)
+- Vuln_Charts/ and Resp_Charts/risk{n}_{vuln,resp}_actors_chart.html:
+  unsplit actor tables with one data-actor row per actor
+- Sec_Charts/risk_{n}_sector_vulnerability.html: unsplit sector tables with
+  one data-sector row per sector
+  (the table rows are rendered by table_model.py)
+- dataset.json: the parameters, risk names and sectors of the dataset
+
+The build scripts then run on it unchanged from inside the output directory,
+e.g. cd synthetic_data && python ../fix_layout_optimization.py -j 0. Risks
+past the 24 real ones get synthetic names, which fix_risk_names.py does not
+know; sectors past the 14 real ones are not in any chart_split.py sector
+group. The same seed always gives the same files.
+
+    python generate_dataset.py                                   # real scale
+    python generate_dataset.py --experts 5000 --risks 200 --sectors 100 -j 0
+"""
+
+import argparse
+import json
+import random
+import string
+from functools import partial
+from pathlib import Path
+
+import chart_metrics
+from chart_catalog import RISK_NAMES
+from chart_io import read_chart, write_chart
+from chart_jobs import add_jobs_argument, run_jobs
+from chart_split import OPTIONAL_ACTORS, REQUIRED_ACTORS, SECTOR_GROUPS
+from encode_expert_data import expert_data_declaration, expert_data_span
+from table_model import TABLE_KINDS, TableTemplates, has_consensus, median_level
+
+REPO_DIR = Path(__file__).resolve().parent
+
+DEFAULT_OUTPUT = 'synthetic_data'
+
+# Real scale of the current round
+EXPERTS = 80
+RISKS = 24
+SECTORS = 14
+
+# Share of experts answering each risk, drawn per risk
+PARTICIPATION = (0.7, 1.0)
+
+SEVERITY_TEMPLATE = 'risk1_bau_chart.html'
+
+EXPERT_DATA_FORMATS = ('columns', 'binary', 'json')
+
+ACTOR_LABELS = {
+    'ai_dev_gen': "AI Developer (General-purpose AI)",
+    'ai_deployer': "AI Deployer",
+    'ai_gov_actor': "AI Governance Actor",
+    'ai_user': "AI User",
+    'ai_dev_spec': "AI Developer (Specialized AI)",
+    'ai_infra': "AI Infrastructure Provider",
+    'ai_stake': "Affected Stakeholder",
+}
+
+SECTOR_LABELS = {
+    'Agriculture': "Agriculture, Mining, Construction and Manufacturing",
+    'Trade': "Trade, Transportation, and Utilities",
+    'Information': "Information",
+    'Finance': "Finance and Insurance",
+    'Real_Estate': "Real Estate and Rental and Leasing",
+    'Professional': "Professional and Technical Services",
+    'Scientific': "Scientific Research and Development Services",
+    'Management': "Management, Administrative, Support Services",
+    'Education': "Educational Services",
+    'Health_Care': "Health Care and Social Assistance",
+    'Arts': "Arts, Entertainment, and Recreation",
+    'Accommodation': "Accommodation, Food, and Other Services",
+    'Public_Admin': "Public Administration excluding National Security",
+    'National_Security': "National Security",
+}
+
+
+def risk_name(risk):
+    """Return the real name of a risk, or a synthetic one past the real risks."""
+
+    return RISK_NAMES.get(risk, f"9.{risk} Synthetic risk {risk}")
+
+
+def sectors(count):
+    """Return (key, label) of the first count sectors, real ones first."""
+
+    real = [key for group in SECTOR_GROUPS.values() for key in group]
+    keys = real[:count] + [f'Sector_{n}' for n in range(len(real) + 1, count + 1)]
+    return [(key, SECTOR_LABELS.get(key, f"Synthetic Sector {key.split('_')[-1]}")) for key in keys]
+
+
+def expert_ids(count, seed):
+    """Return count distinct response ids like the survey's (R_ + 15 characters)."""
+
+    rng = random.Random(f'{seed}:experts')
+    alphabet = string.ascii_letters + string.digits
+    ids = {}
+    while len(ids) < count:
+        ids.setdefault('R_' + ''.join(rng.choices(alphabet, k=15)))
+    return list(ids)
+
+
+def apportion(weights, total, step):
+    """Split total into multiples of step in proportion to weights (largest remainder)."""
+
+    units = total // step
+    scale = units / sum(weights)
+    shares = [weight * scale for weight in weights]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda i: counts[i] - shares[i])
+    for i in by_remainder[:units - sum(counts)]:
+        counts[i] += 1
+    return [count * step for count in counts]
+
+
+def severity_distribution(rng, centre):
+    """Return one expert's probabilities (percent) over severities 1-5 around a centre."""
+
+    belief = min(5.0, max(1.0, rng.gauss(centre, 0.8)))
+    spread = rng.uniform(0.35, 1.4)
+    weights = [2.718 ** (-((sev - belief) / spread) ** 2 / 2) for sev in range(1, 6)]
+    # Most experts answer in steps of 5 or 10, a few to the percent
+    step = rng.choices((10, 5, 1), weights=(4, 5, 1))[0]
+    return apportion(weights, 100, step)
+
+
+def expert_data(rng, ids, centre, participation):
+    """Return the expertData entries of one severity chart."""
+
+    entries = []
+    for expert_id in ids:
+        if rng.random() >= participation:
+            continue
+        probs = severity_distribution(rng, centre)
+        entries.append({
+            'id': expert_id,
+            'data': [{'sev': sev, 'prob': float(prob)} for sev, prob in enumerate(probs, 1)],
+        })
+    return entries
+
+
+def expert_data_literal(entries):
+    """Format expertData the way the original charts have it."""
+
+    return json.dumps(entries, indent=12)[:-1] + '        ]'
+
+
+def expert_data_source(entries, expert_data_format):
+    """Return the expertData declaration of a chart in one of EXPERT_DATA_FORMATS."""
+
+    if expert_data_format == 'json':
+        return f'const expertData = {expert_data_literal(entries)};'
+    return expert_data_declaration(entries, binary=expert_data_format == 'binary')
+
+
+def response_counts(rng, respondents):
+    """Return one table row's counts for the five levels and Don't Know."""
+
+    centre = rng.uniform(1.0, 5.0)
+    concentration = rng.uniform(0.5, 3.0)
+    alphas = [0.05 + concentration * 2.718 ** (-(level - centre) ** 2) for level in range(1, 6)]
+    alphas.append(rng.uniform(0.0, 0.15))
+    weights = [rng.gammavariate(alpha, 1.0) if alpha > 0 else 0.0 for alpha in alphas]
+    if not any(weights):
+        weights[round(centre) - 1] = 1.0
+    return apportion(weights, respondents, 1)
+
+
+class Templates:
+    """The real charts the synthetic ones are built from, split around their generated parts."""
+
+    def __init__(self, root=REPO_DIR, expert_data_format='columns'):
+        root = Path(root)
+        content = read_chart(root / SEVERITY_TEMPLATE)
+        start, end = expert_data_span(content)
+        self.severity = (content[:start], content[end:])
+        self.expert_data_format = expert_data_format
+        self.severity_title = '<title>Risk 1 - Expert Severity Assessments</title>'
+        self.banner = f'{RISK_NAMES[1]} / Business as usual'
+        self.comment = '// Data extracted from risk_number = 1, scenario = BAU'
+
+        self.tables = TableTemplates(root)
+
+    def severity_chart(self, risk, scenario, entries):
+        prefix, suffix = self.severity
+        label = "Business as usual" if scenario == 'bau' else "Pragmatic mitigations"
+        prefix = (prefix
+                  .replace(self.severity_title, f'<title>Risk {risk} - Expert Severity Assessments</title>')
+                  .replace(self.banner, f'{risk_name(risk)} / {label}')
+                  .replace(self.comment, f'// Data extracted from risk_number = {risk}, scenario = {scenario.upper()}'))
+        return prefix + expert_data_source(entries, self.expert_data_format) + suffix
+
+    def table(self, kind, risk, rows):
+        title = f'Risk {risk}: {risk_name(risk)} - {TABLE_KINDS[kind][3]}'
+        rows = [(key, label, counts, median_level(counts), has_consensus(counts)) for key, label, counts in rows]
+        return self.tables.render(kind, title, risk_name(risk), rows)
+
+
+def generate_risk(risk, output_dir, templates, ids, sector_list, seed):
+    """Write every chart of one risk; returns the number of files written."""
+
+    rng = random.Random(f'{seed}:risk{risk}')
+    participation = rng.uniform(*PARTICIPATION)
+    bau_centre = rng.uniform(1.5, 4.5)
+    centres = {'bau': bau_centre, 'pm': max(1.0, bau_centre - rng.uniform(0.0, 1.2))}
+
+    written = []
+    for scenario, centre in centres.items():
+        entries = expert_data(rng, ids, centre, participation)
+        path = output_dir / f'risk{risk}_{scenario}_chart.html'
+        write_chart(path, templates.severity_chart(risk, scenario, entries))
+        written.append(path)
+
+    respondents = round(len(ids) * participation)
+    tables = [
+        ('vuln', output_dir / 'Vuln_Charts' / f'risk{risk}_vuln_actors_chart.html',
+         [(key, ACTOR_LABELS[key]) for key in REQUIRED_ACTORS + OPTIONAL_ACTORS]),
+        ('resp', output_dir / 'Resp_Charts' / f'risk{risk}_resp_actors_chart.html',
+         [(key, ACTOR_LABELS[key]) for key in REQUIRED_ACTORS + OPTIONAL_ACTORS]),
+        ('sector', output_dir / 'Sec_Charts' / f'risk_{risk}_sector_vulnerability.html', sector_list),
+    ]
+    for kind, path, labels in tables:
+        rows = [(key, label, response_counts(rng, respondents)) for key, label in labels]
+        write_chart(path, templates.table(kind, risk, rows))
+        written.append(path)
+
+    for path in written:
+        chart_metrics.wrote(path)
+    print(f"Generated: risk {risk} ({len(written)} files)")
+    return len(written)
+
+
+def main():
+    """Generate the synthetic dataset."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT, help=f'output directory (default {DEFAULT_OUTPUT})')
+    parser.add_argument('--experts', type=int, default=EXPERTS, help=f'number of experts (default {EXPERTS})')
+    parser.add_argument('--risks', type=int, default=RISKS, help=f'number of risks (default {RISKS})')
+    parser.add_argument('--sectors', type=int, default=SECTORS, help=f'number of sectors (default {SECTORS})')
+    parser.add_argument('--seed', default='delphi', help='random seed (default delphi)')
+    parser.add_argument('--expert-data', choices=EXPERT_DATA_FORMATS, default='columns',
+                        help='how the severity charts store expertData (default columns)')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    if min(args.experts, args.risks, args.sectors) < 1:
+        raise SystemExit("ERROR: --experts, --risks and --sectors must be at least 1")
+
+    output_dir = Path(args.output)
+    for directory in (output_dir, output_dir / 'Vuln_Charts', output_dir / 'Resp_Charts', output_dir / 'Sec_Charts'):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    templates = Templates(expert_data_format=args.expert_data)
+    ids = expert_ids(args.experts, args.seed)
+    sector_list = sectors(args.sectors)
+
+    print(f"Generating {args.risks} risks x {args.experts} experts x {args.sectors} sectors in {output_dir}/\n")
+
+    worker = partial(generate_risk, output_dir=output_dir, templates=templates, ids=ids,
+                     sector_list=sector_list, seed=args.seed)
+    counts = run_jobs(worker, list(range(1, args.risks + 1)), args.jobs)
+
+    manifest = {
+        'seed': args.seed,
+        'experts': args.experts,
+        'risks': {risk: risk_name(risk) for risk in range(1, args.risks + 1)},
+        'actors': ACTOR_LABELS,
+        'sectors': dict(sector_list),
+    }
+    write_chart(output_dir / 'dataset.json', json.dumps(manifest, indent=1) + '\n')
+
+    print(f"\nCompleted! Generated {sum(count or 0 for count in counts)} files.")
+
+
+if __name__ == '__main__':
+    main()
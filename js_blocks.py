@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Linear-time locator for blocks in the inline chart JavaScript.
+
+The fix scripts used to find things like the medianValuesPlugin body with
+nested-quantifier regexes, which backtrack badly and stop matching once the
+nesting goes past two levels. JsIndex instead tokenizes the script once,
+skipping strings, comments, template literals and regex literals, and records
+every bracket and semicolon with its nesting depth. Declaration and statement
+spans are then found by walking that event list, so the whole lookup is a
+single left-to-right pass over the source. Long balanced JSON literals (the
+embedded expertData) are recognised with a couple of regex passes and kept
+as one opaque span rather than tokenized.
+"""
+
+import re
+import string
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import accumulate
+
+# Every alternative is either a single character or an unrolled loop that
+# always succeeds, so the tokenizer never rescans text it has already passed.
+# Possessive quantifiers (Python 3.11+) keep long strings from building up
+# backtracking state.
+TOKEN_RE = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))
+  | (?P<string>"[^"\\\n]*+(?:\\[\s\S][^"\\\n]*+)*+"?|'[^'\\\n]*+(?:\\[\s\S][^'\\\n]*+)*+'?)
+  | (?P<template>`)
+  | (?P<word>[A-Za-z0-9_$.]+)
+  | (?P<bracket>[{}()\[\];])
+  | (?P<slash>/)
+  | (?P<other>.)
+''', re.VERBOSE | re.DOTALL)
+
+# Body of a template literal up to the closing backtick or the next ${
+TEMPLATE_CHUNK_RE = re.compile(r'[^`\\$]*+(?:(?:\\[\s\S]|\$(?!\{))[^`\\$]*+)*+')
+
+# Run of JSON-only text (strings, numbers, literals, punctuation) starting at a bracket
+DATA_LITERAL_RE = re.compile(r'''
+    [\[{]
+    (?: [\s\d.,:\[\]{}eE-]++
+      | "[^"\\\n]*+(?:\\.[^"\\\n]*+)*+"
+      | true | false | null
+    )*+
+''', re.VERBOSE)
+JSON_STRING_RE = re.compile(r'"[^"\\\n]*+(?:\\.[^"\\\n]*+)*+"')
+BRACKET_RE = re.compile(r'[\[\]{}]')
+
+# Data literals shorter than this are scanned token by token
+MIN_DATA_LITERAL = 256
+
+REGEX_LITERAL_RE = re.compile(r'/(?![*/])[^/\\\[\n]*+(?:(?:\\.|\[[^\]\\\n]*+(?:\\.[^\]\\\n]*+)*+\])[^/\\\[\n]*+)*+/[A-Za-z]*')
+
+HANDLER_RE = re.compile(r'''\.addEventListener\(\s*['"](?P<event>\w+)['"]''')
+
+# Characters of an event target expression such as document.getElementById('x')
+IDENTIFIER_START = frozenset(string.ascii_letters + '_$')
+TARGET_CHARS = frozenset(string.ascii_letters + string.digits + '_$.()\'"')
+
+# After these words a slash starts a regex literal rather than a division
+REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete',
+                  'void', 'throw', 'case', 'do', 'else', 'yield', 'await'}
+
+DECLARATION_KEYWORDS = {'const', 'let', 'var'}
+
+OPENERS = {'{': '}', '(': ')', '[': ']'}
+
+
+class JsIndex:
+    """Structural index of a JavaScript source built in one linear pass.
+
+    events holds (pos, char, depth) for every bracket and semicolon outside
+    strings and comments; depth is the nesting level the character sits at.
+    declarations holds (keyword, name, pos, depth) for const/let/var.
+    non_code holds the spans of strings, comments, literals and embedded
+    data, which have no events inside; data_spans holds just the embedded
+    data.
+    """
+
+    def __init__(self, source, start=0, end=None):
+        self.source = source
+        self.start = start
+        self.end = len(source) if end is None else end
+        self.events = []
+        self.declarations = []
+        self.non_code = []
+        self.data_spans = []
+        self._scan()
+        self._event_positions = [pos for pos, _, _ in self.events]
+        self._non_code_starts = [span[0] for span in self.non_code]
+
+    def _scan(self):
+        source = self.source
+        pos = self.start
+        end = self.end
+        depth = 0
+        # Brace depths at which a template literal's ${ ... } was opened
+        template_stack = []
+        last_kind = None
+        last_text = ''
+        pending_keyword = None
+        # End of the last line on which a regex literal failed to close; later
+        # slashes on that line are divisions, so no line is rescanned.
+        no_regex_before = -1
+        # End of the last JSON run tried as a data literal
+        no_data_before = -1
+
+        while pos < end:
+            match = TOKEN_RE.match(source, pos, end)
+            kind = match.lastgroup
+            text = match.group()
+
+            if kind == 'space':
+                pos = match.end()
+                continue
+
+            if kind == 'comment' or kind == 'string':
+                self.non_code.append((pos, match.end()))
+                pos = match.end()
+                last_kind = 'string' if kind == 'string' else last_kind
+                continue
+
+            if kind == 'template':
+                pos = self._skip_template(pos + 1, template_stack, depth)
+                if template_stack and template_stack[-1] == depth:
+                    depth += 1
+                last_kind = 'string'
+                continue
+
+            if kind == 'slash':
+                regex_allowed = pos >= no_regex_before and (
+                    last_kind not in ('word', 'string', 'close')
+                    or (last_kind == 'word' and last_text in REGEX_KEYWORDS)
+                )
+                literal = REGEX_LITERAL_RE.match(source, pos, end) if regex_allowed else None
+                if literal is not None:
+                    self.non_code.append((pos, literal.end()))
+                    pos = literal.end()
+                    last_kind = 'string'
+                    continue
+                if regex_allowed:
+                    line_end = source.find('\n', pos, end)
+                    no_regex_before = end if line_end == -1 else line_end
+
+            if kind == 'word':
+                if pending_keyword is not None:
+                    keyword, keyword_pos = pending_keyword
+                    self.declarations.append((keyword, text, keyword_pos, depth))
+                    pending_keyword = None
+                elif text in DECLARATION_KEYWORDS:
+                    pending_keyword = (text, pos)
+            else:
+                pending_keyword = None
+
+            if kind == 'bracket' and text in '[{' and pos >= no_data_before:
+                literal_end, run_end = self._data_literal_end(pos)
+                # Brackets inside a run that failed are scanned normally,
+                # so no run is matched twice
+                no_data_before = run_end
+                if literal_end is not None:
+                    # Embedded data such as expertData: no code inside
+                    self.non_code.append((pos, literal_end))
+                    self.data_spans.append((pos, literal_end))
+                    pos = literal_end
+                    last_kind = 'close'
+                    pending_keyword = None
+                    continue
+
+            if kind == 'bracket':
+                if text in OPENERS:
+                    self.events.append((pos, text, depth))
+                    depth += 1
+                    last_kind = 'open'
+                elif text == ';':
+                    self.events.append((pos, text, depth))
+                    last_kind = 'open'
+                else:
+                    depth = max(depth - 1, 0)
+                    if text == '}' and template_stack and template_stack[-1] == depth:
+                        # End of a ${ ... } substitution: resume the template
+                        template_stack.pop()
+                        pos = self._skip_template(pos + 1, template_stack, depth)
+                        if template_stack and template_stack[-1] == depth:
+                            depth += 1
+                        last_kind = 'string'
+                        continue
+                    self.events.append((pos, text, depth))
+                    last_kind = 'close'
+            else:
+                last_kind = kind if kind == 'word' else 'open'
+
+            last_text = text
+            pos = match.end()
+
+    def _data_literal_end(self, pos):
+        """Return (literal_end, run_end) for the JSON run starting at pos.
+
+        literal_end is None unless the run starts with a long balanced literal.
+
+        The literal is matched and bracket-counted with regexes, so large
+        embedded data costs a few C-level passes instead of one loop
+        iteration per token.
+        """
+
+        match = DATA_LITERAL_RE.match(self.source, pos, self.end)
+        run = match.group()
+        end = max(run.rfind(']'), run.rfind('}')) + 1
+        if end < MIN_DATA_LITERAL:
+            return None, match.end()
+
+        # Blank out strings so brackets inside them are not counted
+        masked = JSON_STRING_RE.sub(lambda m: '"' * len(m.group()), run[:end])
+        depths = list(accumulate(1 if char in '[{' else -1 for char in BRACKET_RE.findall(masked)))
+        if depths[-1] != 0 or min(depths[:-1], default=1) < 1:
+            return None, match.end()
+        return pos + end, match.end()
+
+    def _skip_template(self, pos, template_stack, depth):
+        """Skip template literal text; push depth if a ${ substitution opens."""
+
+        chunk = TEMPLATE_CHUNK_RE.match(self.source, pos, self.end)
+        self.non_code.append((pos - 1, chunk.end()))
+        pos = chunk.end()
+        if self.source.startswith('${', pos):
+            template_stack.append(depth)
+            return pos + 2
+        # Closing backtick, or end of input for an unterminated template
+        return min(pos + 1, self.end)
+
+    def is_code(self, pos):
+        """Return True if pos is outside strings, comments and literals."""
+
+        i = bisect_right(self._non_code_starts, pos) - 1
+        return i < 0 or pos >= self.non_code[i][1]
+
+    def depth_at(self, pos):
+        """Return the bracket nesting depth at a code position."""
+
+        i = bisect_left(self._event_positions, pos) - 1
+        if i < 0:
+            return 0
+        _, char, depth = self.events[i]
+        return depth + 1 if char in OPENERS else depth
+
+    def statement_end(self, pos, depth=None):
+        """Return the offset just past the statement starting at pos.
+
+        The statement ends at the first semicolon at its own depth, or just
+        before the bracket that closes the enclosing block.
+        """
+
+        if depth is None:
+            depth = self.depth_at(pos)
+        events = self.events
+        for i in range(bisect_left(self._event_positions, pos), len(events)):
+            event_pos, char, event_depth = events[i]
+            if event_depth < depth:
+                return event_pos
+            if char == ';' and event_depth == depth:
+                return event_pos + 1
+        return self.end
+
+    def declaration_span(self, name):
+        """Return (start, end) of the first const/let/var declaring name, or None."""
+
+        for _, declared, pos, depth in self.declarations:
+            if declared == name:
+                return pos, self.statement_end(pos, depth)
+        return None
+
+    def statement_spans(self, pattern):
+        """Return (start, end) of every statement whose code starts with a regex match."""
+
+        spans = []
+        for match in re.compile(pattern).finditer(self.source, self.start, self.end):
+            if not self.is_code(match.start()):
+                continue
+            spans.append((match.start(), self.statement_end(match.start())))
+        return spans
+
+    def event_handler_spans(self, target=None):
+        """Return (target, event, start, end) for every addEventListener call."""
+
+        source = self.source
+        handlers = []
+        for match in HANDLER_RE.finditer(source, self.start, self.end):
+            dot = match.start()
+            if target:
+                start = dot - len(target)
+                if start < self.start or not source.startswith(target, start):
+                    continue
+            else:
+                # Walk back over the target expression, then forward to its
+                # first identifier character
+                start = dot
+                while start > self.start and source[start - 1] in TARGET_CHARS:
+                    start -= 1
+                while start < dot and source[start] not in IDENTIFIER_START:
+                    start += 1
+                if start == dot:
+                    continue
+            if not self.is_code(start):
+                continue
+            handlers.append((source[start:dot], match.group('event'),
+                             start, self.statement_end(start)))
+        return handlers
+
+
+def script_spans(content):
+    """Return (start, end) offsets of every inline <script> body in an HTML file."""
+
+    spans = []
+    for match in re.finditer(r'<script(?![^>]*\bsrc=)[^>]*>', content):
+        end = content.find('</script>', match.end())
+        if end != -1:
+            spans.append((match.end(), end))
+    return spans
+
+
+@lru_cache(maxsize=64)
+def chart_script_index(content):
+    """Return a JsIndex over the chart's main inline script, or None.
+
+    Indexes are cached by content, so passes over an unchanged chart share
+    one; callers must not modify the returned index.
+    """
+
+    for start, end in script_spans(content):
+        if 'new Chart(' in content[start:end]:
+            return JsIndex(content, start, end)
+    return None
@@ -3,14 +3,13 @@
 Move DPI fix to the correct location - right before chart creation.
 """
 
-from pathlib import Path
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 import re
 
-def move_dpi_fix(file_path):
-    """Move DPI fix to right before chart creation."""
-
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Move DPI fix to right before chart creation. Returns None if the chart is not found."""
 
     # First, remove the existing DPI fix wherever it is
     dpi_fix_pattern = r'\n        // Fix blurry canvas on high-DPI displays\n        const dpr = window\.devicePixelRatio \|\| 1;\n        const rect = canvas\.getBoundingClientRect\(\);\n        canvas\.width = rect\.width \* dpr;\n        canvas\.height = rect\.height \* dpr;\n        ctx\.scale\(dpr, dpr\);\n'
@@ -31,25 +30,26 @@ def move_dpi_fix(file_path):
     chart_pattern = r'(        const chart = new Chart\(ctx,)'
     replacement = dpi_fix + r'\1'
 
-    if re.search(chart_pattern, content):
-        content = re.sub(chart_pattern, replacement, content)
+    if not re.search(chart_pattern, content):
+        return None
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+    return re.sub(chart_pattern, replacement, content)
 
-        print(f"Fixed: {file_path.name}")
-    else:
-        print(f"ERROR: Could not find chart creation in {file_path.name}")
+
+def move_dpi_fix(file_path):
+    """Move DPI fix to right before chart creation."""
+
+    update_chart('move_dpi_fix_correctly', transform_content, file_path,
+                 error="Could not find chart creation", verb='Fixed')
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -58,8 +58,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Moving DPI fix to correct location...\n")
 
-    for chart_file in all_charts:
-        move_dpi_fix(chart_file)
+    run_jobs(move_dpi_fix, all_charts, jobs)
 
     print(f"\nCompleted!")
 
@@ -3,13 +3,14 @@
 Move event handlers to after chart creation.
 """
 
-from pathlib import Path
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-def move_handlers(file_path):
-    """Move event handlers after chart creation."""
+def transform_content(content, file_path):
+    """Move event handlers after chart creation. Returns None if an anchor is missing."""
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    lines = content.splitlines(keepends=True)
 
     # Find the event handler section
     handler_start = None
@@ -27,8 +28,7 @@ def move_handlers(file_path):
             break
 
     if handler_start is None or handler_end is None:
-        print(f"ERROR: Could not find event handlers in {file_path.name}")
-        return
+        return None
 
     # Extract the event handler section (including blank line after)
     handler_lines = lines[handler_start:handler_end]
@@ -44,28 +44,29 @@ def move_handlers(file_path):
             break
 
     if insert_pos is None:
-        print(f"ERROR: Could not find insertion point in {file_path.name}")
-        return
+        return None
 
     # Insert the handlers before "// UI Controls"
     for j, handler_line in enumerate(handler_lines):
         lines.insert(insert_pos + j, handler_line)
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.writelines(lines)
+    return ''.join(lines)
+
 
-    print(f"Fixed: {file_path.name}")
+def move_handlers(file_path):
+    """Move event handlers after chart creation."""
+
+    update_chart('move_handlers_simple', transform_content, file_path,
+                 error="Could not find event handlers or insertion point", verb='Fixed')
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -74,8 +75,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Moving event handlers...\n")
 
-    for chart_file in all_charts:
-        move_handlers(chart_file)
+    run_jobs(move_handlers, all_charts, jobs)
 
     print(f"\nCompleted!")
 
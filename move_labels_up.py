@@ -4,13 +4,13 @@ Script to move harm labels up to use white space and prevent overlap with legend
 """
 
 import re
-from pathlib import Path
 
-def move_labels_up(file_path):
-    """Move severity labels up to use available white space."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Move severity labels up to use available white space."""
 
     # Change the severity-labels margin-top to move them up significantly
     content = re.sub(
@@ -26,21 +26,22 @@ def move_labels_up(file_path):
         content
     )
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def move_labels_up(file_path):
+    """Move severity labels up to use available white space."""
+
+    update_chart('move_labels_up', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -49,8 +50,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Moving harm labels up...\n")
 
-    for chart_file in all_charts:
-        move_labels_up(chart_file)
+    run_jobs(move_labels_up, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
@@ -4,13 +4,13 @@ Script to reduce the height of severity charts.
 """
 
 import re
-from pathlib import Path
 
-def reduce_chart_height(file_path, new_height=350):
-    """Reduce the chart height in a severity chart file and change background to white."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path, new_height=350):
+    """Reduce the chart height in a severity chart file and change background to white."""
 
     # Replace the height in .chart-container
     # Looking for: height: 500px;
@@ -28,21 +28,23 @@ def reduce_chart_height(file_path, new_height=350):
         content
     )
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def reduce_chart_height(file_path, new_height=350):
+    """Reduce the chart height in a severity chart file and change background to white."""
+
+    update_chart('reduce_severity_height', transform_content, file_path,
+                 new_height, check_applied=new_height == 350)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -51,8 +53,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Reducing height to 350px and changing background to white...\n")
 
-    for chart_file in all_charts:
-        reduce_chart_height(chart_file)
+    run_jobs(reduce_chart_height, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
@@ -4,13 +4,13 @@ Script to reduce title text size and chart height in severity charts.
 """
 
 import re
-from pathlib import Path
 
-def reduce_sizes(file_path):
-    """Reduce title text size and chart height."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def transform_content(content, file_path):
+    """Reduce title text size and chart height."""
 
     # Reduce banner font size (the title with risk name)
     content = re.sub(
@@ -33,21 +33,22 @@ def reduce_sizes(file_path):
         content
     )
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def reduce_sizes(file_path):
+    """Reduce title text size and chart height."""
+
+    update_chart('reduce_title_and_height', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -56,8 +57,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Reducing title size and chart height...\n")
 
-    for chart_file in all_charts:
-        reduce_sizes(chart_file)
+    run_jobs(reduce_sizes, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
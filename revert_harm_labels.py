@@ -4,60 +4,63 @@ Revert harm labels to original positioning and wrapping.
 """
 
 import re
-from pathlib import Path
 
-def revert_labels(file_path):
-    """Revert severity labels to original state."""
+from chart_catalog import severity_charts
+from chart_jobs import parse_jobs, run_jobs
+from transform_registry import update_chart
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # Original severity-label CSS (no wrapping, larger font)
-    original_label_css = r'''        .severity-label {
+# Original severity-label CSS (no wrapping, larger font)
+ORIGINAL_LABEL_CSS = r'''        .severity-label {
             font-size: 17px;
             font-weight: bold;
             white-space: nowrap;
             position: absolute;
         }'''
 
+# Original positioning of the five harm labels
+ORIGINAL_POSITIONS = '''        .severity-label:nth-child(1) { left: 8%; transform: translateX(0%); }
+        .severity-label:nth-child(2) { left: 32%; transform: translateX(-50%); }
+        .severity-label:nth-child(3) { left: 52%; transform: translateX(-50%); }
+        .severity-label:nth-child(4) { left: 70%; transform: translateX(-50%); }
+        .severity-label:nth-child(5) { left: 95%; transform: translateX(-100%); }'''
+
+# A narrow-screen media query with label rules
+LABEL_MEDIA_QUERY_RE = re.compile(r'@media \(max-width: 600px\)\s*\{[^}]*\.severity-label[^}]*\}[^}]*\}')
+
+
+def transform_content(content, file_path):
+    """Revert severity labels to original state."""
+
+    # The rule keeps the indentation in front of it
     content = re.sub(
         r'\.severity-label\s*\{[^}]*\}',
-        original_label_css,
+        ORIGINAL_LABEL_CSS.lstrip(),
         content,
         flags=re.DOTALL
     )
 
-    # Remove all nth-child positioning
+    # Remove all nth-child positioning, with the line of a rule that has one to itself
     content = re.sub(
-        r'\.severity-label:nth-child\(\d+\)[^}]*\}',
+        r'(?:\n[ \t]*)?\.severity-label:nth-child\(\d+\)[^}]*\}',
         '',
         content
     )
 
     # Add back original positioning
-    original_positions = '''        .severity-label:nth-child(1) { left: 8%; transform: translateX(0%); }
-        .severity-label:nth-child(2) { left: 32%; transform: translateX(-50%); }
-        .severity-label:nth-child(3) { left: 52%; transform: translateX(-50%); }
-        .severity-label:nth-child(4) { left: 70%; transform: translateX(-50%); }
-        .severity-label:nth-child(5) { left: 95%; transform: translateX(-100%); }'''
-
     # Find the severity-label closing brace and add positioning after it
     # Insert before media query or before style closing
     media_query_pos = content.find('@media (max-width: 600px)')
     if media_query_pos != -1:
-        content = content[:media_query_pos] + original_positions + '\n        ' + content[media_query_pos:]
+        content = content[:media_query_pos] + ORIGINAL_POSITIONS + '\n        ' + content[media_query_pos:]
     else:
-        # Insert before </style>
+        # Insert on the lines before </style>
         style_close = content.find('</style>')
         if style_close != -1:
-            content = content[:style_close] + original_positions + '\n' + content[style_close:]
+            style_close = content.rfind('\n', 0, style_close) + 1
+            content = content[:style_close] + ORIGINAL_POSITIONS + '\n' + content[style_close:]
 
     # Remove the media query for labels if it exists
-    content = re.sub(
-        r'@media \(max-width: 600px\)\s*\{[^}]*\.severity-label[^}]*\}[^}]*\}',
-        '',
-        content
-    )
+    content = LABEL_MEDIA_QUERY_RE.sub('', content)
 
     # Restore original severity-labels container margins
     content = re.sub(
@@ -71,21 +74,22 @@ def revert_labels(file_path):
         content
     )
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
 
-    print(f"Updated: {file_path.name}")
+
+def revert_labels(file_path):
+    """Revert severity labels to original state."""
+
+    update_chart('revert_harm_labels', transform_content, file_path)
 
 
 def main():
     """Process all severity chart files."""
 
-    # Find all BAU and PM severity charts
-    bau_charts = sorted(Path('.').glob('risk*_bau_chart.html'))
-    pm_charts = sorted(Path('.').glob('risk*_pm_chart.html'))
+    jobs = parse_jobs(__doc__)
 
-    all_charts = bau_charts + pm_charts
+    # Find all BAU and PM severity charts
+    all_charts = severity_charts()
 
     if not all_charts:
         print("No severity charts found!")
@@ -94,8 +98,7 @@ def main():
     print(f"Found {len(all_charts)} severity charts")
     print(f"Reverting harm labels to original positioning...\n")
 
-    for chart_file in all_charts:
-        revert_labels(chart_file)
+    run_jobs(revert_labels, all_charts, jobs)
 
     print(f"\nCompleted! Updated {len(all_charts)} files.")
 
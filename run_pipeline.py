@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Run a set of severity chart fixes in a single pass.
+
+Each chart is read once, every selected transform is applied to the content in
+memory, and the result is written back once. Transforms are the
+``transform_content(content, file_path)`` functions exposed by the individual
+fix scripts, named by their module; those that also take an ``index`` get the
+pipeline's AnchorIndex of the content instead of scanning it again, e.g.:
+
+    python run_pipeline.py fix_layout_optimization fix_risk_names move_labels_up
+    python run_pipeline.py --plan move_dpi_fix_correctly
+    python run_pipeline.py --list
+
+The run order comes from transform_registry.py: prerequisites are added,
+conflicting selections are refused, and each transform runs at most once per
+file. After the run every transform's postcondition probe is checked and
+files where it does not hold are reported.
+
+Results are recorded in a content-hash build cache (see build_cache.py), so
+charts already built by the same transforms are skipped on the next run.
+The edits each transform makes are journaled (see chart_journal.py) so a run,
+or one transform in it, can be rolled back.
+"""
+
+import argparse
+import importlib
+import inspect
+import time
+from functools import lru_cache, partial
+
+from build_cache import FRESH, BuildCache, content_hash, store_object, transform_key
+from chart_anchors import AnchorIndex
+from chart_io import read_chart, sync_files, take_written, write_chart
+from chart_jobs import add_jobs_argument, run_jobs
+from chart_journal import compute_edits, finish_run, start_run, write_entry
+from chart_metrics import file_size, record_file, record_phase
+from chart_metrics import settings as metrics_settings
+from chart_profile import profile_section
+from transform_registry import (REGISTRY, ScheduleError, already_applied, batch_files,
+                                failed_postconditions, schedule)
+
+# Fix scripts exposing transform_content(content, file_path)
+TRANSFORMS = sorted(REGISTRY)
+
+
+def load_transforms(names):
+    """Import the named fix scripts and return (name, transform_content) pairs."""
+
+    transforms = []
+    for name in names:
+        if name.endswith('.py'):
+            name = name[:-3]
+        if name not in REGISTRY:
+            raise SystemExit(f"ERROR: Unknown transform {name} (see --list)")
+        module = importlib.import_module(name)
+        transforms.append((name, module.transform_content))
+    return transforms
+
+
+@lru_cache(maxsize=None)
+def takes_index(transform):
+    """True if a transform_content accepts the caller's AnchorIndex as index."""
+
+    return 'index' in inspect.signature(transform).parameters
+
+
+def apply_transforms(transforms, content, file_path, index=None, record_edits=False):
+    """Apply (name, transform_content) pairs to a chart's content in memory.
+
+    Returns (content, index, failed, skipped, steps, timings): the new
+    content and its AnchorIndex, the names of transforms that returned None
+    and of those skipped because their probe already held, the (name, edits)
+    journal steps if record_edits is set, and the time spent per transform.
+    index may be passed in if the caller already has one for content; it is
+    shared with the probes and with the transforms that take one, and rebuilt
+    once after each transform that changes the content.
+    """
+
+    timings = dict.fromkeys((name for name, _ in transforms), 0.0)
+    failed = []
+    skipped = []
+    steps = []
+    if index is None:
+        index = AnchorIndex(content)
+    for name, transform in transforms:
+        start = time.perf_counter()
+        with profile_section(name):
+            if already_applied(name, content, file_path, index):
+                # Already in the target state: don't run it, so no write either
+                timings[name] += time.perf_counter() - start
+                skipped.append(name)
+                continue
+
+            if takes_index(transform):
+                result = transform(content, file_path, index=index)
+            else:
+                result = transform(content, file_path)
+        if result is None:
+            failed.append(name)
+        elif result != content:
+            if record_edits:
+                steps.append((name, compute_edits(content, result)))
+            content = result
+            with profile_section('anchor_index'):
+                index = AnchorIndex(content)
+        timings[name] += time.perf_counter() - start
+
+    return content, index, failed, skipped, steps, timings
+
+
+def run_pipeline(transform_names, file_path, dry_run=False, cache_dir=None, journal_dir=None):
+    """Apply all transforms to one chart with a single read and write.
+
+    Returns (changed, failed_transform_names, timings, input_hash,
+    output_hash, unmet_postconditions, skipped_transform_names). Transforms
+    whose postcondition probe already holds are skipped, so a file that is
+    already in the target state is neither rewritten nor touched. A
+    transform that returns None could not patch the file; its input is kept
+    and the rest still run. When cache_dir is given the output is stored
+    there as a content-addressed object. When journal_dir is given the edits
+    each transform made are recorded there before the chart is written.
+    """
+
+    transforms = load_transforms(transform_names)
+
+    original = read_chart(file_path)
+    content, index, failed, skipped, steps, timings = apply_transforms(
+        transforms, original, file_path, record_edits=journal_dir is not None)
+
+    changed = content != original
+    if changed and not dry_run:
+        if journal_dir is not None:
+            write_entry(journal_dir, file_path, original, steps, content)
+        write_chart(file_path, content)
+
+    with profile_section('postconditions'):
+        unmet = [name for name in failed_postconditions([REGISTRY[name] for name in transform_names],
+                                                        content, file_path, index)
+                 if name not in failed]
+
+    for name in failed:
+        print(f"ERROR: {name} could not patch {file_path.name}")
+    for name in unmet:
+        print(f"WARNING: {name} postcondition not met in {file_path.name}")
+    if changed:
+        print(f"Updated: {file_path.name}")
+    elif len(skipped) == len(transforms):
+        print(f"Skipped (already applied): {file_path.name}")
+
+    input_hash = content_hash(original.encode('utf-8'))
+    if cache_dir is not None:
+        output_hash = store_object(cache_dir, content.encode('utf-8'))
+    else:
+        output_hash = content_hash(content.encode('utf-8'))
+
+    return changed, failed, timings, input_hash, output_hash, unmet, skipped
+
+
+def main():
+    """Apply the selected transforms to the files they target."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('transforms', nargs='*', help='fix scripts to apply')
+    parser.add_argument('--list', action='store_true', help='list available transforms')
+    parser.add_argument('--plan', action='store_true', help='print the schedule and batches without running')
+    parser.add_argument('--dry-run', action='store_true', help='report changes without writing')
+    parser.add_argument('--no-cache', action='store_true', help='ignore and do not update the build cache')
+    parser.add_argument('--no-journal', action='store_true', help='do not record a rollback journal')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    if args.list or not args.transforms:
+        print("Available transforms:")
+        for name in TRANSFORMS:
+            print(f"  {name:<26} {REGISTRY[name].description}")
+        return
+
+    try:
+        ordered = schedule(args.transforms)
+    except ScheduleError as e:
+        raise SystemExit(f"ERROR: {e}")
+
+    names = [transform.name for transform in ordered]
+    added = [name for name in names if name not in {n.removesuffix('.py') for n in args.transforms}]
+    batches = batch_files(ordered)
+    all_charts = [chart_file for _, files in batches for chart_file in files]
+
+    print(f"Schedule: {' -> '.join(names)}")
+    if added:
+        print(f"Added prerequisites: {', '.join(added)}")
+    for batch_names, files in batches:
+        print(f"Batch of {len(files)} files: {', '.join(batch_names)}")
+    print()
+
+    if args.plan:
+        return
+
+    if not all_charts:
+        print("No target charts found!")
+        return
+
+    load_transforms(names)
+
+    timings = dict.fromkeys(names, 0.0)
+    changed_count = 0
+    skipped_count = 0
+    unmet_count = 0
+    converged_count = 0
+    start = time.perf_counter()
+
+    use_cache = not args.no_cache and not args.dry_run
+    cache = BuildCache() if use_cache else None
+    journal_dir = None if args.dry_run or args.no_journal else start_run(names)
+
+    for batch_names, files in batches:
+        # The registry's probes decide what runs, so they are part of the key
+        key = transform_key(batch_names + ['transform_registry']) if use_cache else None
+
+        pending = []
+        for chart_file in files:
+            cached = cache.lookup(chart_file, key) if cache else None
+            if cached is FRESH:
+                skipped_count += 1
+                record_file(chart_file.name, 'skipped', bytes_in=file_size(chart_file))
+            elif cached is not None:
+                # Same input as a previous build: reuse the stored output
+                bytes_in = file_size(chart_file)
+                if journal_dir is not None:
+                    current = read_chart(chart_file)
+                    output = cached.decode('utf-8')
+                    write_entry(journal_dir, chart_file, current,
+                                [('cached', compute_edits(current, output))], output)
+                write_chart(chart_file, cached)
+                changed_count += 1
+                record_file(chart_file.name, 'changed', bytes_in=bytes_in, bytes_out=len(cached))
+                if not metrics_settings['quiet']:
+                    print(f"Updated (cached): {chart_file.name}")
+            else:
+                pending.append(chart_file)
+
+        worker = partial(run_pipeline, batch_names, dry_run=args.dry_run,
+                         cache_dir=cache.cache_dir if cache else None, journal_dir=journal_dir)
+        for chart_file, result in zip(pending, run_jobs(worker, pending, args.jobs)):
+            if result is None:
+                continue
+            changed, failed, file_timings, input_hash, output_hash, unmet, skipped = result
+            changed_count += changed
+            converged_count += len(skipped) == len(batch_names)
+            unmet_count += len(unmet)
+            for name, elapsed in file_timings.items():
+                timings[name] += elapsed
+            # A chart with failed transforms or unmet postconditions is not
+            # built; leave it out so the next run tries again
+            if cache and not failed and not unmet:
+                cache.record(chart_file, key, input_hash, output_hash)
+
+    if cache:
+        cache.save()
+
+    # Cached outputs are written here rather than in the workers, so run_jobs()
+    # does not sync them when the workers are other processes
+    sync_files(take_written())
+
+    total = time.perf_counter() - start
+    for name in names:
+        record_phase(f'transform:{name}', timings[name])
+
+    print("\nTransform timings (summed over all workers):")
+    for name in names:
+        print(f"  {name:<28} {timings[name] * 1000:8.1f} ms")
+    print(f"  {'total (incl. I/O)':<28} {total * 1000:8.1f} ms")
+
+    if journal_dir is not None:
+        journal_dir = finish_run(journal_dir)
+    if journal_dir is not None:
+        print(f"\nJournal: {journal_dir} (undo with: python chart_journal.py --rollback)")
+    if unmet_count:
+        print(f"\n{unmet_count} postcondition checks failed (see WARNING lines).")
+    print(f"\nCompleted! Updated {changed_count}/{len(all_charts)} files "
+          f"({skipped_count} unchanged since last build, "
+          f"{converged_count} already in the target state).")
+
+
+if __name__ == '__main__':
+    main()
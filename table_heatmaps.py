@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Build one cross-risk heatmap page per table kind from the table model.
+
+Comparing a sector or an actor across risks means opening one split chart
+per risk and group (96 sector charts, 48 per actor kind). A heatmap page
+shows a whole kind at once: one row per risk and one column per sector or
+actor, 24 x 14 for the sector tables and 24 x 7 for each actor table.
+
+The risk-by-row matrix is computed in one pass over the columns of
+table_model.json and embedded in the page: the counts at each level, the
+share of each level (as the charts round it), the median level and the
+consensus flag of every cell. In the page:
+
+- cells are coloured by the median level (default), or by the share of one
+  level with the buttons above the grid (?mode=0..5 picks one in the URL)
+- consensus cells are outlined, and hovering a cell shows all its shares
+- a cell links to that risk's table page (?group= its group) if it has been
+  built by table_pages.py, otherwise to the split chart the row is in
+
+The pages are written to sector_vulnerability_heatmap.html,
+vuln_actors_heatmap.html and resp_actors_heatmap.html.
+
+    python table_model.py extract && python table_heatmaps.py
+    python table_heatmaps.py --kind sector -o review
+"""
+
+import argparse
+import json
+import os
+import re
+from functools import partial
+from pathlib import Path
+
+import chart_metrics
+from chart_io import write_chart
+from chart_jobs import add_jobs_argument, run_jobs
+from chart_split import SPLITS
+from table_model import LEVEL_COLORS, LEVELS, MODEL_FILE, TableTemplates, load_model, output_name
+from table_pages import page_name
+
+HEATMAP_NAMES = {
+    'vuln': 'vuln_actors_heatmap.html',
+    'resp': 'resp_actors_heatmap.html',
+    'sector': 'sector_vulnerability_heatmap.html',
+}
+
+HEATMAP_TITLES = {
+    'vuln': 'Actor Vulnerability by Risk',
+    'resp': 'Actor Responsibility by Risk',
+    'sector': 'Sector Vulnerability by Risk',
+}
+
+HEADER_PATTERN = re.compile(r'<th(?: [^>]*)?>(.*?)</th>')
+
+# Median levels drawn on these colours get white text
+DARK_LEVELS = [0, LEVELS - 1]
+
+HEATMAP_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>%(title)s</title>
+    <style>
+        @import url('https://fonts.googleapis.com/css2?family=Figtree:wght@300;400;500;600;700&display=swap');
+
+        body {
+            font-family: 'Figtree', Arial, sans-serif;
+            margin: 0;
+            padding: 5px;
+            background-color: transparent;
+        }
+
+        .heatmap-frame {
+            display: inline-block;
+            border: 2px solid #000000;
+            border-radius: 4px;
+            padding: 5px;
+            margin: 5px 0;
+        }
+
+        .heatmap-banner {
+            background-color: #000000;
+            color: white;
+            padding: 6px 8px;
+            margin: -5px -5px 5px -5px;
+            border-radius: 2px 2px 0 0;
+            font-weight: bold;
+            font-size: 14px;
+            text-align: center;
+            line-height: 1.2;
+        }
+
+        .heatmap-modes {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 4px;
+            margin: 0 0 5px 0;
+        }
+
+        .heatmap-mode {
+            font: inherit;
+            font-size: 12px;
+            font-weight: bold;
+            padding: 3px 10px;
+            border: 1px solid #000000;
+            border-radius: 12px;
+            background-color: white;
+            color: #000000;
+            cursor: pointer;
+        }
+
+        .heatmap-mode.active {
+            background-color: #000000;
+            color: white;
+        }
+
+        .heatmap {
+            border-collapse: separate;
+            border-spacing: 0;
+            table-layout: fixed;
+        }
+
+        .heatmap th {
+            font-size: 11px;
+            font-weight: bold;
+            padding: 4px 2px;
+            width: 64px;
+            vertical-align: bottom;
+            line-height: 1.2;
+            word-wrap: break-word;
+            hyphens: auto;
+        }
+
+        .heatmap th.risk-header {
+            width: 260px;
+            text-align: left;
+        }
+
+        .heatmap td.risk-label {
+            font-size: 12px;
+            padding: 0 6px;
+            border-top: 1px solid #666;
+            white-space: nowrap;
+            overflow: hidden;
+            text-overflow: ellipsis;
+            max-width: 260px;
+        }
+
+        .heatmap td.heat-cell {
+            height: 30px;
+            padding: 0;
+            border-top: 1px solid #666;
+            border-left: 1px solid white;
+            text-align: center;
+            font-size: 12px;
+            font-weight: bold;
+        }
+
+        .heatmap th.group-start, .heatmap td.group-start {
+            border-left: 2px dashed #666;
+        }
+
+        .heatmap td.consensus {
+            box-shadow: inset 0 0 0 2px #000000;
+        }
+
+        .heat-cell a {
+            display: block;
+            line-height: 30px;
+            color: inherit;
+            text-decoration: none;
+        }
+
+        .heatmap-legend {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 12px;
+            margin-top: 10px;
+            font-size: 11px;
+            color: #333;
+        }
+
+        .legend-swatch {
+            display: inline-block;
+            width: 12px;
+            height: 12px;
+            margin-right: 4px;
+            vertical-align: middle;
+            border: 1px solid #666;
+        }
+
+        .heatmap-tooltip {
+            position: fixed;
+            display: none;
+            pointer-events: none;
+            z-index: 1000;
+            background-color: rgba(0, 0, 0, 0.85);
+            color: white;
+            padding: 6px 8px;
+            border-radius: 3px;
+            font-size: 11px;
+            line-height: 1.4;
+            white-space: nowrap;
+        }
+    </style>
+</head>
+<body>
+    <div class="heatmap-frame">
+        <div class="heatmap-banner">%(title)s</div>
+        <div id="heatmapModes" class="heatmap-modes"></div>
+        <table id="heatmap" class="heatmap"></table>
+        <div id="heatmapLegend" class="heatmap-legend"></div>
+    </div>
+    <div id="heatmapTooltip" class="heatmap-tooltip"></div>
+    <script>
+    (function () {
+        const matrix = %(matrix)s;
+        const config = %(config)s;
+        const grid = document.getElementById('heatmap');
+        const modes = document.getElementById('heatmapModes');
+        const legend = document.getElementById('heatmapLegend');
+        const tooltip = document.getElementById('heatmapTooltip');
+        const params = new URLSearchParams(window.location.search);
+        let mode = params.get('mode') || 'median';
+
+        function escapeHtml(text) {
+            return String(text).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;')
+                .replace(/"/g, '&quot;');
+        }
+
+        // The colour a share of the way from white to a level's colour
+        function mix(color, share) {
+            const rgb = [1, 3, 5].map(i => parseInt(color.slice(i, i + 2), 16));
+            return 'rgb(' + rgb.map(c => Math.round(255 + (c - 255) * share)).join(', ') + ')';
+        }
+
+        function link(r, c) {
+            const target = matrix.links[r];
+            const group = matrix.groups[c];
+            if (typeof target === 'string') {
+                return group === null ? target : target + '?group=' + encodeURIComponent(group);
+            }
+            return target[group === null ? '' : String(group)] || null;
+        }
+
+        function cellLook(r, c) {
+            if (mode === 'median') {
+                const median = matrix.median[r][c];
+                if (median === null) {
+                    return {background: 'white', color: '#333', text: '–'};
+                }
+                return {background: config.colors[median], color: config.darkLevels.includes(median) ? 'white' : '#333',
+                        text: String(median + 1)};
+            }
+            const level = Number(mode);
+            const share = matrix.shares[r][c][level];
+            return {background: mix(config.colors[level], share / 100),
+                    color: share > 60 && config.darkLevels.includes(level) ? 'white' : '#333', text: share + '%%'};
+        }
+
+        function buildGrid() {
+            const head = ['<thead><tr><th class="risk-header">Risk</th>'];
+            matrix.labels.forEach((label, c) => {
+                const start = c > 0 && matrix.groups[c] !== matrix.groups[c - 1] ? ' class="group-start"' : '';
+                head.push('<th' + start + '>' + escapeHtml(label) + '</th>');
+            });
+            head.push('</tr></thead>');
+
+            const body = ['<tbody>'];
+            matrix.risks.forEach((risk, r) => {
+                const title = 'Risk ' + risk + ': ' + matrix.names[r];
+                body.push('<tr><td class="risk-label" title="' + escapeHtml(title) + '"><b>Risk ' + risk + '</b> ' +
+                    escapeHtml(matrix.names[r]) + '</td>');
+                matrix.keys.forEach((key, c) => {
+                    const classes = ['heat-cell'];
+                    if (c > 0 && matrix.groups[c] !== matrix.groups[c - 1]) {
+                        classes.push('group-start');
+                    }
+                    if (matrix.consensus[r][c]) {
+                        classes.push('consensus');
+                    }
+                    if (matrix.counts[r][c] === null) {
+                        body.push('<td class="' + classes.join(' ') + '"></td>');
+                        return;
+                    }
+                    const href = link(r, c);
+                    body.push('<td class="' + classes.join(' ') + '" data-r="' + r + '" data-c="' + c + '">' +
+                        (href ? '<a href="' + escapeHtml(href) + '"></a>' : '<a></a>') + '</td>');
+                });
+                body.push('</tr>');
+            });
+            body.push('</tbody>');
+            grid.innerHTML = head.join('') + body.join('');
+        }
+
+        function paint() {
+            grid.querySelectorAll('td[data-r]').forEach(cell => {
+                const look = cellLook(Number(cell.dataset.r), Number(cell.dataset.c));
+                cell.style.backgroundColor = look.background;
+                cell.style.color = look.color;
+                cell.firstChild.textContent = look.text;
+            });
+            Array.from(modes.children).forEach(button =>
+                button.classList.toggle('active', button.dataset.mode === mode));
+
+            const items = mode === 'median'
+                ? config.levels.slice(0, config.colors.length - 1).map((name, level) =>
+                    '<span><span class="legend-swatch" style="background-color: ' + config.colors[level] +
+                    ';"></span>' + (level + 1) + ' ' + escapeHtml(name) + '</span>')
+                : [0, 25, 50, 75, 100].map(share =>
+                    '<span><span class="legend-swatch" style="background-color: ' +
+                    mix(config.colors[Number(mode)], share / 100) + ';"></span>' + share + '%%</span>');
+            items.push('<span><span class="legend-swatch" style="box-shadow: inset 0 0 0 2px #000000;"></span>' +
+                'Consensus reached</span>');
+            legend.innerHTML = items.join('');
+        }
+
+        function showTooltip(event) {
+            const cell = event.target.closest('td[data-r]');
+            if (!cell) {
+                tooltip.style.display = 'none';
+                return;
+            }
+            const r = Number(cell.dataset.r);
+            const c = Number(cell.dataset.c);
+            const counts = matrix.counts[r][c];
+            const median = matrix.median[r][c];
+            const lines = ['<b>Risk ' + matrix.risks[r] + ': ' + escapeHtml(matrix.names[r]) + '</b>',
+                           '<b>' + escapeHtml(matrix.labels[c]) + '</b>'];
+            config.levels.forEach((name, level) => {
+                lines.push(escapeHtml(name) + ': ' + matrix.shares[r][c][level] + '%% (' + counts[level] + ')');
+            });
+            lines.push('Median: ' + (median === null ? '–' : escapeHtml(config.levels[median])) +
+                (matrix.consensus[r][c] ? ' (consensus reached)' : ''));
+            tooltip.innerHTML = lines.join('<br>');
+            tooltip.style.display = 'block';
+            const x = Math.min(event.clientX + 12, window.innerWidth - tooltip.offsetWidth - 4);
+            const y = event.clientY + 12 + tooltip.offsetHeight > window.innerHeight
+                ? event.clientY - tooltip.offsetHeight - 8 : event.clientY + 12;
+            tooltip.style.left = Math.max(4, x) + 'px';
+            tooltip.style.top = Math.max(4, y) + 'px';
+        }
+
+        [['median', 'Median level']].concat(config.levels.map((name, level) => [String(level), name]))
+            .forEach(([value, label]) => {
+                const button = document.createElement('button');
+                button.className = 'heatmap-mode';
+                button.dataset.mode = value;
+                button.textContent = label;
+                button.addEventListener('click', () => {
+                    mode = value;
+                    params.set('mode', value);
+                    window.history.replaceState(null, '', '?' + params.toString());
+                    paint();
+                });
+                modes.appendChild(button);
+            });
+        if (mode !== 'median' && !(Number(mode) >= 0 && Number(mode) < config.levels.length)) {
+            mode = 'median';
+        }
+
+        buildGrid();
+        paint();
+        grid.addEventListener('mousemove', showTooltip);
+        grid.addEventListener('mouseleave', () => { tooltip.style.display = 'none'; });
+    })();
+    </script>
+</body>
+</html>
+"""
+
+
+def level_names(kind, templates):
+    """Return the names of the response levels of a kind of table (Don't Know last), from its header row."""
+
+    head = templates.tables[kind][0]
+    names = HEADER_PATTERN.findall(head[head.index('<thead>'):])[1:]
+    return [re.sub(r'\s*<br>\s*', ' ', name) for name in names]
+
+
+def row_link(table, directory):
+    """Return where a risk's cells link to, relative to directory.
+
+    That is its table page if it has been built, or else {group: split chart}
+    (group '' for rows of an unsplit chart).
+    """
+
+    table_dir = Path(table['directory'])
+    page = table_dir / page_name(table['kind'], table['risk'])
+    if page.exists():
+        return Path(os.path.relpath(page, directory)).as_posix()
+    return {'' if group is None else str(group): Path(os.path.relpath(table_dir / output_name(table['kind'], table['risk'], group),
+                                             directory)).as_posix()
+            for group in dict.fromkeys(table['groups'])}
+
+
+def heatmap_matrix(tables, directory='.'):
+    """Return the risk-by-row matrix of the model tables of one kind.
+
+    Columns are the rows of the tables in their first order, each risk one
+    row of the matrix; a risk without some row has None in that cell. Rows
+    are matched by label, as a few hand-edited charts have other row keys.
+    """
+
+    tables = sorted(tables, key=lambda table: table['risk'])
+    columns = {}
+    for table in tables:
+        for key, label, group in zip(table['keys'], table['labels'], table['groups']):
+            columns.setdefault(label, (key, group))
+    index = {label: column for column, label in enumerate(columns)}
+
+    empty = [None] * len(columns)
+    matrix = {
+        'risks': [table['risk'] for table in tables],
+        'names': [table['name'] for table in tables],
+        'keys': [key for key, _ in columns.values()],
+        'labels': list(columns),
+        'groups': [group for _, group in columns.values()],
+        'counts': [], 'shares': [], 'median': [], 'consensus': [],
+        'links': [row_link(table, directory) for table in tables],
+    }
+    for table in tables:
+        counts, shares, median, consensus = list(empty), list(empty), list(empty), list(empty)
+        level_counts = zip(*table['counts'], table['dont_know'])
+        for label, row_counts, row_median, row_consensus in zip(table['labels'], level_counts,
+                                                                table['median'], table['consensus']):
+            column = index[label]
+            total = sum(row_counts)
+            counts[column] = list(row_counts)
+            shares[column] = [round(count / total * 100) if total else 0 for count in row_counts]
+            median[column] = row_median
+            consensus[column] = row_consensus
+        matrix['counts'].append(counts)
+        matrix['shares'].append(shares)
+        matrix['median'].append(median)
+        matrix['consensus'].append(consensus)
+    return matrix
+
+
+def render_heatmap(kind, matrix, templates):
+    """Return the heatmap page of one kind of table."""
+
+    config = {'colors': LEVEL_COLORS, 'darkLevels': DARK_LEVELS, 'levels': level_names(kind, templates)}
+
+    def script_json(value):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+    return HEATMAP_PAGE % {'title': HEATMAP_TITLES[kind], 'matrix': script_json(matrix),
+                           'config': script_json(config)}
+
+
+def write_heatmap(kind, tables, templates, output_dir):
+    """Write the heatmap page of one kind of table; returns (page bytes, table chart bytes it stands for)."""
+
+    tables = [table for table in tables if table['kind'] == kind]
+    if not tables:
+        print(f"Warning: No {kind} tables in the model")
+        return None
+
+    matrix = heatmap_matrix(tables, output_dir)
+    heatmap_file = Path(output_dir) / HEATMAP_NAMES[kind]
+    write_chart(heatmap_file, render_heatmap(kind, matrix, templates))
+    chart_metrics.wrote(heatmap_file)
+
+    charts = [Path(table['directory']) / output_name(kind, table['risk'], group)
+              for table in tables for group in dict.fromkeys(table['groups'])]
+    print(f"Created: {heatmap_file} ({len(matrix['risks'])} risks x {len(matrix['keys'])} "
+          f"{SPLITS[kind].attribute}s, in place of {len(charts)} charts)")
+    return chart_metrics.file_size(heatmap_file), sum(chart_metrics.file_size(chart) for chart in charts)
+
+
+def main():
+    """Build the cross-risk heatmap pages from the table model."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--kind', action='append', choices=sorted(SPLITS), help='only this kind of table (repeatable)')
+    parser.add_argument('--model', default=MODEL_FILE, help=f'table model file (default {MODEL_FILE})')
+    parser.add_argument('-o', '--output', default='.', help='output directory (default: the current one)')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    try:
+        tables = load_model(args.model)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"ERROR: Could not load the table model ({e}); run python table_model.py extract first")
+    Path(args.output).mkdir(parents=True, exist_ok=True)
+
+    worker = partial(write_heatmap, tables=tables, templates=TableTemplates(), output_dir=args.output)
+    results = [result for result in run_jobs(worker, args.kind or list(SPLITS), args.jobs) if result is not None]
+
+    print(f"\nCompleted! Built {len(results)} heatmaps ({sum(size for size, _ in results) / 1024:.0f} KB) "
+          f"for {sum(charts for _, charts in results) / 1024:.0f} KB of table charts.")
+
+
+if __name__ == '__main__':
+    main()
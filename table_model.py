@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+Numeric model of the vulnerability, responsibility and sector tables.
+
+The actor and sector charts keep their data only as rendered HTML: bar
+heights, "9% (7)" labels and a median marker. The extractor reads every
+table chart back into numbers, one table per risk and kind, and stores them
+column by column in table_model.json:
+
+- keys, labels and groups: the row attribute, label and the split chart the
+  row is in (None for an unsplit chart, or a row no split chart has)
+- counts: one column per response level, dont_know: the Don't Know counts
+- median: the level carrying the median marker (None if it has none)
+- consensus: whether the row is highlighted as having reached consensus
+- table_end: the row that ended the unsplit table, which the charts follow
+  with a blank line
+- max_count: the count drawn as a full-height bar
+
+Bar heights are not stored: they are the counts scaled to max_count (the
+largest count of the unsplit table, read off the bars). The renderer writes the charts from the model with the same
+markup as the originals (each extracted chart is checked to render back
+byte for byte), either as they were split or regrouped with --groups.
+
+With --compact the rows are written instead as one line each, without
+inline styles: stripes, consensus rows, bar colours, the Don't Know border
+and the median marker come from a block of shared rules added to the
+chart's <style>, and bar heights are rounded to 0.1 px, the one value a
+cell keeps inline. The compact command rewrites the charts in place this
+way (those that render back identically); both forms read back into the
+same model.
+
+    python table_model.py extract
+    python table_model.py render --kind sector --risk 3 -o rendered
+    python table_model.py render --kind vuln --groups groups.json
+    python table_model.py compact -j 0
+"""
+
+import argparse
+import json
+import re
+from functools import partial
+from pathlib import Path
+
+import chart_metrics
+from chart_catalog import parse_chart_name, select_charts
+from chart_io import read_chart, write_chart
+from chart_jobs import add_jobs_argument, run_jobs
+from chart_split import SPLITS, TableFile
+
+REPO_DIR = Path(__file__).resolve().parent
+
+MODEL_FILE = 'table_model.json'
+
+MODEL_VERSION = 2
+
+# Real charts the markup around the table body is taken from
+TABLE_TEMPLATES = {
+    'vuln': 'risk1_vuln_actors_required_chart.html',
+    'resp': 'risk1_resp_actors_required_chart.html',
+    'sector': 'risk_1_sector_vulnerability_group1.html',
+}
+
+# Names of the unsplit charts
+SOURCE_NAMES = {
+    'vuln': 'risk{risk}_vuln_actors_chart.html',
+    'resp': 'risk{risk}_resp_actors_chart.html',
+    'sector': 'risk_{risk}_sector_vulnerability.html',
+}
+
+# Table rows: bar colours per response level (the last is Don't Know)
+LEVEL_COLORS = ['#2c7bb6', '#abd9e9', '#ffffbf', '#fdae61', '#d7191c', '#cccccc']
+LEVELS = len(LEVEL_COLORS) - 1
+HIGHLIGHT = 'rgba(0, 0, 0, 0.7)'
+BAR_HEIGHT = 80
+MIN_BAR_HEIGHT = 5
+MEDIAN_MARKER = ('<div style="position: absolute; top: -15px; left: 50%; transform: translateX(-50%); '
+                 'font-size: 14px; color: #ea4335; z-index: 10;">▼</div>')
+CONSENSUS_BADGE = ('<br><span style="{display}background-color: white; color: #333; padding: 2px 8px; '
+                   'border-radius: 12px; font-size: 10px; font-weight: bold; white-space: nowrap;">'
+                   '✓ CONSENSUS REACHED</span>')
+
+# Per table kind: row attribute, row indent, badge display style, title suffix
+TABLE_KINDS = {
+    'vuln': ('actor', '', '', 'All Actors Vulnerability'),
+    'resp': ('actor', '', '', 'All Actors Responsibility'),
+    'sector': ('sector', ' ' * 20, 'display: inline-block; ', 'All Sectors Sector Vulnerability'),
+}
+
+# Compact rows: the inline styles of the rows above as shared rules, added at the end of <style>
+COMPACT_CSS = '''
+        /* Compact table rows */
+        .matrix-table tbody tr:nth-child(odd) td { background-color: #f0f0f0; }
+        .matrix-table tbody tr:nth-child(even) td { background-color: white; }
+        .matrix-table tbody tr.consensus td { background-color: %(highlight)s; }
+        .matrix-table tbody tr.consensus .%(attribute)s-label, .matrix-table tbody tr.consensus .bar-label { color: white; }
+        .response-cell:last-child { border-left: 2px dashed #666; }
+        .bar-wrapper { height: %(bar_height)spx; }
+%(level_colors)s
+        .median-marker { position: absolute; top: -15px; left: 50%%; transform: translateX(-50%%); font-size: 14px; color: #ea4335; z-index: 10; }
+        .consensus-badge { %(badge_display)sbackground-color: white; color: #333; padding: 2px 8px; border-radius: 12px; font-size: 10px; font-weight: bold; white-space: nowrap; }
+'''
+COMPACT_LEVEL_COLOR = '        .response-cell:nth-child(%d) .distribution-bar { background-color: %s; }'
+COMPACT_MEDIAN_MARKER = '<div class="median-marker">▼</div>'
+COMPACT_BADGE = '<br><span class="consensus-badge">✓ CONSENSUS REACHED</span>'
+
+LABEL_PATTERN = re.compile(r'-label" style="background-color: ([^;]+);[^"]*">\n *(.*?)(?:<br><span[^\n]*)?\n')
+COMPACT_LABEL_PATTERN = re.compile(r'<tr [^>]*?( class="consensus")?><td class="\w+-label">(.*?)(?:<br><span[^<]*</span>)?</td>')
+CELL_PATTERN = re.compile(r'<div class="distribution-bar" style="height: ?([\d.]+)px;?[^>]*>(.*?)</div>\s*'
+                          r'<div class="bar-label"[^>]*>\d+% \((\d+)\)</div>', re.DOTALL)
+TITLE_NAME_PATTERN = re.compile(r'Risk \d+: (.*) - ')
+
+
+def median_level(counts):
+    """Index of the median response among the five levels, or None if nobody answered."""
+
+    total = sum(counts[:LEVELS])
+    if not total:
+        return None
+    running = 0
+    for level, count in enumerate(counts[:LEVELS]):
+        running += count
+        if running * 2 > total:
+            return level
+    return None
+
+
+def has_consensus(counts):
+    """True if the middle half of the answers falls on a single level."""
+
+    answers = [level for level, count in enumerate(counts[:LEVELS]) for _ in range(count)]
+    if not answers:
+        return False
+    return answers[len(answers) // 4] == answers[min(len(answers) - 1, len(answers) * 3 // 4)]
+
+
+def bar_height(count, max_count):
+    """Return the height in px of a count's bar, with max_count drawn BAR_HEIGHT high."""
+
+    return 0 if count == 0 else max(count / max_count * BAR_HEIGHT, MIN_BAR_HEIGHT)
+
+
+def quantize(length):
+    """Format a length in px rounded to 0.1 px, without trailing zeros."""
+
+    return f'{length:.1f}'.rstrip('0').rstrip('.')
+
+
+def compact_css(kind):
+    """Return the shared rules that compact rows of a kind of table are drawn with."""
+
+    attribute, _, badge_display, _ = TABLE_KINDS[kind]
+    level_colors = '\n'.join(COMPACT_LEVEL_COLOR % (level + 2, color) for level, color in enumerate(LEVEL_COLORS))
+    return COMPACT_CSS % {'highlight': HIGHLIGHT, 'attribute': attribute, 'bar_height': BAR_HEIGHT,
+                          'level_colors': level_colors, 'badge_display': badge_display}
+
+
+def render_row(kind, key, label, counts, stripe, max_count, consensus, median):
+    """Return the HTML lines of one table row."""
+
+    attribute, indent, badge_display, _ = TABLE_KINDS[kind]
+    background = HIGHLIGHT if consensus else ('#f0f0f0' if stripe % 2 == 0 else 'white')
+    label_style = 'color: white;' if consensus else ''
+    badge = CONSENSUS_BADGE.format(display=badge_display) if consensus else ''
+    total = sum(counts)
+
+    lines = [
+        f'{indent}<tr data-{attribute}="{key}">',
+        f'                        <td class="{attribute}-label" style="background-color: {background}; '
+        f'color: {"white" if consensus else "inherit"};">',
+        f'                            {label}{badge}',
+        '                        </td>',
+    ]
+    for level, count in enumerate(counts):
+        dont_know = level == LEVELS
+        height = bar_height(count, max_count)
+        percent = round(count / total * 100) if total else 0
+        border = ' border-left: 2px dashed #666;' if dont_know else ''
+        inner = '' if dont_know else ' ' * 36 + (MEDIAN_MARKER if level == median else '')
+        lines += [
+            f'                        <td class="response-cell" style="background-color: {background};{border}">',
+            f'                            <div class="bar-wrapper" style="height: {BAR_HEIGHT}px;">',
+            f'                                <div class="distribution-bar" style="height: {height}px; '
+            f'background-color: {LEVEL_COLORS[level]}; position: relative;">',
+            inner,
+            '                                </div>',
+            f'                                <div class="bar-label" style="{label_style}">{percent}% ({count})</div>',
+            '                            </div>',
+            '                        </td>',
+        ]
+    lines.append('                    </tr>')
+    return lines
+
+
+def render_compact_row(kind, key, label, counts, max_count, consensus, median):
+    """Return one table row as a single line of compact markup (styled by compact_css)."""
+
+    attribute = TABLE_KINDS[kind][0]
+    total = sum(counts)
+    cells = []
+    for level, count in enumerate(counts):
+        percent = round(count / total * 100) if total else 0
+        marker = COMPACT_MEDIAN_MARKER if level == median else ''
+        cells.append(f'<td class="response-cell"><div class="bar-wrapper">'
+                     f'<div class="distribution-bar" style="height:{quantize(bar_height(count, max_count))}px">'
+                     f'{marker}</div><div class="bar-label">{percent}% ({count})</div></div></td>')
+    row_class = ' class="consensus"' if consensus else ''
+    badge = COMPACT_BADGE if consensus else ''
+    return f'<tr data-{attribute}="{key}"{row_class}><td class="{attribute}-label">{label}{badge}</td>{"".join(cells)}</tr>'
+
+
+def render_rows(kind, rows, max_count=None, compact=False):
+    """Return the tbody lines for (key, label, counts, median, consensus) rows.
+
+    Bars are scaled to max_count, by default the largest count of the rows.
+    """
+
+    if max_count is None:
+        max_count = max((count for _, _, counts, _, _ in rows for count in counts), default=0)
+    if compact:
+        return [render_compact_row(kind, key, label, counts, max_count or 1, consensus, median)
+                for key, label, counts, median, consensus in rows]
+    lines = []
+    for stripe, (key, label, counts, median, consensus) in enumerate(rows):
+        lines += render_row(kind, key, label, counts, stripe, max_count or 1, consensus, median)
+    return lines
+
+
+class TableTemplates:
+    """The markup of each kind of table chart around its rows, taken from the real charts."""
+
+    def __init__(self, root=REPO_DIR):
+        self.tables = {}
+        for kind, name in TABLE_TEMPLATES.items():
+            content = read_chart(Path(root) / name)
+            lines = content.split('\n')
+            body_start = next(i for i, line in enumerate(lines) if '<tbody>' in line)
+            body_end = next(i for i, line in enumerate(lines) if '</tbody>' in line)
+            head = '\n'.join(lines[:body_start + 1])
+            head = head[:head.index('<title>')] + '<title>{title}</title>' + head[head.index('</title>') + 8:]
+            tail = '\n'.join(lines[body_end:])
+            template_name = TITLE_NAME_PATTERN.search(content).group(1)
+            tail = tail.replace(f'<span>{template_name} / Criteria:', '<span>{name} / Criteria:')
+            # The template chart may itself have been compacted
+            head = head.replace(compact_css(kind), '')
+            self.tables[kind] = (head, tail)
+
+    def render(self, kind, title, name, rows, max_count=None, table_end=True, compact=False):
+        """Return a whole table chart with the given title, risk name and rows.
+
+        table_end says the last row is the last of the whole table, which the
+        charts follow with a blank line (split charts keep it with that row).
+        compact writes the rows in the compact markup.
+        """
+
+        head, tail = self.tables[kind]
+        if compact:
+            head = head.replace('    </style>', compact_css(kind) + '    </style>', 1)
+        return '\n'.join([head.replace('{title}', title)] + render_rows(kind, rows, max_count, compact) +
+                         ([''] if table_end else []) + [tail.replace('{name}', name)])
+
+
+def table_title(kind, risk, name, group=None):
+    """Return the title of a table chart (of one group of rows, or of all of them)."""
+
+    title = f'Risk {risk}: {name} - {TABLE_KINDS[kind][3]}'
+    return title if group is None else SPLITS[kind].title(title, group)
+
+
+def output_name(kind, risk, group=None):
+    """Return the file name of a table chart (of one group of rows, or of all of them)."""
+
+    if group is None:
+        return SOURCE_NAMES[kind].format(risk=risk)
+    return SPLITS[kind].output.format(risk=risk, group=group)
+
+
+def parse_rows(table):
+    """Return the (key, label, counts, median, consensus, bar heights) rows of a parsed TableFile.
+
+    Rows may be in the original or the compact markup.
+    """
+
+    rows = []
+    for key, row in table.rows.items():
+        text = str(row, 'utf-8')
+        compact_match = COMPACT_LABEL_PATTERN.match(text)
+        if compact_match:
+            consensus, label = compact_match.group(1) is not None, compact_match.group(2)
+        elif label_match := LABEL_PATTERN.search(text):
+            consensus, label = label_match.group(1) == HIGHLIGHT, label_match.group(2)
+        else:
+            raise ValueError(f"unexpected markup in row {key}")
+        cells = CELL_PATTERN.findall(text)
+        if len(cells) != len(LEVEL_COLORS):
+            raise ValueError(f"unexpected markup in row {key}")
+        counts = [int(count) for _, _, count in cells]
+        heights = [float(height) for height, _, _ in cells]
+        median = next((level for level, (_, inner, _) in enumerate(cells) if '▼' in inner), None)
+        rows.append((key, label, counts, median, consensus, heights))
+    return rows
+
+
+def is_compact(content):
+    """True if a table chart is written in the compact markup."""
+
+    return '/* Compact table rows */' in content
+
+
+def bar_scale(rows):
+    """Return the count the bars of parsed rows are scaled to (the one drawn BAR_HEIGHT high)."""
+
+    bars = [(count, height) for row in rows for count, height in zip(row[2], row[5]) if height > MIN_BAR_HEIGHT]
+    if not bars:
+        # Every bar is at the minimum height: any scale this large draws them so
+        return max((count for row in rows for count in row[2]), default=0) * BAR_HEIGHT // MIN_BAR_HEIGHT or 1
+
+    count, height = max(bars, key=lambda bar: bar[1])
+    estimate = round(count * BAR_HEIGHT / height)
+    # Compact heights are rounded to 0.1 px: take the nearest scale all the bars agree with
+    for max_count in sorted(range(max(1, estimate - 3), estimate + 4), key=lambda scale: abs(scale - estimate)):
+        if all(abs(count / max_count * BAR_HEIGHT - height) <= 0.05 + 1e-9 for count, height in bars):
+            return max_count
+    return estimate
+
+
+def chart_sources(kind):
+    """Return {risk: [(group, path)]} of the table charts of a kind.
+
+    A risk's split charts are listed in group order, followed by its unsplit
+    chart (the input of chart_split.py, group None) if there is one: the
+    groups need not cover every row, and extract_table() takes the rows the
+    split charts leave out from it.
+    """
+
+    grouping = SPLITS[kind]
+    group_field = 'group' if grouping.attribute == 'sector' else 'actors'
+    group_order = list(grouping.groups)
+    sources = {}
+    for path in select_charts(grouping.chart_type):
+        fields = parse_chart_name(path.name)
+        group = None if fields[group_field] == 'all' else fields[group_field]
+        sources.setdefault(fields['risk'], []).append((group, path))
+
+    for risk, charts in sources.items():
+        split = sorted((chart for chart in charts if chart[0] is not None),
+                       key=lambda chart: group_order.index(chart[0]) if chart[0] in group_order else len(group_order))
+        sources[risk] = split + [chart for chart in charts if chart[0] is None]
+    return sources
+
+
+def append_row(table, key, label, group, counts, median, consensus):
+    """Add one row (counts including Don't Know) to the columns of a model table."""
+
+    table['keys'].append(key)
+    table['labels'].append(label)
+    table['groups'].append(group)
+    for level, count in enumerate(counts[:LEVELS]):
+        table['counts'][level].append(count)
+    table['dont_know'].append(counts[LEVELS])
+    table['median'].append(median)
+    table['consensus'].append(consensus)
+
+
+def extract_table(source, templates):
+    """Read the charts of one risk and kind into a model table.
+
+    Returns (table, charts that do not render back identically), or None if
+    no chart could be read. When a risk has both split charts and its unsplit
+    chart, only the rows in no split chart are taken from the unsplit one
+    (with group None, and a warning); it is not rendered back.
+    """
+
+    kind, risk, charts = source
+    attribute = SPLITS[kind].attribute
+    table = {
+        'kind': kind, 'risk': risk, 'name': None, 'directory': charts[0][1].parent.as_posix(),
+        'keys': [], 'labels': [], 'groups': [],
+        'counts': [[] for _ in range(LEVELS)], 'dont_know': [], 'median': [], 'consensus': [],
+        'table_end': None, 'max_count': None,
+    }
+    parsed = []
+    for group, path in charts:
+        content = read_chart(path)
+        try:
+            table_file = TableFile(content, attribute)
+            rows = parse_rows(table_file)
+        except ValueError as e:
+            print(f"ERROR: {path}: {e}")
+            continue
+        if group is None and table['keys']:
+            known = set(table['keys'])
+            missing = [row for row in rows if row[0] not in known]
+            if missing:
+                print(f"Warning: {len(missing)} {attribute}s of {path} are in no split chart: "
+                      f"{', '.join(row[0] for row in missing)}")
+            for key, label, counts, median, consensus, _ in missing:
+                append_row(table, key, label, None, counts, median, consensus)
+            continue
+        title_match = TITLE_NAME_PATTERN.search(content)
+        if table['name'] is None and title_match:
+            table['name'] = title_match.group(1)
+        if table['max_count'] is None and rows:
+            table['max_count'] = bar_scale(rows)
+        for key, label, counts, median, consensus, _ in rows:
+            if bytes(table_file.rows[key][-2:]) == b'\n\n':
+                table['table_end'] = len(table['keys'])
+            append_row(table, key, label, group, counts, median, consensus)
+        parsed.append((group, path, content))
+    if not parsed:
+        return None
+
+    # Every chart must render back to itself (in its own markup), or the model is missing something
+    rendered = {compact: dict(render_table(table, templates, compact=compact))
+                for compact in {is_compact(content) for _, _, content in parsed}}
+    mismatched = [str(path) for group, path, content in parsed
+                  if rendered[is_compact(content)].get(group) != content]
+    for path in mismatched:
+        print(f"Warning: {path} does not render back identically from the model")
+    print(f"Extracted: {kind} risk {risk} ({len(table['keys'])} rows from {len(parsed)} charts)")
+    return table, mismatched
+
+
+def table_rows(table):
+    """Return a model table's rows as (key, label, counts, median, consensus), counts including Don't Know."""
+
+    counts = list(zip(*table['counts'], table['dont_know']))
+    return [(key, label, list(row_counts), median, consensus)
+            for key, label, row_counts, median, consensus
+            in zip(table['keys'], table['labels'], counts, table['median'], table['consensus'])]
+
+
+def render_table(table, templates, groups=None, compact=False):
+    """Return [(group, content)] of the charts of a model table.
+
+    The charts are those the table was extracted from, or one per entry of
+    groups (group name -> row keys). Bars are scaled to the table's max_count.
+    Rows in no split group of a split table have no chart of their own and
+    are left out of the default charts.
+    """
+
+    kind, risk, name = table['kind'], table['risk'], table['name']
+    rows = table_rows(table)
+    last_row = rows[table['table_end']] if table['table_end'] is not None else None
+    max_count = table['max_count']
+    if groups is None:
+        row_groups = table['groups']
+        selected = {group: [row for row, row_group in zip(rows, row_groups) if row_group == group]
+                    for group in dict.fromkeys(row_groups)}
+        if len(selected) > 1:
+            selected.pop(None, None)
+    else:
+        by_key = {row[0]: row for row in rows}
+        selected = {group: [by_key[key] for key in keys if key in by_key] for group, keys in groups.items()}
+
+    return [(group, templates.render(kind, table_title(kind, risk, name, group), name, group_rows, max_count,
+                                     group_rows[-1] is last_row, compact))
+            for group, group_rows in selected.items() if group_rows]
+
+
+def write_table(table, templates, groups=None, output_dir=None, compact=False):
+    """Write the charts of one model table; returns the files written."""
+
+    directory = Path(output_dir or table['directory'])
+    written = []
+    for group, content in render_table(table, templates, groups, compact):
+        output_file = directory / output_name(table['kind'], table['risk'], group)
+        write_chart(output_file, content)
+        chart_metrics.wrote(output_file)
+        written.append(output_file)
+        print(f"Created: {output_file}")
+    return written
+
+
+def compact_table(source, templates):
+    """Rewrite the charts of one risk and kind in the compact markup.
+
+    Returns (charts compacted, bytes before, bytes after).
+
+    Charts that do not render back identically from the model are left as
+    they are, so compacting never loses anything the model does not hold.
+    """
+
+    result = extract_table(source, templates)
+    if result is None:
+        return 0, 0, 0
+    table, mismatched = result
+    paths = dict(source[2])
+    compacted = before = after = 0
+    for group, content in render_table(table, templates, compact=True):
+        path = paths[group]
+        if str(path) in mismatched:
+            print(f"Skipped: {path}")
+            continue
+        size = chart_metrics.file_size(path)
+        write_chart(path, content)
+        chart_metrics.wrote(path)
+        compacted += 1
+        before += size
+        after += chart_metrics.file_size(path)
+        print(f"Compacted: {path} ({size / 1024:.1f} KB -> {chart_metrics.file_size(path) / 1024:.1f} KB)")
+    return compacted, before, after
+
+
+def load_model(path=MODEL_FILE):
+    """Return the model tables saved in a model file."""
+
+    with open(path, encoding='utf-8') as f:
+        model = json.load(f)
+    if model.get('version') != MODEL_VERSION:
+        raise ValueError(f"{path} is not a version {MODEL_VERSION} table model")
+    return model['tables']
+
+
+def save_model(tables, path=MODEL_FILE):
+    """Write model tables to a model file, one table per line."""
+
+    lines = [json.dumps(table, ensure_ascii=False, separators=(',', ':')) for table in tables]
+    write_chart(path, f'{{"version":{MODEL_VERSION},"tables":[\n' + ',\n'.join(lines) + '\n]}\n')
+
+
+def main():
+    """Extract the table model from the charts, or render the charts from it."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('command', choices=['extract', 'render', 'compact'])
+    parser.add_argument('--kind', action='append', choices=sorted(SPLITS), help='only this kind of table (repeatable)')
+    parser.add_argument('--risk', type=int, action='append', help='only this risk (repeatable)')
+    parser.add_argument('--model', default=MODEL_FILE, help=f'model file (default {MODEL_FILE})')
+    parser.add_argument('--groups', metavar='JSON', help='render: file with a JSON object of group name -> row keys')
+    parser.add_argument('-o', '--output', help="render: output directory (default: the charts' own)")
+    parser.add_argument('--compact', action='store_true', help='render: write the rows in the compact markup')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    kinds = args.kind or list(SPLITS)
+    templates = TableTemplates()
+
+    if args.command != 'render':
+        sources = [(kind, risk, charts) for kind in kinds
+                   for risk, charts in sorted(chart_sources(kind).items())
+                   if not args.risk or risk in args.risk]
+
+    if args.command == 'compact':
+        results = [result for result in run_jobs(partial(compact_table, templates=templates), sources, args.jobs)
+                   if result is not None]
+        compacted = sum(result[0] for result in results)
+        before = sum(result[1] for result in results)
+        after = sum(result[2] for result in results)
+        charts = sum(len(charts) for _, _, charts in sources)
+        print(f"\nCompleted! Compacted {compacted} of {charts} charts: {before / 1024:.0f} KB -> {after / 1024:.0f} KB"
+              + (f" ({before / after:.1f}x smaller)" if after else ''))
+        return
+
+    if args.command == 'extract':
+        results = [result for result in run_jobs(partial(extract_table, templates=templates), sources, args.jobs)
+                   if result is not None]
+        tables = [table for table, _ in results]
+        save_model(tables, args.model)
+
+        charts = sum(len(charts) for _, _, charts in sources)
+        html_bytes = sum(chart_metrics.file_size(path) for _, _, charts in sources for _, path in charts)
+        mismatched = sum(len(paths) for _, paths in results)
+        print(f"\nCompleted! Extracted {len(tables)} tables ({sum(len(table['keys']) for table in tables)} rows) "
+              f"from {charts} charts: {html_bytes / 1024:.0f} KB of HTML -> "
+              f"{chart_metrics.file_size(args.model) / 1024:.0f} KB in {args.model}")
+        if mismatched:
+            print(f"WARNING: {mismatched} charts do not render back identically")
+        return
+
+    try:
+        tables = load_model(args.model)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"ERROR: Could not load the table model: {e}")
+    groups = None
+    if args.groups:
+        with open(args.groups, encoding='utf-8') as f:
+            groups = json.load(f)
+    tables = [table for table in tables
+              if table['kind'] in kinds and (not args.risk or table['risk'] in args.risk)]
+    if args.output:
+        Path(args.output).mkdir(parents=True, exist_ok=True)
+
+    worker = partial(write_table, templates=templates, groups=groups, output_dir=args.output, compact=args.compact)
+    written = run_jobs(worker, tables, args.jobs)
+
+    print(f"\nCompleted! Rendered {sum(len(files or []) for files in written)} charts "
+          f"from {len(tables)} tables.")
+
+
+if __name__ == '__main__':
+    main()
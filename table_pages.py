@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+"""
+Build one grouped page per risk and table kind from the table model.
+
+The split charts (risk_N_sector_vulnerability_group1..4.html and
+riskN_{vuln,resp}_actors_{required,optional}_chart.html) each repeat the
+whole head, CSS and header row of their table. A table page carries the
+head once and all the rows of the table as data (see table_model.py), and
+renders the chosen group in the browser:
+
+- ?group=2 or ?group=required selects a group (default: all rows), and the
+  tabs above the table switch between groups; ?tabs=0 hides the tabs for
+  pages embedded in an iframe that picks the group itself
+- rows look exactly like the split charts': striped per group, bars scaled
+  to the whole table
+- tables of more than VIRTUAL_ROWS rows scroll inside the chart and only
+  the rows in view (plus OVERSCAN either side) are in the DOM, so pages
+  with 100+ sectors still render instantly
+
+With --renderer svg the rows are drawn instead into one SVG per table, laid
+out on the columns of the header row, so the browser lays out a single
+table cell rather than seven cells of nested flex boxes per row. The bar
+labels stay under the bars, and hovering a bar shows its row, level and
+share in one shared tooltip.
+
+The pages are written next to the charts the table came from, as
+riskN_vuln_actors_page.html, riskN_resp_actors_page.html and
+risk_N_sector_vulnerability_page.html. --index points the links to split
+charts in index.html at the pages instead.
+
+    python table_model.py extract && python table_pages.py
+    python table_pages.py --kind sector --index
+    python table_pages.py --renderer svg
+"""
+
+import argparse
+import json
+import re
+from functools import partial
+from pathlib import Path
+
+import chart_metrics
+from chart_catalog import parse_chart_name
+from chart_io import read_chart, write_chart
+from chart_jobs import add_jobs_argument, run_jobs
+from chart_split import SPLITS
+from table_model import (BAR_HEIGHT, CONSENSUS_BADGE, HIGHLIGHT, LEVEL_COLORS, MEDIAN_MARKER, MIN_BAR_HEIGHT,
+                         MODEL_FILE, TABLE_KINDS, TableTemplates, load_model, output_name, table_title)
+
+PAGE_NAMES = {
+    'vuln': 'risk{risk}_vuln_actors_page.html',
+    'resp': 'risk{risk}_resp_actors_page.html',
+    'sector': 'risk_{risk}_sector_vulnerability_page.html',
+}
+
+# Tables with more rows than this are virtualized
+VIRTUAL_ROWS = 24
+
+# Rows rendered above and below the visible ones when virtualized
+OVERSCAN = 4
+
+# Height of the scrolling table when virtualized, and the row height assumed until one is measured
+VIEWPORT_HEIGHT = 900
+ROW_HEIGHT = 125
+
+PAGE_CSS = """
+        .group-tabs {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 4px;
+            margin: 0 0 5px 0;
+        }
+
+        .group-tab {
+            font: inherit;
+            font-size: 12px;
+            font-weight: bold;
+            padding: 3px 10px;
+            border: 1px solid #000000;
+            border-radius: 12px;
+            background-color: white;
+            color: #000000;
+            cursor: pointer;
+        }
+
+        .group-tab.active {
+            background-color: #000000;
+            color: white;
+        }
+"""
+
+# Page script; the renderer's script is inserted where it says, as it is
+PAGE_SCRIPT = """
+    <script>
+    (function () {
+        const table = %(table)s;
+        const config = %(config)s;
+        const tbody = document.querySelector('.matrix-table tbody');
+        const container = document.getElementById('mainContent');
+        const tabs = document.getElementById('groupTabs');
+        const params = new URLSearchParams(window.location.search);
+        const total = table.keys.length;
+        const maxCount = table.max_count || 1;
+        let rows = [];
+
+        // Python's round(): halves go to the even neighbour
+        function roundHalfEven(x) {
+            const r = Math.round(x);
+            return Math.abs(x %% 1) === 0.5 && r %% 2 !== 0 ? r - 1 : r;
+        }
+
+        function rowCounts(i) {
+            return table.counts.map(level => level[i]).concat([table.dont_know[i]]);
+        }
+
+        function percent(count, counts) {
+            const sum = counts.reduce((a, b) => a + b, 0);
+            return sum ? roundHalfEven(count / sum * 100) : 0;
+        }
+
+        function barHeight(count) {
+            return count === 0 ? 0 : Math.max(count / maxCount * config.barHeight, config.minBarHeight);
+        }
+
+        function background(i, stripe) {
+            return table.consensus[i] ? config.highlight : (stripe %% 2 === 0 ? '#f0f0f0' : 'white');
+        }
+%(renderer)s
+        function show(group) {
+            const shownGroup = config.groups.find(option => option.group === group) || config.groups[0];
+            group = shownGroup.group;
+            rows = [];
+            for (let i = 0; i < total; i++) {
+                if (group === 'all' || String(table.groups[i]) === group) {
+                    rows.push(i);
+                }
+            }
+            document.title = shownGroup.title;
+            Array.from(tabs.children).forEach(tab => tab.classList.toggle('active', tab.dataset.group === group));
+            resetRows();
+            renderRows();
+        }
+
+        config.groups.forEach(option => {
+            const tab = document.createElement('button');
+            tab.className = 'group-tab';
+            tab.dataset.group = option.group;
+            tab.textContent = option.label;
+            tab.addEventListener('click', () => {
+                params.set('group', option.group);
+                window.history.replaceState(null, '', '?' + params.toString());
+                show(option.group);
+            });
+            tabs.appendChild(tab);
+        });
+        if (params.get('tabs') === '0' || config.groups.length < 2) {
+            tabs.style.display = 'none';
+        }
+
+        show(params.get('group') || 'all');
+    })();
+    </script>
+"""
+
+HTML_CSS = """
+        #mainContent.virtual {
+            max-height: %(viewport)dpx;
+            overflow-y: auto;
+        }
+
+        #mainContent.virtual .matrix-table th {
+            position: sticky;
+            top: 0;
+            z-index: 20;
+            background-color: white;
+        }
+"""
+
+# Rows as table rows, with the markup of the split charts
+HTML_RENDERER = """
+        let virtual = false;
+        let rowHeight = config.rowHeight;
+        let measured = false;
+        let shown = null;
+
+        function rowHtml(i, stripe) {
+            const consensus = table.consensus[i];
+            const color = background(i, stripe);
+            const counts = rowCounts(i);
+            let html = '<tr data-' + config.attribute + '="' + table.keys[i] + '">' +
+                '<td class="' + config.attribute + '-label" style="background-color: ' + color +
+                '; color: ' + (consensus ? 'white' : 'inherit') + ';">' +
+                table.labels[i] + (consensus ? config.badge : '') + '</td>';
+            counts.forEach((count, level) => {
+                const dontKnow = level === counts.length - 1;
+                html += '<td class="response-cell" style="background-color: ' + color + ';' +
+                    (dontKnow ? ' border-left: 2px dashed #666;' : '') + '">' +
+                    '<div class="bar-wrapper" style="height: ' + config.barHeight + 'px;">' +
+                    '<div class="distribution-bar" style="height: ' + barHeight(count) + 'px; background-color: ' +
+                    config.colors[level] + '; position: relative;">' +
+                    (!dontKnow && table.median[i] === level ? config.medianMarker : '') + '</div>' +
+                    '<div class="bar-label" style="' + (consensus ? 'color: white;' : '') + '">' +
+                    percent(count, counts) + '% (' + count + ')</div></div></td>';
+            });
+            return html + '</tr>';
+        }
+
+        function spacer(height) {
+            return height > 0 ? '<tr class="spacer"><td colspan="7" style="height: ' + height +
+                'px; padding: 0; border: none;"></td></tr>' : '';
+        }
+
+        function renderRows() {
+            if (!virtual) {
+                tbody.innerHTML = rows.map(rowHtml).join('');
+                return;
+            }
+            const top = container.scrollTop;
+            const first = Math.max(0, Math.floor(top / rowHeight) - config.overscan);
+            const last = Math.min(rows.length,
+                Math.ceil((top + container.clientHeight) / rowHeight) + config.overscan);
+            if (shown && shown[0] === first && shown[1] === last) {
+                return;
+            }
+            shown = [first, last];
+            tbody.innerHTML = spacer(first * rowHeight) +
+                rows.slice(first, last).map((row, i) => rowHtml(row, first + i)).join('') +
+                spacer((rows.length - last) * rowHeight);
+
+            // Size the spacers from real rows once some have been laid out
+            if (!measured && last > first) {
+                const rendered = Array.from(tbody.rows).filter(row => row.className !== 'spacer');
+                const height = rendered.reduce((a, row) => a + row.offsetHeight, 0) / rendered.length;
+                measured = true;
+                if (height > 0 && Math.abs(height - rowHeight) > 1) {
+                    rowHeight = height;
+                    shown = null;
+                    renderRows();
+                }
+            }
+        }
+
+        function resetRows() {
+            virtual = rows.length > config.virtualRows;
+            container.classList.toggle('virtual', virtual);
+            container.scrollTop = 0;
+            shown = null;
+        }
+
+        container.addEventListener('scroll', () => {
+            if (virtual) {
+                window.requestAnimationFrame(renderRows);
+            }
+        });
+"""
+
+SVG_CSS = """
+        #mainContent {
+            position: relative;
+        }
+
+        .svg-cell {
+            padding: 0;
+            border: none;
+        }
+
+        .matrix-svg {
+            display: block;
+            overflow: visible;
+        }
+
+        .bar-tooltip {
+            display: none;
+            position: absolute;
+            z-index: 30;
+            pointer-events: none;
+            background-color: #000000;
+            color: white;
+            font-size: 11px;
+            padding: 3px 6px;
+            border-radius: 3px;
+            white-space: nowrap;
+        }
+"""
+
+# All rows in one SVG in one table cell, laid out on the header's columns, with one tooltip
+SVG_RENDERER = """
+        const svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
+        svg.setAttribute('class', 'matrix-svg');
+        const svgCell = document.createElement('td');
+        svgCell.className = 'svg-cell';
+        svgCell.colSpan = config.colors.length + 1;
+        svgCell.appendChild(svg);
+        const svgRow = document.createElement('tr');
+        svgRow.appendChild(svgCell);
+        tbody.replaceChildren(svgRow);
+
+        const tooltip = document.createElement('div');
+        tooltip.className = 'bar-tooltip';
+        container.appendChild(tooltip);
+        const header = document.querySelector('.matrix-table thead tr');
+        const measure = document.createElement('canvas').getContext('2d');
+        const layout = config.svg;
+        let columns = [];
+        let rowBoxes = [];
+
+        function wrapLabel(text, width) {
+            const lines = [];
+            let line = '';
+            text.split(/\\s+/).forEach(word => {
+                const candidate = line ? line + ' ' + word : word;
+                if (line && measure.measureText(candidate).width > width) {
+                    lines.push(line);
+                    line = word;
+                } else {
+                    line = candidate;
+                }
+            });
+            return line ? lines.concat([line]) : lines;
+        }
+
+        function barPath(left, right, bottom, height) {
+            const top = bottom - height;
+            const r = Math.min(layout.radius, height, (right - left) / 2);
+            return '<path d="M' + left + ',' + bottom + 'V' + (top + r) + 'Q' + left + ',' + top + ' ' +
+                (left + r) + ',' + top + 'H' + (right - r) + 'Q' + right + ',' + top + ' ' + right + ',' +
+                (top + r) + 'V' + bottom + 'Z"';
+        }
+
+        function renderRows() {
+            const offset = header.cells[0].offsetLeft;
+            columns = Array.from(header.cells).map(th => [th.offsetLeft - offset, th.offsetWidth]);
+            const width = header.offsetWidth;
+            measure.font = 'bold ' + layout.labelSize + 'px ' + window.getComputedStyle(document.body).fontFamily;
+
+            const parts = [];
+            let y = 0;
+            rowBoxes = [];
+            rows.forEach((i, stripe) => {
+                const consensus = table.consensus[i];
+                const textColor = consensus ? 'white' : '#333';
+                const lines = wrapLabel(table.labels[i], columns[0][1] - 2 * layout.labelPadding);
+                const lineHeight = layout.labelSize * 1.3;
+                const labelHeight = lines.length * lineHeight + (consensus ? layout.badgeHeight + 4 : 0) +
+                    2 * layout.cellPadding;
+                const height = Math.max(labelHeight, config.barHeight + 2 * layout.cellPadding);
+
+                parts.push('<rect x="0" y="' + y + '" width="' + width + '" height="' + height +
+                    '" fill="' + background(i, stripe) + '"/>',
+                    '<path d="M0,' + (y + 0.5) + 'H' + width + '" stroke="#666"/>');
+
+                let baseline = y + (height - labelHeight) / 2 + layout.cellPadding + layout.labelSize;
+                parts.push('<text font-size="' + layout.labelSize + '" font-weight="bold" fill="' + textColor + '">' +
+                    lines.map((line, n) => '<tspan x="' + layout.labelPadding + '" y="' +
+                        (baseline + n * lineHeight) + '">' + line + '</tspan>').join('') + '</text>');
+                if (consensus) {
+                    const badgeTop = baseline + (lines.length - 1) * lineHeight + 8;
+                    parts.push('<rect x="' + layout.labelPadding + '" y="' + badgeTop + '" width="' + layout.badgeWidth +
+                        '" height="' + layout.badgeHeight + '" rx="' + layout.badgeHeight / 2 + '" fill="white"/>',
+                        '<text x="' + (layout.labelPadding + layout.badgeWidth / 2) + '" y="' + (badgeTop + 11.5) +
+                        '" font-size="10" font-weight="bold" fill="#333" text-anchor="middle">' +
+                        config.badgeText + '</text>');
+                }
+
+                const counts = rowCounts(i);
+                const labelBaseline = y + height - layout.cellPadding - 4;
+                const barBottom = labelBaseline - 11 - 6;
+                counts.forEach((count, level) => {
+                    const [left, columnWidth] = columns[level + 1];
+                    const centre = left + columnWidth / 2;
+                    const bar = barHeight(count);
+                    if (bar > 0) {
+                        parts.push(barPath(centre - layout.barWidth / 2, centre + layout.barWidth / 2, barBottom, bar) +
+                            ' fill="' + config.colors[level] + '" stroke="#666"/>');
+                    }
+                    if (level < counts.length - 1 && table.median[i] === level) {
+                        parts.push('<text x="' + centre + '" y="' + (barBottom - bar - 3) +
+                            '" font-size="14" fill="#ea4335" text-anchor="middle">▼</text>');
+                    }
+                    parts.push('<text x="' + centre + '" y="' + labelBaseline + '" font-size="11" font-weight="bold" fill="' +
+                        textColor + '" text-anchor="middle">' + percent(count, counts) + '% (' + count + ')</text>');
+                });
+                rowBoxes.push([y, height, i]);
+                y += height;
+            });
+
+            // Don't Know column divider
+            parts.push('<path d="M' + (columns[columns.length - 1][0] + 1) + ',0V' + y +
+                '" stroke="#666" stroke-width="2" stroke-dasharray="4 3"/>');
+
+            svg.setAttribute('width', width);
+            svg.setAttribute('height', y);
+            svg.setAttribute('viewBox', '0 0 ' + width + ' ' + y);
+            svg.innerHTML = parts.join('');
+        }
+
+        function resetRows() {
+            tooltip.style.display = 'none';
+        }
+
+        svg.addEventListener('mousemove', event => {
+            const box = svg.getBoundingClientRect();
+            const x = event.clientX - box.left;
+            const y = event.clientY - box.top;
+            const row = rowBoxes.find(([top, height]) => y >= top && y < top + height);
+            const level = columns.findIndex(([left, columnWidth], n) => n > 0 && x >= left && x < left + columnWidth) - 1;
+            if (!row || level < 0) {
+                tooltip.style.display = 'none';
+                return;
+            }
+            const counts = rowCounts(row[2]);
+            tooltip.innerHTML = table.labels[row[2]] + ' – ' + header.cells[level + 1].textContent.trim() + ': ' +
+                percent(counts[level], counts) + '% (' + counts[level] + ')';
+            const area = container.getBoundingClientRect();
+            tooltip.style.left = (event.clientX - area.left + container.scrollLeft + 12) + 'px';
+            tooltip.style.top = (event.clientY - area.top + container.scrollTop + 12) + 'px';
+            tooltip.style.display = 'block';
+        });
+        svg.addEventListener('mouseleave', () => {
+            tooltip.style.display = 'none';
+        });
+        window.addEventListener('resize', () => window.requestAnimationFrame(renderRows));
+        if (document.fonts) {
+            document.fonts.ready.then(renderRows);
+        }
+"""
+
+RENDERERS = {
+    'html': (HTML_CSS, HTML_RENDERER),
+    'svg': (SVG_CSS, SVG_RENDERER),
+}
+
+# SVG renderer layout, in px, after the CSS of the HTML tables
+SVG_LAYOUT = {
+    'labelSize': 15,
+    'labelPadding': 6,
+    'cellPadding': 5,
+    'barWidth': 50,
+    'radius': 3,
+    'badgeWidth': 128,
+    'badgeHeight': 16,
+}
+
+LINK_PATTERN = re.compile(r'((?:href|src)=")([^"?#]+\.html)(")')
+
+
+def group_label(kind, group):
+    """Return the tab label of a group of rows."""
+
+    grouping = SPLITS[kind]
+    return grouping.title_to.format(group=group, Group=str(group).capitalize())
+
+
+def page_name(kind, risk):
+    """Return the file name of a table page."""
+
+    return PAGE_NAMES[kind].format(risk=risk)
+
+
+def render_page(table, templates, renderer='html'):
+    """Return the page of one model table, drawn by one of RENDERERS."""
+
+    kind, risk, name = table['kind'], table['risk'], table['name']
+    attribute = TABLE_KINDS[kind][0]
+    groups = [{'group': 'all', 'label': SPLITS[kind].title_from, 'title': table_title(kind, risk, name)}]
+    for group in dict.fromkeys(table['groups']):
+        if group is not None:
+            groups.append({'group': str(group), 'label': group_label(kind, group),
+                           'title': table_title(kind, risk, name, group)})
+
+    data = {column: table[column] for column in ('keys', 'labels', 'groups', 'counts', 'dont_know',
+                                                 'median', 'consensus', 'max_count')}
+    config = {
+        'attribute': attribute,
+        'groups': groups,
+        'colors': LEVEL_COLORS,
+        'highlight': HIGHLIGHT,
+        'badge': CONSENSUS_BADGE.format(display=TABLE_KINDS[kind][2]),
+        'medianMarker': MEDIAN_MARKER,
+        'barHeight': BAR_HEIGHT,
+        'minBarHeight': MIN_BAR_HEIGHT,
+        'virtualRows': VIRTUAL_ROWS,
+        'overscan': OVERSCAN,
+        'rowHeight': ROW_HEIGHT,
+        'badgeText': '✓ CONSENSUS REACHED',
+        'svg': SVG_LAYOUT,
+    }
+
+    def script_json(value):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+    renderer_css, renderer_script = RENDERERS[renderer]
+    css = PAGE_CSS + renderer_css % {'viewport': VIEWPORT_HEIGHT}
+    script = PAGE_SCRIPT % {'table': script_json(data), 'config': script_json(config), 'renderer': renderer_script}
+
+    head, tail = templates.tables[kind]
+    head = (head.replace('{title}', groups[0]['title'])
+            .replace('    </style>', css + '    </style>', 1)
+            .replace('<table class="matrix-table">',
+                     '<div id="groupTabs" class="group-tabs"></div>\n            <table class="matrix-table">', 1))
+    tail = (tail.replace('{name}', name)
+            .replace('</body>', script + '</body>', 1))
+    return head + '\n' + tail
+
+
+def write_page(table, templates, renderer='html'):
+    """Write the page of one model table; returns (page bytes, split chart bytes it replaces)."""
+
+    directory = Path(table['directory'])
+    page_file = directory / page_name(table['kind'], table['risk'])
+    write_chart(page_file, render_page(table, templates, renderer))
+    chart_metrics.wrote(page_file)
+
+    groups = list(dict.fromkeys(table['groups']))
+    replaced = sum(chart_metrics.file_size(directory / output_name(table['kind'], table['risk'], group))
+                   for group in groups)
+    print(f"Created: {page_file} ({len(table['keys'])} rows, {len(groups)} groups)")
+    return chart_metrics.file_size(page_file), replaced
+
+
+def page_link(target, kinds):
+    """Return the page link (with its ?group=) replacing a link to a split chart, or None."""
+
+    path = Path(target)
+    fields = parse_chart_name(path.name)
+    if fields is None:
+        return None
+    kind = next((kind for kind in kinds if SPLITS[kind].chart_type == fields['type']), None)
+    if kind is None:
+        return None
+    group = fields['group'] if SPLITS[kind].attribute == 'sector' else fields['actors']
+    if group in (None, 'all'):
+        return None
+    return (path.parent / page_name(kind, fields['risk'])).as_posix() + f'?group={group}'
+
+
+def link_index(index_file, kinds):
+    """Point the links to split charts in an index page at the table pages; returns the links changed."""
+
+    content = read_chart(index_file)
+    changed = 0
+
+    def replace(match):
+        nonlocal changed
+        link = page_link(match.group(2), kinds)
+        if link is None:
+            return match.group(0)
+        changed += 1
+        return match.group(1) + link + match.group(3)
+
+    new_content = LINK_PATTERN.sub(replace, content)
+    if new_content != content:
+        write_chart(index_file, new_content)
+    return changed
+
+
+def main():
+    """Build the table pages from the table model."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--kind', action='append', choices=sorted(SPLITS), help='only this kind of table (repeatable)')
+    parser.add_argument('--risk', type=int, action='append', help='only this risk (repeatable)')
+    parser.add_argument('--model', default=MODEL_FILE, help=f'table model file (default {MODEL_FILE})')
+    parser.add_argument('--renderer', choices=sorted(RENDERERS), default='html',
+                        help='draw the rows as HTML table rows (default) or in one SVG per table')
+    parser.add_argument('--index', nargs='?', const='index.html', metavar='FILE',
+                        help='point the split chart links of this index page at the pages (default index.html)')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    kinds = args.kind or list(SPLITS)
+    try:
+        tables = load_model(args.model)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"ERROR: Could not load the table model ({e}); run python table_model.py extract first")
+    tables = [table for table in tables
+              if table['kind'] in kinds and (not args.risk or table['risk'] in args.risk)]
+
+    worker = partial(write_page, templates=TableTemplates(), renderer=args.renderer)
+    results = [result for result in run_jobs(worker, tables, args.jobs) if result is not None]
+    page_bytes = sum(size for size, _ in results)
+    replaced_bytes = sum(replaced for _, replaced in results)
+
+    if args.index:
+        links = link_index(args.index, kinds)
+        print(f"\nUpdated: {args.index} ({links} links)" if links else f"\nNo split chart links in {args.index}")
+
+    print(f"\nCompleted! Built {len(results)} pages ({page_bytes / 1024:.0f} KB) "
+          f"in place of {replaced_bytes / 1024:.0f} KB of table charts.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+Registry of the chart fix scripts and a scheduler for running them together.
+
+Each fix script is registered with the files it targets, the transforms it
+requires, the ones it must run after when both are selected, the ones it
+conflicts with, the ones whose effect it partly undoes when both run (their
+postconditions are then not checked), and a postcondition probe that tells
+whether its effect is present in a file. schedule() expands prerequisites, rejects conflicting
+selections and orders everything so each transform runs once and after its
+dependencies; batch_files() then groups the target files by the transforms
+that apply to them, so each batch is applied in a single read/write per file.
+"""
+
+import re
+
+from chart_anchors import AnchorIndex
+from chart_catalog import RISK_NAMES, SCENARIOS, catalog, parse_chart_name
+from chart_io import read_chart, write_chart
+
+SEVERITY_CHARTS = ('risk*_bau_chart.html', 'risk*_pm_chart.html')
+
+DPI_COMMENT = '// Fix blurry canvas on high-DPI displays'
+
+# The block apply_working_dpi_fix.py puts in place of the ctx definition
+WORKING_DPI_FIX = DPI_COMMENT + '''
+        const dpr = window.devicePixelRatio || 1;
+        const canvas = document.getElementById('severityChart');
+        const rect = canvas.getBoundingClientRect();
+        canvas.width = rect.width * dpr;
+        canvas.height = rect.height * dpr;
+        ctx.scale(dpr, dpr);'''
+
+# Competing ways of making the severity canvas sharp; at most one may run
+DPI_STRATEGIES = (
+    'add_dpi_fix_only',
+    'add_dpi_fix_simple',
+    'apply_working_dpi_fix',
+    'final_fix',
+    'fix_blank_charts_final',
+    'fix_blur_and_labels',
+    'fix_chart_resolution',
+    'fix_ctx_properly',
+    'fix_dpi_final_correct',
+    'fix_iframe_blur_final',
+    'fix_missing_ctx',
+)
+
+# Scripts that rewrite the whole .severity-label rule and its positions
+LABEL_LAYOUTS = ('fix_canvas_and_labels', 'fix_layout_optimization', 'revert_harm_labels')
+
+# Scripts that move the mouse handlers below the chart creation
+HANDLER_MOVES = ('final_fix', 'fix_event_handler_order', 'move_handlers_simple')
+
+
+class ScheduleError(ValueError):
+    """Raised when a selection of transforms cannot be scheduled."""
+
+
+class Transform:
+    """A registered fix script and its scheduling metadata."""
+
+    def __init__(self, name, probe, targets=SEVERITY_CHARTS, requires=(), after=(),
+                 conflicts=(), overrides=(), description=''):
+        self.name = name
+        self.probe = probe
+        self.targets = tuple(targets)
+        self.requires = tuple(requires)
+        self.after = tuple(after)
+        self.conflicts = tuple(conflicts)
+        self.overrides = tuple(overrides)
+        self.description = description
+
+    def __repr__(self):
+        return f"Transform({self.name!r})"
+
+
+def css_value(index, anchor, prop):
+    """Return the last value of a property in the first rule opened by anchor."""
+
+    match = index.first(anchor)
+    if match is None:
+        return None
+    end = index.block_end(match.end())
+    values = re.findall(rf'(?<![\w-]){prop}:\s*([^;]*);', index.content[match.end():end])
+    return values[-1].strip() if values else None
+
+
+def nth_label_left(index, nth):
+    """Return the 'left' value of a .severity-label:nth-child(n) rule."""
+
+    for match in index.all('severity_label_nth'):
+        if match.group('nth') == str(nth):
+            end = index.block_end(match.end())
+            value = re.search(r'left:\s*([^;]*);', index.content[match.end():end])
+            return value.group(1).strip() if value else None
+    return None
+
+
+def css_value_is(index, anchor, prop, expected, pattern=r'-?\d+px'):
+    """True if a property is at expected, or has a value the fix scripts' pattern wouldn't touch."""
+
+    value = css_value(index, anchor, prop)
+    return value is None or value == expected or not re.fullmatch(pattern, value)
+
+
+def rules_are(index, anchor, css):
+    """True if every CSS rule opened by anchor reads exactly css (indentation aside)."""
+
+    return all(index.content[start:end] == css.lstrip() for start, end in index.blocks(anchor))
+
+
+def handlers_after_chart(content):
+    """True if the mouse handlers are absent or follow the chart creation."""
+
+    handlers = content.find('// Add mouse move handler for hover interaction')
+    chart = content.find('const chart = new Chart(')
+    return handlers == -1 or (chart != -1 and handlers > chart)
+
+
+# Postcondition probes: probe(content, file_path, index) -> True if applied
+
+def probe_dpi_comment(content, file_path, index):
+    return index.has('dpi_fix')
+
+
+def probe_dpi_after_plugin(content, file_path, index):
+    # Imported here because add_dpi_fix_only imports this module
+    from add_dpi_fix_only import DPI_NAMES, plugin_scope_names
+
+    if index.has('dpi_fix'):
+        return True
+    # Nothing is inserted next to a plugin whose scope already sets up the canvas
+    names = plugin_scope_names(content)
+    return names is None or bool(DPI_NAMES & names)
+
+
+def probe_working_dpi(content, file_path, index):
+    return (len(index.all('dpi_fix')) == 1 and WORKING_DPI_FIX in content and
+            '// Set up high-DPI canvas' not in content and
+            '// Handle iframe resize' not in content)
+
+
+def probe_iframe_blur(content, file_path, index):
+    return '// Set up high-DPI canvas BEFORE creating chart' in content
+
+
+def probe_blur_and_labels(content, file_path, index):
+    # Imported here because fix_blur_and_labels imports this module
+    from fix_blur_and_labels import HIGH_DPI_ANCHORS, OLD_DPI_FIX_RE
+
+    # The resize handling is only added where no resize handler exists yet
+    resize_handled = ('const chart = new Chart(ctx,' not in content or
+                      "window.addEventListener('resize'" in content or
+                      not any(anchor in content for anchor in HIGH_DPI_ANCHORS))
+    return (css_value_is(index, 'severity_label', 'font-size', '11px') and
+            css_value_is(index, 'severity_label', 'max-width', '14%', r'\d+%') and
+            not OLD_DPI_FIX_RE.search(content) and resize_handled)
+
+
+def probe_chart_resolution(content, file_path, index):
+    return 'devicePixelRatio:' in content
+
+
+def probe_iframe_quality(content, file_path, index):
+    return 'image-rendering' in content and 'canvas {' in content
+
+
+def probe_no_duplicate_canvas(content, file_path, index):
+    return (DPI_COMMENT + "\n        const dpr = window.devicePixelRatio || 1;\n"
+            "        const canvas = document.getElementById('severityChart');") not in content
+
+
+def probe_dpi_before_chart(content, file_path, index):
+    return 'ctx.scale(dpr, dpr);\n\n        const chart = new Chart(ctx,' in content
+
+
+def probe_handlers_after_chart(content, file_path, index):
+    return handlers_after_chart(content)
+
+
+def probe_final_fix(content, file_path, index):
+    return index.has('dpi_fix') and handlers_after_chart(content)
+
+
+def probe_canvas_and_labels(content, file_path, index):
+    return nth_label_left(index, 1) == '9%'
+
+
+def probe_layout_optimization(content, file_path, index):
+    # Imported here because fix_layout_optimization imports this module
+    from fix_layout_optimization import (LEGEND_CSS, LEGEND_ITEM_CSS, SEVERITY_LABEL_CSS,
+                                         SEVERITY_LABEL_POSITIONS)
+
+    # The positions are only put back in front of the narrow-screen media query
+    if index.has('media_600'):
+        positioned = SEVERITY_LABEL_POSITIONS.strip() in content
+    else:
+        positioned = not any(match.group('nth') in ('1', '2', '3', '4', '5')
+                             for match in index.all('severity_label_nth'))
+    return (positioned and
+            rules_are(index, 'severity_label', SEVERITY_LABEL_CSS) and
+            rules_are(index, 'legend', LEGEND_CSS) and
+            rules_are(index, 'legend_item', LEGEND_ITEM_CSS) and
+            css_value_is(index, 'severity_labels', 'margin-top', '-5px') and
+            css_value_is(index, 'severity_labels', 'margin-bottom', '8px', r'\d+px'))
+
+
+def probe_revert_harm_labels(content, file_path, index):
+    # Imported here because revert_harm_labels imports this module
+    from revert_harm_labels import LABEL_MEDIA_QUERY_RE, ORIGINAL_LABEL_CSS, ORIGINAL_POSITIONS
+
+    return (len(index.all('severity_label_nth')) == 5 and ORIGINAL_POSITIONS.strip() in content and
+            rules_are(index, 'severity_label', ORIGINAL_LABEL_CSS) and
+            not LABEL_MEDIA_QUERY_RE.search(content) and
+            css_value_is(index, 'severity_labels', 'margin-top', '-10px') and
+            css_value_is(index, 'severity_labels', 'margin-bottom', '10px', r'\d+px'))
+
+
+def probe_move_labels_up(content, file_path, index):
+    return (css_value(index, 'severity_labels', 'margin-top') == '-15px' and
+            css_value(index, 'severity_labels', 'margin-bottom') == '5px')
+
+
+def probe_severity_height(content, file_path, index):
+    return (css_value_is(index, 'chart_container', 'height', '350px', r'\d+px') and
+            not re.search(r'body\s*\{[^}]*background:\s*#f5f5f5;', content))
+
+
+def probe_title_and_height(content, file_path, index):
+    return (css_value(index, 'banner', 'font-size') == '14px' and
+            css_value(index, 'chart_container', 'height') == '280px')
+
+
+def probe_severity_controls(content, file_path, index):
+    return css_value(index, 'controls', 'flex-wrap') == 'nowrap'
+
+
+def probe_risk_names(content, file_path, index):
+    # Imported here because fix_risk_names imports this module
+    from fix_risk_names import banner_text
+
+    # Charts without a known risk and scenario have no banner to fix
+    fields = parse_chart_name(file_path.name)
+    if (fields is None or fields['type'] != 'severity' or fields['risk'] not in RISK_NAMES or
+            fields['scenario'] not in SCENARIOS):
+        return True
+    return f'<div class="banner">\n            {banner_text(file_path)}\n        </div>' in content
+
+
+def probe_expert_data_columns(content, file_path, index):
+    # Imported here because encode_expert_data imports this module
+    from encode_expert_data import declaration_columns, expert_data_span, is_encoded
+
+    if is_encoded(content):
+        return True
+    # expertData that does not fit the columnar form is left as it is
+    span = expert_data_span(content)
+    if span is None:
+        return False
+    try:
+        return declaration_columns(content[span[0]:span[1]]) is None
+    except ValueError:
+        return False
+
+
+def _dpi_conflicts(name):
+    return tuple(other for other in DPI_STRATEGIES if other != name)
+
+
+def _group_conflicts(name, group):
+    return tuple(other for other in group if other != name)
+
+
+TRANSFORMS = [
+    Transform('add_dpi_fix_only', probe_dpi_after_plugin,
+              conflicts=_dpi_conflicts('add_dpi_fix_only'),
+              description='Insert the DPI fix after medianValuesPlugin'),
+    Transform('add_dpi_fix_simple', probe_dpi_comment,
+              conflicts=_dpi_conflicts('add_dpi_fix_simple'),
+              description='Insert the DPI fix after medianValuesPlugin (line based)'),
+    Transform('apply_working_dpi_fix', probe_working_dpi,
+              conflicts=_dpi_conflicts('apply_working_dpi_fix'),
+              description='Replace any DPI code with the exemplar DPI fix'),
+    Transform('final_fix', probe_final_fix,
+              conflicts=_dpi_conflicts('final_fix') + _group_conflicts('final_fix', HANDLER_MOVES),
+              description='Exemplar structure: ctx, plugin, DPI fix, handlers after chart'),
+    Transform('encode_expert_data', probe_expert_data_columns,
+              description='Store expertData by column with a decoder'),
+    Transform('fix_blank_charts_final', probe_dpi_comment,
+              conflicts=_dpi_conflicts('fix_blank_charts_final'),
+              description='Add ctx and the DPI fix after the plugin'),
+    Transform('fix_blur_and_labels', probe_blur_and_labels,
+              after=LABEL_LAYOUTS,
+              conflicts=_dpi_conflicts('fix_blur_and_labels'),
+              overrides=LABEL_LAYOUTS,
+              description='Resize-aware DPI handling and smaller harm labels'),
+    Transform('fix_canvas_and_labels', probe_canvas_and_labels,
+              conflicts=_group_conflicts('fix_canvas_and_labels', LABEL_LAYOUTS),
+              description='Wrapping harm labels with narrow-width positions'),
+    Transform('fix_chart_resolution', probe_chart_resolution,
+              conflicts=_dpi_conflicts('fix_chart_resolution'),
+              description='Chart.js devicePixelRatio option and post-creation resize'),
+    Transform('fix_ctx_properly', probe_dpi_comment,
+              conflicts=_dpi_conflicts('fix_ctx_properly'),
+              description='Insert ctx and the DPI fix after the canvas definition'),
+    Transform('fix_dpi_final_correct', probe_dpi_comment,
+              conflicts=_dpi_conflicts('fix_dpi_final_correct'),
+              description='DPI fix after the plugin without redefining ctx'),
+    Transform('fix_duplicate_canvas', probe_no_duplicate_canvas,
+              after=DPI_STRATEGIES,
+              overrides=('apply_working_dpi_fix',),
+              description='Drop the duplicate const canvas from the DPI fix'),
+    Transform('fix_event_handler_order', probe_handlers_after_chart,
+              conflicts=_group_conflicts('fix_event_handler_order', HANDLER_MOVES),
+              description='Move mouse handlers after chart creation (regex)'),
+    Transform('fix_iframe_blur_final', probe_iframe_blur,
+              conflicts=_dpi_conflicts('fix_iframe_blur_final'),
+              description='High-DPI canvas setup before chart creation plus resize handler'),
+    Transform('fix_iframe_quality', probe_iframe_quality,
+              after=('fix_chart_resolution',),
+              description='Crisp-rendering CSS for charts inside iframes'),
+    Transform('fix_layout_optimization', probe_layout_optimization,
+              conflicts=_group_conflicts('fix_layout_optimization', LABEL_LAYOUTS),
+              description='Label positions, compact legend and label margins'),
+    Transform('fix_missing_ctx', probe_dpi_comment,
+              conflicts=_dpi_conflicts('fix_missing_ctx'),
+              description='Define ctx with the DPI fix before chart creation'),
+    Transform('fix_risk_names', probe_risk_names,
+              description='Banner text from RISK_NAMES and scenario'),
+    Transform('fix_severity_controls', probe_severity_controls,
+              description='Keep the mode controls on one line'),
+    Transform('move_dpi_fix_correctly', probe_dpi_before_chart,
+              requires=('fix_duplicate_canvas',),
+              description='Move the canvas-free DPI fix right before chart creation'),
+    Transform('move_handlers_simple', probe_handlers_after_chart,
+              conflicts=_group_conflicts('move_handlers_simple', HANDLER_MOVES),
+              description='Move mouse handlers before the UI controls (line based)'),
+    Transform('move_labels_up', probe_move_labels_up,
+              after=LABEL_LAYOUTS,
+              overrides=LABEL_LAYOUTS,
+              description='Raise the harm labels into the free space'),
+    Transform('reduce_severity_height', probe_severity_height,
+              description='350px chart height and white background'),
+    Transform('reduce_title_and_height', probe_title_and_height,
+              after=('reduce_severity_height',),
+              overrides=('reduce_severity_height',),
+              description='Smaller banner and 280px chart height'),
+    Transform('revert_harm_labels', probe_revert_harm_labels,
+              conflicts=_group_conflicts('revert_harm_labels', LABEL_LAYOUTS),
+              description='Restore the original harm label CSS and margins'),
+]
+
+REGISTRY = {transform.name: transform for transform in TRANSFORMS}
+
+
+def get_transform(name):
+    """Return a registered transform by module name (a .py suffix is ignored)."""
+
+    if name.endswith('.py'):
+        name = name[:-3]
+    if name not in REGISTRY:
+        raise ScheduleError(f"Unknown transform {name}")
+    return REGISTRY[name]
+
+
+def schedule(names):
+    """Return the ordered list of transforms to run for the requested names.
+
+    Prerequisites are added, duplicates dropped, and requested order is kept
+    wherever no requires/after relation says otherwise. Raises ScheduleError
+    for unknown names, conflicting selections and dependency cycles.
+    """
+
+    requested = [get_transform(name) for name in names]
+
+    # Close over prerequisites
+    selected = {}
+    stack = list(reversed(requested))
+    while stack:
+        transform = stack.pop()
+        if transform.name in selected:
+            continue
+        selected[transform.name] = transform
+        stack.extend(get_transform(name) for name in transform.requires)
+
+    for transform in selected.values():
+        for other in transform.conflicts:
+            if other in selected:
+                raise ScheduleError(f"{transform.name} conflicts with {other}")
+
+    ordered = []
+    done = set()
+    visiting = []
+
+    def visit(transform):
+        if transform.name in done:
+            return
+        if transform.name in visiting:
+            cycle = ' -> '.join(visiting[visiting.index(transform.name):] + [transform.name])
+            raise ScheduleError(f"Dependency cycle: {cycle}")
+        visiting.append(transform.name)
+        for name in transform.requires + transform.after:
+            if name in selected:
+                visit(selected[name])
+        visiting.pop()
+        done.add(transform.name)
+        ordered.append(transform)
+
+    for transform in requested + list(selected.values()):
+        visit(transform)
+
+    return ordered
+
+
+def batch_files(transforms, root='.'):
+    """Group target files by the transforms that apply to them.
+
+    Returns a list of (names, files) batches with names in schedule order. Every file
+    appears in exactly one batch, so the pipeline reads and writes it once
+    and runs each transform on it at most once. Targets are matched against
+    the chart catalog of root (see chart_catalog.py).
+    """
+
+    chart_catalog = catalog(root)
+    per_file = {}
+    for transform in transforms:
+        matched = set()
+        for target in transform.targets:
+            matched.update(chart_catalog.glob(target))
+        for file_path in sorted(matched):
+            per_file.setdefault(file_path, []).append(transform.name)
+
+    batches = {}
+    for file_path, names in per_file.items():
+        batches.setdefault(tuple(names), []).append(file_path)
+    return [(list(names), sorted(files)) for names, files in batches.items()]
+
+
+def already_applied(name, content, file_path, index=None):
+    """Return True if the named transform's postcondition already holds.
+
+    The probe only looks at the anchor index and a few substrings, so it is
+    much cheaper than running the transform to find out nothing changes.
+    """
+
+    if index is None:
+        index = AnchorIndex(content)
+    return REGISTRY[name].probe(content, file_path, index)
+
+
+def update_chart(name, transform_content, file_path, *args, pass_index=False, check_applied=True,
+                 error=None, verb='Updated', detail=None):
+    """Apply a fix script's transform_content to one chart and write it back.
+
+    The per-file driver shared by the standalone fix scripts: the chart is
+    skipped when the named transform's probe already holds (unless
+    check_applied is false), when transform_content returns None (printing
+    error, if given, as an ERROR line) or when it changes nothing, so an
+    unchanged chart keeps its mtime. Extra args go to transform_content,
+    followed by the chart's AnchorIndex when pass_index is set. detail, if
+    given, is called with file_path for a note on the Updated line. Returns
+    True if the chart was written.
+    """
+
+    content = read_chart(file_path)
+    index = AnchorIndex(content)
+
+    # Nothing to do if the file is already in the target state
+    if check_applied and already_applied(name, content, file_path, index):
+        print(f"Skipped (already applied): {file_path.name}")
+        return False
+
+    if pass_index:
+        args += (index,)
+    new_content = transform_content(content, file_path, *args)
+    if new_content is None:
+        if error:
+            print(f"ERROR: {error} in {file_path.name}")
+        return False
+
+    # Nothing changed: leave the file and its mtime alone
+    if new_content == content:
+        print(f"Skipped (unchanged): {file_path.name}")
+        return False
+
+    write_chart(file_path, new_content)
+
+    if detail:
+        print(f"{verb}: {file_path.name} -> {detail(file_path)}")
+    else:
+        print(f"{verb}: {file_path.name}")
+    return True
+
+
+def failed_postconditions(transforms, content, file_path, index=None):
+    """Return the names of transforms whose probe does not hold for content.
+
+    A transform overridden by another one in transforms is not checked, since
+    the other one undoes part of its effect on purpose.
+    """
+
+    if index is None:
+        index = AnchorIndex(content)
+    overridden = {name for t in transforms for name in t.overrides}
+    return [t.name for t in transforms
+            if t.name not in overridden and not t.probe(content, file_path, index)]
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Watch the exemplars, transform definitions and charts, and keep the charts patched.
+
+The charts are held in memory by a ChartDaemon (see chart_daemon.py) and the
+working directory is watched with inotify, or by polling where inotify is
+not available. Bursts of events are debounced, then only the affected work
+is redone:
+
+- an exemplar changed: every chart is synchronised with the exemplar
+  segment by segment (see exemplar_sync.py), and the watched transforms are
+  re-run on the charts that changed
+- a fix script changed: it is reloaded and re-run on its target charts if
+  it is one of the watched transforms (all of them if transform_registry.py
+  changed)
+- a chart changed on disk: the watched transforms are re-run on that chart
+
+Files written by the watcher itself are recognised and don't trigger work.
+
+    python watch_charts.py fix_layout_optimization move_labels_up
+    python watch_charts.py --no-sync reduce_title_and_height --debounce 1
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+
+import transform_registry
+from chart_anchors import apply_edits
+from chart_daemon import ChartDaemon
+from chart_journal import compute_edits
+from exemplar_sync import DEFAULT_EXEMPLARS, Exemplar
+
+# Seconds without new events before a burst is processed
+DEBOUNCE = 0.3
+
+# Seconds between scans when polling
+POLL_INTERVAL = 1.0
+
+# inotify event masks (linux/inotify.h)
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Names of files changed in a directory, from Linux inotify through ctypes."""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout=None):
+        """Return the names changed within timeout seconds (None = wait for any)."""
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        data = os.read(self.fd, 64 * 1024)
+        names = set()
+        pos = 0
+        while pos < len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, pos)
+            pos += EVENT_HEADER.size
+            names.add(os.fsdecode(data[pos:pos + length].rstrip(b'\0')))
+            pos += length
+        return names
+
+
+class PollingWatcher:
+    """Names of files changed in a directory, found by comparing stat snapshots."""
+
+    def __init__(self, directory, interval=POLL_INTERVAL):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """Return the names changed within timeout seconds (None = wait for any)."""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            time.sleep(max(0.0, delay))
+            snapshot = self.scan()
+            names = {name for name in snapshot.keys() | self.snapshot.keys()
+                     if snapshot.get(name) != self.snapshot.get(name)}
+            self.snapshot = snapshot
+            if names or (deadline is not None and time.monotonic() >= deadline):
+                return names
+
+
+def make_watcher(directory, poll=False):
+    """Return an inotify watcher, or a polling one if asked or inotify is unavailable."""
+
+    if not poll:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(directory)
+
+
+class ChartWatcher:
+    """Decides what a set of changed files affects and redoes that work."""
+
+    def __init__(self, transforms, exemplar=None, sync=True, journal=False):
+        self.daemon = ChartDaemon()
+        self.daemon.load_all()
+        self.transforms = transforms
+        self.exemplar = exemplar
+        self.sync = sync
+        self.journal = journal
+
+        self.targets = set()
+        for transform in transform_registry.schedule(transforms):
+            self.targets.update(transform.targets)
+
+    def exemplar_path(self):
+        """The exemplar charts are synchronised with (--exemplar or the first found)."""
+
+        if self.exemplar:
+            return Path(self.exemplar)
+        return next((Path(name) for name in DEFAULT_EXEMPLARS if Path(name).exists()), None)
+
+    def classify(self, name):
+        """Return 'exemplar', 'transform', 'chart' or None for a changed file name."""
+
+        if name in DEFAULT_EXEMPLARS or name == self.exemplar:
+            return 'exemplar'
+        if name.endswith('.py') and name[:-3] in self.daemon.watched_modules():
+            return 'transform'
+        if any(fnmatch(name, target) for target in self.targets):
+            return 'chart'
+        return None
+
+    def relevant(self, name):
+        """True if a changed file needs work (charts the watcher wrote itself don't)."""
+
+        kind = self.classify(name)
+        if kind == 'chart':
+            model = self.daemon.models.get(Path(name))
+            return model is None or model.changed_on_disk()
+        return kind is not None
+
+    def sync_charts(self, output):
+        """Synchronise the in-memory charts with the exemplar; return the charts changed."""
+
+        exemplar_path = self.exemplar_path()
+        if exemplar_path is None or not exemplar_path.exists():
+            output.append("ERROR: No exemplar found to synchronise with")
+            return []
+        exemplar = Exemplar(exemplar_path)
+
+        synced = []
+        for path in sorted(self.daemon.models):
+            if path.resolve() == exemplar_path.resolve():
+                continue
+            model = self.daemon.model(path, output)
+            if model is None:
+                continue
+            edits, drifted, _, _ = exemplar.diff(model.content)
+            if not edits:
+                continue
+            content = apply_edits(model.content, edits)
+            steps = [('exemplar_sync', compute_edits(model.content, content))] if (
+                self.journal or model.steps) else []
+            model.update(content, None, steps)
+            synced.append(path.name)
+            output.append(f"Synced: {path.name} ({len(drifted)} segments)")
+        return synced
+
+    def process(self, names):
+        """Redo the work affected by the changed files; returns the output lines."""
+
+        kinds = {}
+        for name in names:
+            kind = self.classify(name)
+            if kind is not None:
+                kinds.setdefault(kind, set()).add(name)
+
+        output = []
+        charts = set()
+
+        # Charts edited outside the watcher (our own writes match the model)
+        for name in sorted(kinds.get('chart', ())):
+            path = Path(name)
+            if not path.exists():
+                if self.daemon.models.pop(path, None) is not None:
+                    output.append(f"Removed: {name}")
+                continue
+            model = self.daemon.models.get(path)
+            if model is None or model.changed_on_disk():
+                charts.add(name)
+
+        if 'exemplar' in kinds and self.sync:
+            charts.update(self.sync_charts(output))
+
+        # Edited fix scripts are re-run (with their prerequisites) if scheduled
+        changed_modules = {name[:-3] for name in kinds.get('transform', ())}
+        if 'transform_registry' in changed_modules:
+            rerun = list(self.transforms)
+        else:
+            scheduled = [transform.name for transform in transform_registry.schedule(self.transforms)]
+            rerun = [name for name in scheduled if name in changed_modules]
+
+        if self.transforms and charts:
+            chart_output, _ = self.daemon.apply(self.transforms, sorted(charts), flush=False,
+                                                journal=self.journal)
+            output.extend(chart_output)
+        if rerun:
+            transform_output, _ = self.daemon.apply(rerun, flush=False, journal=self.journal)
+            output.extend(transform_output)
+
+        flush_output, written = self.daemon.flush()
+        output.extend(flush_output)
+        output.append(f"Wrote {written} charts")
+        return output
+
+    def run(self, watcher, debounce=DEBOUNCE):
+        """Process debounced bursts of changes until interrupted."""
+
+        pending = set()
+        while True:
+            names = watcher.wait(debounce if pending else None)
+            names = {name for name in names if self.relevant(name)}
+            if names:
+                pending |= names
+                continue
+            if not pending:
+                continue
+
+            start = time.perf_counter()
+            print(f"Changed: {', '.join(sorted(pending))}")
+            for line in self.process(pending):
+                print(line)
+            print(f"Done in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+            pending = set()
+
+
+def main():
+    """Watch the working directory and keep the charts up to date."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('transforms', nargs='*', help='transforms to keep applied')
+    parser.add_argument('--exemplar', help='exemplar chart to synchronise with '
+                        '(default: first of %s found)' % ', '.join(DEFAULT_EXEMPLARS))
+    parser.add_argument('--no-sync', action='store_true', help="don't synchronise charts when an exemplar changes")
+    parser.add_argument('--journal', action='store_true', help='journal the edits (see chart_journal.py)')
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE,
+                        help=f'seconds to wait for a burst of changes to settle (default {DEBOUNCE})')
+    parser.add_argument('--poll', action='store_true', help='poll instead of using inotify')
+    args = parser.parse_args()
+
+    transforms = [name.removesuffix('.py') for name in args.transforms]
+    try:
+        chart_watcher = ChartWatcher(transforms, args.exemplar, not args.no_sync, args.journal)
+    except transform_registry.ScheduleError as e:
+        raise SystemExit(f"ERROR: {e}")
+
+    watcher = make_watcher('.', args.poll)
+    mode = 'polling' if isinstance(watcher, PollingWatcher) else 'inotify'
+    print(f"Watching {len(chart_watcher.daemon.models)} charts ({mode}); "
+          f"transforms: {', '.join(transforms) or 'none'}; "
+          f"exemplar sync: {'off' if args.no_sync else chart_watcher.exemplar_path() or 'no exemplar'}")
+    print("Press Ctrl+C to stop.\n")
+
+    try:
+        chart_watcher.run(watcher, args.debounce)
+    except KeyboardInterrupt:
+        output, written = chart_watcher.daemon.flush()
+        for line in output:
+            print(line)
+        print(f"\nStopped (flushed {written} charts).")
+
+
+if __name__ == '__main__':
+    main()